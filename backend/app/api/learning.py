@@ -3,28 +3,25 @@ Learning System API endpoints
 """
 from fastapi import APIRouter, Depends, BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func
+from sqlalchemy.orm import undefer
 from typing import List
 
-from app.models.database import get_db, LearnedExample, LearningLog
-from app.services.learning_service import LearningService
+from app.models.database import get_db, LearnedExample, LearningLog, NodeUsageStat
 from app.schemas.workflow import LearnedExampleResponse
 
 router = APIRouter(prefix="/api/learning", tags=["learning"])
 
 
 @router.post("/run")
-async def run_learning_cycle(
-    background_tasks: BackgroundTasks,
-    db: AsyncSession = Depends(get_db)
-):
+async def run_learning_cycle(background_tasks: BackgroundTasks):
     """Trigger learning cycle manually"""
+    from app.worker import learning_lock, run_learning_job
     
-    async def run_learning():
-        service = LearningService(db)
-        await service.run_learning_cycle()
+    if await learning_lock.is_running():
+        return {"message": "Learning cycle already running"}
     
-    background_tasks.add_task(run_learning)
+    background_tasks.add_task(run_learning_job)
     
     return {"message": "Learning cycle started in background"}
 
@@ -34,6 +31,7 @@ async def list_examples(
     skip: int = 0,
     limit: int = 50,
     source: str = None,
+    include_duplicates: bool = False,
     db: AsyncSession = Depends(get_db)
 ):
     """List learned examples"""
@@ -42,6 +40,8 @@ async def list_examples(
     
     if source:
         stmt = stmt.where(LearnedExample.source == source)
+    if not include_duplicates:
+        stmt = stmt.where(LearnedExample.duplicate_of.is_(None))
     
     stmt = stmt.order_by(
         LearnedExample.stars.desc(),
@@ -61,7 +61,10 @@ async def get_example(
 ):
     """Get learned example with full workflow JSON"""
     
-    stmt = select(LearnedExample).where(LearnedExample.id == example_id)
+    # workflow_json is deferred and stored compressed; load and decompress it here
+    stmt = select(LearnedExample).options(
+        undefer(LearnedExample.workflow_json)
+    ).where(LearnedExample.id == example_id)
     result = await db.execute(stmt)
     example = result.scalar_one_or_none()
     
@@ -120,34 +123,32 @@ async def get_learning_stats(
 ):
     """Get learning system statistics"""
     
+    total = await db.scalar(select(func.count(LearnedExample.id)))
+    near_duplicates = await db.scalar(
+        select(func.count(LearnedExample.id)).where(LearnedExample.duplicate_of.is_not(None))
+    )
+    
     # Count examples by source
-    stmt = select(LearnedExample)
-    result = await db.execute(stmt)
-    all_examples = result.scalars().all()
+    stmt = select(LearnedExample.source, func.count(LearnedExample.id)).group_by(
+        LearnedExample.source
+    )
+    by_source = dict((await db.execute(stmt)).all())
     
-    stats = {
-        "total_examples": len(all_examples),
-        "by_source": {},
-        "by_complexity": {},
-        "top_nodes": {}
-    }
+    # Count examples by complexity
+    complexity = func.coalesce(LearnedExample.complexity_level, "unknown")
+    stmt = select(complexity, func.count(LearnedExample.id)).group_by(complexity)
+    by_complexity = dict((await db.execute(stmt)).all())
     
-    # Group by source
-    for example in all_examples:
-        source = example.source
-        stats["by_source"][source] = stats["by_source"].get(source, 0) + 1
-        
-        complexity = example.complexity_level or "unknown"
-        stats["by_complexity"][complexity] = stats["by_complexity"].get(complexity, 0) + 1
-        
-        # Count node usage
-        if example.nodes_used:
-            for node in example.nodes_used:
-                stats["top_nodes"][node] = stats["top_nodes"].get(node, 0) + 1
-    
-    # Get top 20 nodes
-    stats["top_nodes"] = dict(
-        sorted(stats["top_nodes"].items(), key=lambda x: x[1], reverse=True)[:20]
-    )
+    # Top 20 nodes from the counters maintained at ingest
+    stmt = select(NodeUsageStat.node_type, NodeUsageStat.count).order_by(
+        NodeUsageStat.count.desc()
+    ).limit(20)
+    top_nodes = dict((await db.execute(stmt)).all())
     
-    return stats
+    return {
+        "total_examples": total or 0,
+        "near_duplicates": near_duplicates or 0,
+        "by_source": by_source,
+        "by_complexity": by_complexity,
+        "top_nodes": top_nodes
+    }
@@ -8,6 +8,9 @@ from typing import List
 
 from app.models.database import get_db, LLMConfig
 from app.schemas.workflow import LLMConfigCreate, LLMConfigResponse
+from app.services.llm_config_cache import active_llm_config_cache
+from app.services.llm_cache import llm_response_cache
+from app.services.llm_latency import llm_latency
 
 router = APIRouter(prefix="/api/llm", tags=["llm"])
 
@@ -24,6 +27,11 @@ async def create_llm_config(
         stmt = update(LLMConfig).values(is_default=False)
         await db.execute(stmt)
     
+    # Only one config can be the hedging secondary
+    if config.is_secondary:
+        stmt = update(LLMConfig).values(is_secondary=False)
+        await db.execute(stmt)
+    
     llm_config = LLMConfig(
         name=config.name,
         provider=config.provider,
@@ -32,12 +40,15 @@ async def create_llm_config(
         model_name=config.model_name,
         temperature=config.temperature,
         max_tokens=config.max_tokens,
+        max_concurrency=config.max_concurrency,
         is_default=config.is_default,
+        is_secondary=config.is_secondary,
         is_active=config.is_default  # Auto-activate if default
     )
     
     db.add(llm_config)
     await db.commit()
+    await active_llm_config_cache.invalidate(db)
     await db.refresh(llm_config)
     
     return llm_config
@@ -91,10 +102,55 @@ async def activate_llm_config(
     
     config.is_active = True
     await db.commit()
+    await active_llm_config_cache.invalidate(db)
     
     return {"message": f"Configuration '{config.name}' activated"}
 
 
+@router.put("/config/{config_id}/secondary")
+async def set_secondary_llm_config(
+    config_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """Designate the config used for hedged requests and failover"""
+    
+    stmt = update(LLMConfig).values(is_secondary=False)
+    await db.execute(stmt)
+    
+    config = await db.get(LLMConfig, config_id)
+    if not config:
+        raise HTTPException(status_code=404, detail="Configuration not found")
+    
+    config.is_secondary = True
+    await db.commit()
+    await active_llm_config_cache.invalidate(db)
+    
+    return {"message": f"Configuration '{config.name}' set as secondary"}
+
+
+@router.delete("/config/{config_id}/secondary")
+async def clear_secondary_llm_config(db: AsyncSession = Depends(get_db)):
+    """Turn off hedging by clearing the secondary designation"""
+    stmt = update(LLMConfig).values(is_secondary=False)
+    await db.execute(stmt)
+    await db.commit()
+    await active_llm_config_cache.invalidate(db)
+    
+    return {"message": "Secondary configuration cleared"}
+
+
+@router.get("/latency")
+async def get_llm_latency():
+    """First-token and total latency histograms per provider/model"""
+    return {
+        "histograms": llm_latency.snapshot(),
+        "failures": [
+            {"provider": provider, "model": model, "count": count}
+            for (provider, model), count in sorted(llm_latency.failures.items())
+        ]
+    }
+
+
 @router.delete("/config/{config_id}")
 async def delete_llm_config(
     config_id: int,
@@ -110,5 +166,19 @@ async def delete_llm_config(
     
     await db.delete(config)
     await db.commit()
+    await active_llm_config_cache.invalidate(db)
     
     return {"message": "Configuration deleted"}
+
+
+@router.get("/cache/stats")
+async def get_llm_cache_stats():
+    """Get LLM response cache hit/miss counters"""
+    return llm_response_cache.stats()
+
+
+@router.delete("/cache")
+async def clear_llm_cache():
+    """Clear the LLM response cache"""
+    await llm_response_cache.clear()
+    return {"message": "LLM response cache cleared"}
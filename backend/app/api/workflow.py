@@ -1,22 +1,59 @@
 """
 Workflow API endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, AsyncIterator, Optional
+import json
 
 from app.models.database import get_db
 from app.services.workflow_service import WorkflowService
+from app.services.job_service import job_manager, pipeline_runner, batch_runner
+from app.core.config import settings
 from app.schemas.workflow import (
     UserRequirement,
     Answer,
     WorkflowResponse,
-    WorkflowListResponse
+    WorkflowListResponse,
+    PipelineRunRequest,
+    BatchRunRequest,
+    PipelineJobResponse
 )
 
 router = APIRouter(prefix="/api/workflow", tags=["workflow"])
 
 
+def _sse_event(data: dict, event: Optional[str] = None) -> str:
+    """Format a server-sent event"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+def _sse_response(chunks: AsyncIterator[str], result_key: str) -> StreamingResponse:
+    """Relay LLM tokens as SSE 'token' events, then the full text as 'done'"""
+    
+    async def events():
+        parts = []
+        try:
+            async for chunk in chunks:
+                parts.append(chunk)
+                yield _sse_event({"token": chunk}, "token")
+        except Exception as e:
+            yield _sse_event({"detail": str(e)}, "error")
+            return
+        yield _sse_event({result_key: "".join(parts)}, "done")
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Disable proxy buffering
+        }
+    )
+
+
 @router.post("/create", response_model=WorkflowResponse)
 async def create_workflow(
     requirement: UserRequirement,
@@ -27,15 +64,71 @@ async def create_workflow(
     return await service.create_workflow_request(requirement)
 
 
+@router.post("/run", response_model=PipelineJobResponse, status_code=202)
+async def run_pipeline(run_request: PipelineRunRequest):
+    """Run analyze, spec, JSON and test stages as one background job"""
+    job = job_manager.submit(pipeline_runner(run_request))
+    return job.to_dict()
+
+
+@router.post("/batch", response_model=PipelineJobResponse, status_code=202)
+async def run_batch(batch: BatchRunRequest):
+    """Generate workflows for many requirements as one background job.
+    
+    Follow per-item results via /jobs/{job_id}/events ('item' events).
+    """
+    if len(batch.requirements) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch exceeds {settings.BATCH_MAX_ITEMS} requirements"
+        )
+    job = job_manager.submit(batch_runner(batch), kind="batch")
+    return job.to_dict()
+
+
+@router.get("/jobs/{job_id}", response_model=PipelineJobResponse)
+async def get_job(job_id: str):
+    """Poll a background pipeline job"""
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Follow a background pipeline job as server-sent events"""
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def events():
+        async for item in job.events():
+            yield _sse_event(item["data"], item["event"])
+        yield _sse_event(
+            PipelineJobResponse(**job.to_dict()).model_dump(mode="json"), "done"
+        )
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
 @router.post("/{request_id}/analyze")
 async def analyze_requirement(
     request_id: int,
+    use_cache: bool = True,
     db: AsyncSession = Depends(get_db)
 ):
     """Analyze requirement and generate clarifying questions"""
     service = WorkflowService(db)
     try:
-        result = await service.analyze_requirement(request_id)
+        result = await service.analyze_requirement(request_id, use_cache=use_cache)
         return result
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -59,17 +152,33 @@ async def submit_answers(
 @router.post("/{request_id}/generate-spec")
 async def generate_spec(
     request_id: int,
+    use_cache: bool = True,
     db: AsyncSession = Depends(get_db)
 ):
     """Generate development specification"""
     service = WorkflowService(db)
     try:
-        spec = await service.generate_development_spec(request_id)
+        spec = await service.generate_development_spec(request_id, use_cache=use_cache)
         return {"development_spec": spec}
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 
+@router.post("/{request_id}/generate-spec/stream")
+async def generate_spec_stream(
+    request_id: int,
+    use_cache: bool = True,
+    db: AsyncSession = Depends(get_db)
+):
+    """Stream development specification over server-sent events"""
+    service = WorkflowService(db)
+    try:
+        chunks = await service.stream_development_spec(request_id, use_cache=use_cache)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return _sse_response(chunks, "development_spec")
+
+
 @router.put("/{request_id}/update-spec")
 async def update_spec(
     request_id: int,
@@ -91,26 +200,43 @@ async def update_spec(
 @router.post("/{request_id}/generate-json")
 async def generate_json(
     request_id: int,
+    use_cache: bool = True,
     db: AsyncSession = Depends(get_db)
 ):
     """Generate n8n workflow JSON"""
     service = WorkflowService(db)
     try:
-        workflow_json = await service.generate_workflow_json(request_id)
+        workflow_json = await service.generate_workflow_json(request_id, use_cache=use_cache)
         return {"workflow_json": workflow_json}
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 
+@router.post("/{request_id}/generate-json/stream")
+async def generate_json_stream(
+    request_id: int,
+    use_cache: bool = True,
+    db: AsyncSession = Depends(get_db)
+):
+    """Stream n8n workflow JSON over server-sent events"""
+    service = WorkflowService(db)
+    try:
+        chunks = await service.stream_workflow_json(request_id, use_cache=use_cache)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return _sse_response(chunks, "workflow_json")
+
+
 @router.post("/{request_id}/test-optimize")
 async def test_optimize(
     request_id: int,
+    use_cache: bool = True,
     db: AsyncSession = Depends(get_db)
 ):
     """Test and optimize generated workflow"""
     service = WorkflowService(db)
     try:
-        result = await service.test_and_optimize(request_id)
+        result = await service.test_and_optimize(request_id, use_cache=use_cache)
         return result
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -131,11 +257,15 @@ async def get_workflow(
 
 @router.get("/", response_model=WorkflowListResponse)
 async def list_workflows(
-    skip: int = 0,
-    limit: int = 20,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db)
 ):
-    """List workflow requests"""
+    """List workflow request summaries (keyset-paginated via cursor)"""
     service = WorkflowService(db)
-    result = await service.list_workflow_requests(skip, limit)
+    try:
+        result = await service.list_workflow_requests(skip, limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return result
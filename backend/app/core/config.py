@@ -2,7 +2,7 @@
 Application configuration settings
 """
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 import os
 
 
@@ -17,7 +17,16 @@ class Settings(BaseSettings):
     PORT: int = 8000
     
     # Database
-    DATABASE_URL: str = "sqlite+aiosqlite:///./n8n_generator.db"
+    DATABASE_URL: str = "sqlite+aiosqlite:///./n8n_generator.db"  # or postgresql+asyncpg://...
+    DB_ECHO: bool = False  # Log every SQL statement
+    DB_AUTO_CREATE: bool = True  # create_all on startup; disable when schema is managed by Alembic
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800  # Seconds; keeps server-side idle timeouts from killing pooled connections
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # Safe with WAL; FULL for extra durability
+    SQLITE_CACHE_SIZE_KB: int = 65536
     
     # LLM Configuration
     DEFAULT_LLM_PROVIDER: str = "openai"
@@ -29,16 +38,70 @@ class Settings(BaseSettings):
     OLLAMA_BASE_URL: str = "http://localhost:11434"
     OLLAMA_MODEL: str = "llama3.2"
     
+    # Offline "fake" provider for benchmarks and local runs
+    FAKE_LLM_LATENCY_SECONDS: float = 0.05  # Delay before the first token
+    FAKE_LLM_TOKENS_PER_SECOND: float = 0.0  # 0 streams as fast as possible
+    FAKE_LLM_ERROR_RATE: float = 0.0  # Fraction of calls that fail
+    FAKE_LLM_SEED: Optional[int] = None
+    
+    # LLM client pooling
+    LLM_CLIENT_IDLE_TTL_SECONDS: int = 600  # Evict cached clients unused for this long
+    LLM_HTTP_MAX_CONNECTIONS: int = 100
+    LLM_HTTP_MAX_KEEPALIVE: int = 20
+    LLM_HTTP_TIMEOUT_SECONDS: float = 600.0
+    LLM_CONFIG_CACHE_CHECK_SECONDS: int = 30  # How often workers check for config changes
+    LLM_DEFAULT_MAX_CONCURRENCY: int = 4  # Used when an LLMConfig sets no max_concurrency
+    LLM_JSON_MAX_ATTEMPTS: int = 2  # Generations tried before giving up on malformed JSON
+    LLM_JSON_MAX_PREAMBLE_CHARS: int = 300  # Prose allowed before the JSON value starts
+    
+    # Hedged requests against the secondary LLMConfig
+    LLM_HEDGING_ENABLED: bool = False
+    LLM_HEDGE_QUANTILE: float = 0.95  # Hedge once the primary is slower than this first-token quantile
+    LLM_HEDGE_MIN_SAMPLES: int = 20  # First-token samples needed before the histogram is trusted
+    LLM_HEDGE_DEFAULT_DELAY_SECONDS: float = 10.0
+    LLM_HEDGE_MIN_DELAY_SECONDS: float = 1.0
+    
+    # Background pipeline jobs
+    PIPELINE_MAX_CONCURRENT_JOBS: int = 4
+    PIPELINE_JOB_RETENTION: int = 1000  # Finished jobs kept in memory for polling
+    BATCH_MAX_ITEMS: int = 200
+    BATCH_MAX_CONCURRENT_ITEMS: int = 32  # Items in flight per batch; LLM calls are further capped per provider
+    
+    # LLM response cache
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_TTL_SECONDS: int = 86400
+    LLM_CACHE_MAX_ENTRIES: int = 1000  # In-memory LRU size
+    LLM_CACHE_MAX_BYTES: int = 50 * 1024 * 1024  # In-memory LRU size in bytes
+    LLM_CACHE_PERSIST: bool = True  # Back the LRU with a database table
+    LLM_CACHE_DB_MAX_ENTRIES: int = 10000
+    
     # Learning System
     LEARNING_ENABLED: bool = True
     LEARNING_SCHEDULE_CRON: str = "0 0 * * 0"  # Every Sunday at midnight
+    LEARNING_SCHEDULER_IN_PROCESS: bool = True  # Set False when `python -m app.worker learn` runs the schedule
+    LEARNING_LOCK_TTL_SECONDS: int = 300  # Leader lock lease; renewed while a cycle runs
     N8N_DOCS_URL: str = "https://docs.n8n.io"
     N8N_TEMPLATES_URL: str = "https://n8n.io/workflows"
+    EXAMPLE_INDEX_REFRESH_SECONDS: int = 60  # How often the example index picks up new rows
+    EXAMPLE_SUMMARY_TOKEN_BUDGET: int = 600  # Size of each stored example skeleton used in prompts
+    EXAMPLE_COMPRESSION_LEVEL: int = 6  # zlib level for stored example workflow bodies
+    LEARNING_HOST_RATE_PER_SECOND: float = 10.0  # Per-host request rate for crawlers
+    LEARNING_HOST_BURST: int = 20
+    LEARNING_MAX_CONCURRENT_REPOS: int = 4
+    LEARNING_MAX_CONCURRENT_DOWNLOADS: int = 8
+    LEARNING_CRAWL_CACHE_ENABLED: bool = True  # Conditional requests; unchanged pages and files are skipped
+    LEARNING_PARSE_WORKERS: int = 0  # Parser processes; 0 = one per CPU core
+    LEARNING_PARSE_BATCH_SIZE: int = 20  # Workflow files parsed per worker task
+    LEARNING_NEAR_DUPLICATE_THRESHOLD: float = 0.9  # Structural similarity above which examples are near-duplicates
+    LEARNING_NEAR_DUPLICATE_ACTION: str = "cluster"  # cluster (stored, hidden from retrieval) or reject
     
     # GitHub
     GITHUB_TOKEN: str = ""
     GITHUB_SEARCH_QUERY: str = "n8n workflow"
     GITHUB_MIN_STARS: int = 10
+    GITHUB_MAX_FILES_PER_REPO: int = 200  # Candidate workflow files downloaded per repository
+    GITHUB_MIN_FILE_BYTES: int = 100  # Smaller JSON files cannot hold a workflow
+    GITHUB_MAX_FILE_BYTES: int = 2_000_000
     
     # CORS
     FRONTEND_URL: str = "http://localhost:3000"
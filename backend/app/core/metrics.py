@@ -0,0 +1,341 @@
+"""
+In-process metrics exposed in the Prometheus text format
+"""
+import bisect
+import contextvars
+import functools
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Bucket upper bounds in seconds
+FAST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SLOW_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[Any, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    """A named metric family whose children are keyed by label values"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def labels(self, *values: Any) -> Any:
+        """Child for one combination of label values"""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._new_child()
+            self._children[key] = child
+        return child
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}"
+        ]
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    def _render_child(self, key: Tuple[str, ...], child: Any) -> List[str]:
+        raise NotImplementedError
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def _render_child(self, key, child) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"]
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = FAST_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def _render_child(self, key, child) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metric families and renders them for scraping"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = FAST_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests_total = registry.counter(
+    "http_requests_total", "HTTP requests handled", ("method", "route", "status")
+)
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds", "Time to produce the response head", ("method", "route")
+)
+http_request_db_queries = registry.histogram(
+    "http_request_db_queries", "Database queries issued per HTTP request", ("route",), COUNT_BUCKETS
+)
+http_request_db_seconds = registry.histogram(
+    "http_request_db_seconds", "Database time spent per HTTP request", ("route",)
+)
+db_query_duration_seconds = registry.histogram(
+    "db_query_duration_seconds", "Database statement execution time", ("operation",)
+)
+pipeline_stage_duration_seconds = registry.histogram(
+    "pipeline_stage_duration_seconds", "Workflow pipeline stage duration", ("stage", "status"), SLOW_BUCKETS
+)
+llm_call_duration_seconds = registry.histogram(
+    "llm_call_duration_seconds", "LLM call duration until the stream ends", ("provider", "model", "status"), SLOW_BUCKETS
+)
+llm_first_token_seconds = registry.histogram(
+    "llm_first_token_seconds", "Time to the first streamed LLM token", ("provider", "model"), SLOW_BUCKETS
+)
+llm_prompt_tokens_total = registry.counter(
+    "llm_prompt_tokens_total", "Prompt tokens sent to LLMs (estimated from characters)", ("provider", "model")
+)
+llm_completion_tokens_total = registry.counter(
+    "llm_completion_tokens_total", "Completion tokens received from LLMs (estimated from characters)", ("provider", "model")
+)
+learning_cycle_duration_seconds = registry.histogram(
+    "learning_cycle_duration_seconds", "Learning source run duration", ("learning_type", "status"), SLOW_BUCKETS
+)
+learning_examples_found_total = registry.counter(
+    "learning_examples_found_total", "Examples found by learning runs", ("learning_type",)
+)
+learning_examples_added_total = registry.counter(
+    "learning_examples_added_total", "New examples stored by learning runs", ("learning_type",)
+)
+learning_crawl_requests_total = registry.counter(
+    "learning_crawl_requests_total", "Crawler fetches by outcome (changed, unchanged, failed)", ("learning_type", "result")
+)
+
+
+class _RequestDBStats:
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+# Set by MetricsMiddleware for the duration of one HTTP request
+_request_db_stats: contextvars.ContextVar[Optional[_RequestDBStats]] = contextvars.ContextVar(
+    "request_db_stats", default=None
+)
+
+
+def instrument_engine(sync_engine: Any) -> None:
+    """Time every statement run on an engine and attribute it to the current request"""
+    from sqlalchemy import event
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._metrics_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_metrics_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+        db_query_duration_seconds.labels(operation).observe(elapsed)
+        stats = _request_db_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.seconds += elapsed
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request counts, latency and DB usage per route"""
+
+    def __init__(self, app: Callable):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = _RequestDBStats()
+        token = _request_db_stats.set(stats)
+        started = time.perf_counter()
+        status = 500
+        elapsed = None
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal status, elapsed
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                elapsed = time.perf_counter() - started
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_db_stats.reset(token)
+            # Route templates keep label cardinality bounded
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope.get("method", "")
+            http_requests_total.labels(method, route, status).inc()
+            http_request_duration_seconds.labels(method, route).observe(
+                elapsed if elapsed is not None else time.perf_counter() - started
+            )
+            http_request_db_queries.labels(route).observe(stats.queries)
+            http_request_db_seconds.labels(route).observe(stats.seconds)
+
+
+def timed_stage(stage: str) -> Callable:
+    """Decorator recording an async pipeline stage in pipeline_stage_duration_seconds"""
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            status = "error"
+            try:
+                result = await func(*args, **kwargs)
+                status = "ok"
+                return result
+            finally:
+                pipeline_stage_duration_seconds.labels(stage, status).observe(time.perf_counter() - started)
+        return wrapper
+
+    return decorator
+
+
+def timed_stream(stage: str) -> Callable:
+    """timed_stage for async methods that return a token stream.
+
+    The stage lasts until the returned stream is exhausted, not just until
+    it is returned; a stream that fails or is abandoned counts as an error.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                stream = await func(*args, **kwargs)
+            except BaseException:
+                pipeline_stage_duration_seconds.labels(stage, "error").observe(time.perf_counter() - started)
+                raise
+            return _timed_iteration(stage, started, stream)
+        return wrapper
+
+    return decorator
+
+
+async def _timed_iteration(stage: str, started: float, stream: AsyncIterator[Any]) -> AsyncIterator[Any]:
+    status = "error"
+    try:
+        async for item in stream:
+            yield item
+        status = "ok"
+    finally:
+        try:
+            # Closing the inner stream runs its own failure handling now, not at garbage collection
+            await stream.aclose()
+        finally:
+            pipeline_stage_duration_seconds.labels(stage, status).observe(time.perf_counter() - started)
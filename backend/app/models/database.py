@@ -2,10 +2,43 @@
 Database models and connection
 """
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy.orm import DeclarativeBase
-from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Boolean
+from sqlalchemy.orm import DeclarativeBase, deferred
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Boolean, Index, LargeBinary, event, inspect, text
+from sqlalchemy.types import TypeDecorator
 from datetime import datetime
+from typing import Any, Dict, Optional, Union
+import zlib
 from app.core.config import settings
+from app.core.metrics import instrument_engine
+
+
+# First byte of a zlib stream at the default window size; JSON text never starts with it
+ZLIB_HEADER = b"\x78"
+
+
+class CompressedText(TypeDecorator):
+    """Text stored zlib-compressed in a binary column.
+    
+    Values written before compression existed (plain text, or UTF-8 bytes
+    after a column type change) are read back unchanged.
+    """
+    impl = LargeBinary
+    cache_ok = True
+    
+    def process_bind_param(self, value: Optional[Union[str, bytes]], dialect) -> Optional[bytes]:
+        if value is None:
+            return None
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        return zlib.compress(value, settings.EXAMPLE_COMPRESSION_LEVEL)
+    
+    def process_result_value(self, value: Optional[Union[str, bytes]], dialect) -> Optional[str]:
+        if value is None or isinstance(value, str):
+            return value
+        value = bytes(value)
+        if value[:1] == ZLIB_HEADER:
+            value = zlib.decompress(value)
+        return value.decode("utf-8")
 
 
 class Base(DeclarativeBase):
@@ -13,12 +46,59 @@ class Base(DeclarativeBase):
     pass
 
 
+def normalize_database_url(url: str) -> str:
+    """Map plain sqlite:// and postgres:// URLs (as set by hosting platforms) to async drivers"""
+    for prefix, driver in (
+        ("postgres://", "postgresql+asyncpg://"),
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("sqlite://", "sqlite+aiosqlite://"),
+    ):
+        if url.startswith(prefix):
+            return driver + url[len(prefix):]
+    return url
+
+
+def _is_sqlite_memory(url: str) -> bool:
+    return url.startswith("sqlite") and (":memory:" in url or url.rstrip("/").endswith("sqlite+aiosqlite:"))
+
+
+def _engine_options(url: str) -> Dict[str, Any]:
+    """Pool and driver options for the configured backend"""
+    options: Dict[str, Any] = {"echo": settings.DB_ECHO, "future": True}
+    if url.startswith("sqlite"):
+        # aiosqlite connections are cheap to open, SQLAlchemy does not pool them
+        options["connect_args"] = {"timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000}
+        return options
+    options.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=True
+    )
+    return options
+
+
+DATABASE_URL = normalize_database_url(settings.DATABASE_URL)
+
 # Create async engine
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=settings.DEBUG,
-    future=True
-)
+engine = create_async_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
+instrument_engine(engine.sync_engine)
+
+
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """WAL lets readers run alongside the single writer; NORMAL sync is safe under WAL"""
+        cursor = dbapi_connection.cursor()
+        if not _is_sqlite_memory(DATABASE_URL):
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
 
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
@@ -41,9 +121,14 @@ class WorkflowRequest(Base):
     generated_json = Column(Text, nullable=True)
     test_results = Column(JSON, nullable=True)
     final_json = Column(Text, nullable=True)
-    status = Column(String(50), default="pending")  # pending, analyzing, generating, testing, completed, failed
+    status = Column(String(50), default="pending", index=True)  # pending, analyzing, generating, testing, completed, failed
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        # History is keyset-paginated on (created_at, id)
+        Index("ix_workflow_requests_created_at_id", "created_at", "id"),
+    )
 
 
 class LearnedExample(Base):
@@ -54,13 +139,40 @@ class LearnedExample(Base):
     title = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
     source = Column(String(255), nullable=False)  # official_docs, github, template
-    source_url = Column(String(512), nullable=True)
-    workflow_json = Column(Text, nullable=False)
+    source_url = Column(String(512), nullable=True, index=True)
+    # Compressed and only loaded on request (undefer); plain access raises instead of lazy-loading
+    workflow_json = deferred(Column(CompressedText, nullable=False), raiseload=True)
+    workflow_summary = Column(Text, nullable=True)  # Compact skeleton of workflow_json for prompts
+    content_hash = Column(String(64), nullable=True, unique=True, index=True)  # sha256 of canonical workflow JSON
+    minhash = Column(JSON, nullable=True)  # Structural MinHash signature; [] if too small to fingerprint
+    duplicate_of = Column(Integer, nullable=True, index=True)  # Cluster representative of a near-duplicate
     tags = Column(JSON, nullable=True)
     nodes_used = Column(JSON, nullable=True)
     complexity_level = Column(String(50), nullable=True)  # simple, medium, complex
     stars = Column(Integer, default=0)
     learned_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        # Example listings filter by source and sort by popularity
+        Index("ix_learned_examples_source_stars", "source", "stars", "learned_at"),
+        Index("ix_learned_examples_stars_learned_at", "stars", "learned_at"),
+    )
+
+
+class ExampleLSHBucket(Base):
+    """LSH band buckets of cluster representatives, for sublinear near-duplicate lookup"""
+    __tablename__ = "example_lsh_buckets"
+    
+    bucket = Column(String(32), primary_key=True)  # "<band>:<hash of the band's rows>"
+    example_id = Column(Integer, primary_key=True, index=True)
+
+
+class NodeUsageStat(Base):
+    """Node type usage counts across learned examples, maintained at ingest"""
+    __tablename__ = "node_usage_stats"
+    
+    node_type = Column(String(255), primary_key=True)
+    count = Column(Integer, default=0, nullable=False)
 
 
 class LLMConfig(Base):
@@ -75,12 +187,59 @@ class LLMConfig(Base):
     model_name = Column(String(100), nullable=False)
     temperature = Column(Integer, default=70)  # 0-100
     max_tokens = Column(Integer, default=4000)
-    is_active = Column(Boolean, default=False)
+    max_concurrency = Column(Integer, nullable=True)  # Concurrent requests allowed against this provider
+    is_active = Column(Boolean, default=False, index=True)
     is_default = Column(Boolean, default=False)
+    is_secondary = Column(Boolean, default=False)  # Hedging/failover target for the active config
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class LLMResponseCacheEntry(Base):
+    """Persistent tier of the LLM response cache"""
+    __tablename__ = "llm_response_cache"
+    
+    key = Column(String(64), primary_key=True)  # sha256 of provider, model and messages
+    provider = Column(String(50), nullable=False)
+    model_name = Column(String(100), nullable=True)
+    response = Column(Text, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class ConfigVersion(Base):
+    """Version counters for settings cached in each worker process"""
+    __tablename__ = "config_versions"
+    
+    name = Column(String(50), primary_key=True)
+    version = Column(Integer, default=0, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
+class CrawlCacheEntry(Base):
+    """HTTP validators of a crawled URL, for conditional re-fetching"""
+    __tablename__ = "crawl_cache"
+    
+    url = Column(String(1024), primary_key=True)
+    source = Column(String(50), nullable=False, index=True)  # Learning source that crawls it
+    etag = Column(String(255), nullable=True)
+    last_modified = Column(String(64), nullable=True)
+    content_hash = Column(String(64), nullable=True)  # sha256 of the last body
+    body = Column(CompressedText, nullable=True)  # Kept only for listings replayed on 304
+    fetched_at = Column(DateTime, nullable=True)  # Last full (200) response
+    checked_at = Column(DateTime, nullable=True)
+
+
+class LeaderLock(Base):
+    """Named lease held by at most one process at a time"""
+    __tablename__ = "leader_locks"
+    
+    name = Column(String(50), primary_key=True)
+    holder = Column(String(255), nullable=False)  # host:pid:nonce of the owning process
+    acquired_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False)  # Others may take over after this
+
+
 class LearningLog(Base):
     """Learning system execution log"""
     __tablename__ = "learning_logs"
@@ -91,7 +250,7 @@ class LearningLog(Base):
     examples_added = Column(Integer, default=0)
     status = Column(String(50), default="running")  # running, completed, failed
     error_message = Column(Text, nullable=True)
-    started_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, default=datetime.utcnow, index=True)
     completed_at = Column(DateTime, nullable=True)
 
 
@@ -105,8 +264,26 @@ async def get_db():
             await session.close()
 
 
+def _upgrade_schema(connection):
+    """Add columns and indexes introduced after a table was first created"""
+    inspector = inspect(connection)
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                column_type = column.type.compile(dialect=connection.dialect)
+                connection.execute(text(
+                    f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"
+                ))
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
 # Initialize database
 async def init_db():
-    """Initialize database tables"""
+    """Initialize database tables (skipped when Alembic manages the schema)"""
+    if not settings.DB_AUTO_CREATE:
+        return
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_upgrade_schema)
@@ -76,22 +76,70 @@ class WorkflowResponse(BaseModel):
         from_attributes = True
 
 
+class WorkflowSummary(BaseModel):
+    """Lightweight workflow request entry for history listings"""
+    id: int
+    status: str
+    requirement_preview: str
+    created_at: datetime
+    updated_at: datetime
+
+
 class WorkflowListResponse(BaseModel):
     """List of workflow requests"""
     total: int
-    items: List[WorkflowResponse]
+    items: List[WorkflowSummary]
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page, if any")
+
+
+class PipelineAnswer(BaseModel):
+    """Answer supplied up front, before any questions are generated"""
+    question: str
+    answer: str
+
+
+class PipelineRunRequest(BaseModel):
+    """Run the whole generation pipeline as one background job"""
+    requirement: str = Field(..., description="User's workflow requirement description")
+    answers: Optional[List[PipelineAnswer]] = Field(
+        None,
+        description="Answers supplied up front; when given, requirement analysis is skipped"
+    )
+    use_cache: bool = True
+
+
+class BatchRunRequest(BaseModel):
+    """Run the generation pipeline for many requirements as one background job"""
+    requirements: List[UserRequirement] = Field(..., min_length=1)
+    use_cache: bool = True
+
+
+class PipelineJobResponse(BaseModel):
+    """Background pipeline job status"""
+    job_id: str
+    kind: str
+    status: str  # queued, running, completed, failed
+    stage: Optional[str] = None
+    request_id: Optional[int] = None
+    error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
 
 
 class LLMConfigCreate(BaseModel):
     """Create LLM configuration"""
     name: str
-    provider: str  # openai, anthropic, ollama, custom
+    provider: str  # openai, anthropic, ollama, custom, fake (offline benchmarks)
     api_key: Optional[str] = None
     api_url: Optional[str] = None
     model_name: str
     temperature: int = Field(70, ge=0, le=100)
     max_tokens: int = Field(4000, ge=100, le=32000)
+    max_concurrency: Optional[int] = Field(None, ge=1, le=256)
     is_default: bool = False
+    is_secondary: bool = False
 
 
 class LLMConfigResponse(BaseModel):
@@ -103,8 +151,10 @@ class LLMConfigResponse(BaseModel):
     model_name: str
     temperature: int
     max_tokens: int
+    max_concurrency: Optional[int] = None
     is_active: bool
     is_default: bool
+    is_secondary: Optional[bool] = False
     created_at: datetime
     
     class Config:
@@ -123,6 +173,7 @@ class LearnedExampleResponse(BaseModel):
     complexity_level: Optional[str]
     stars: int
     learned_at: datetime
+    duplicate_of: Optional[int] = None
     
     class Config:
         from_attributes = True
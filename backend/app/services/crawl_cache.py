@@ -0,0 +1,145 @@
+"""
+Conditional fetching for the learning crawlers, backed by a persistent crawl cache
+"""
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import httpx
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import learning_crawl_requests_total
+from app.models.database import CrawlCacheEntry
+from app.services.rate_limiter import HostRateLimiter
+
+
+class CrawlResult:
+    """Outcome of one cached fetch.
+
+    status is "changed" (new content to process), "unchanged" (same content
+    as the last successful crawl; nothing to do) or "failed" (any other
+    response). text holds the body for changed results, and for unchanged
+    ones fetched with keep_body.
+    """
+
+    __slots__ = ("url", "status", "response", "text")
+
+    def __init__(self, url: str, status: str, response: Optional[httpx.Response] = None, text: Optional[str] = None):
+        self.url = url
+        self.status = status
+        self.response = response
+        self.text = text
+
+    @property
+    def changed(self) -> bool:
+        return self.status == "changed"
+
+    @property
+    def unchanged(self) -> bool:
+        return self.status == "unchanged"
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+
+class CrawlCache:
+    """ETag / Last-Modified / content-hash cache for one learning source.
+
+    Entries are loaded up front so concurrent fetches never touch the session.
+    Updates are held back until save(), which callers run only after the
+    fetched content has been stored, so a failed run is simply re-crawled.
+    """
+
+    def __init__(self, db: AsyncSession, rate_limiter: HostRateLimiter, source: str):
+        self.db = db
+        self.rate_limiter = rate_limiter
+        self.source = source
+        self.enabled = settings.LEARNING_CRAWL_CACHE_ENABLED
+        self._entries: Dict[str, CrawlCacheEntry] = {}
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self.counts = {"changed": 0, "unchanged": 0, "failed": 0}
+
+    async def load(self) -> None:
+        stmt = select(CrawlCacheEntry).where(CrawlCacheEntry.source == self.source)
+        result = await self.db.execute(stmt)
+        self._entries = {entry.url: entry for entry in result.scalars().all()}
+
+    def _record(self, url: str, status: str, response: Optional[httpx.Response] = None, text: Optional[str] = None) -> CrawlResult:
+        self.counts[status] += 1
+        learning_crawl_requests_total.labels(self.source, status).inc()
+        return CrawlResult(url, status, response, text)
+
+    async def get(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        keep_body: bool = False
+    ) -> CrawlResult:
+        """Conditionally GET a URL.
+
+        keep_body stores the body so an unchanged (304) listing can still be
+        replayed; page and file bodies are not kept.
+        """
+        key = str(httpx.URL(url, params=params))
+        entry = self._entries.get(key) if self.enabled else None
+        if entry is not None and keep_body and entry.body is None:
+            entry = None  # A 304 could not be replayed, so ask for the full body
+        headers = dict(headers or {})
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        response = await self.rate_limiter.get(client, url, headers=headers, params=params)
+        now = datetime.utcnow()
+
+        if response.status_code == 304 and entry is not None:
+            self._pending[key] = {"checked_at": now}
+            return self._record(url, "unchanged", response, entry.body if keep_body else None)
+
+        if response.status_code != 200:
+            return self._record(url, "failed", response)
+
+        content_hash = hashlib.sha256(response.content).hexdigest()
+        update = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "content_hash": content_hash,
+            "body": response.text if keep_body else None,
+            "fetched_at": now,
+            "checked_at": now
+        }
+        self._pending[key] = update
+        if entry is not None and entry.content_hash == content_hash:
+            # Server ignored the validators but nothing changed
+            return self._record(url, "unchanged", response, response.text if keep_body else None)
+        return self._record(url, "changed", response, response.text)
+
+    def discard(self, url: str, params: Optional[Dict[str, Any]] = None) -> None:
+        """Drop validators gathered for a URL this run, so the next crawl refetches it.
+
+        Used for listings whose files were not all fetched: saving the
+        listing would turn it into a 304 that hides the missing files.
+        """
+        self._pending.pop(str(httpx.URL(url, params=params)), None)
+
+    async def save(self) -> None:
+        """Persist validators gathered during the crawl"""
+        if not self.enabled or not self._pending:
+            return
+        for key, values in self._pending.items():
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = CrawlCacheEntry(url=key, source=self.source)
+                self.db.add(entry)
+                self._entries[key] = entry
+            for name, value in values.items():
+                setattr(entry, name, value)
+        self._pending.clear()
+        await self.db.commit()
@@ -0,0 +1,201 @@
+"""
+In-memory BM25 index over learned examples for relevance ranking
+"""
+import asyncio
+import math
+import re
+import time
+from typing import Dict, List, Iterable, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.database import LearnedExample
+from app.core.config import settings
+
+
+_CAMEL_RE = re.compile(r"([a-z0-9])([A-Z])")
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Title terms count more than body terms
+TITLE_WEIGHT = 2
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Split text into lowercase terms, breaking camelCase identifiers"""
+    if not text:
+        return []
+    text = _CAMEL_RE.sub(r"\1 \2", text)
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 1 or t.isdigit()]
+
+
+def node_terms(node_type: str) -> List[str]:
+    """Terms for an n8n node type such as 'n8n-nodes-base.httpRequest'"""
+    name = node_type.rsplit(".", 1)[-1]
+    terms = tokenize(name)
+    if name:
+        terms.append(name.lower())
+    return terms
+
+
+def example_terms(
+    title: Optional[str],
+    description: Optional[str],
+    tags: Optional[Iterable[str]],
+    nodes_used: Optional[Iterable[str]]
+) -> List[str]:
+    """Collect the indexed terms of a learned example"""
+    terms = tokenize(title) * TITLE_WEIGHT
+    terms += tokenize(description)
+    for tag in tags or []:
+        terms += tokenize(str(tag))
+    for node in nodes_used or []:
+        terms += node_terms(str(node))
+    return terms
+
+
+class ExampleIndex:
+    """Inverted BM25 index of learned examples, ranked with NumPy"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._doc_ids: List[int] = []
+        self._positions: Dict[int, int] = {}
+        self._lengths: List[int] = []
+        self._stars: List[int] = []
+        # term -> (document positions, term frequencies)
+        self._postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._length_array: Optional[np.ndarray] = None
+        self._stars_array: Optional[np.ndarray] = None
+        self._max_id = 0
+        self._synced_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._doc_ids)
+
+    def add(
+        self,
+        example_id: int,
+        title: Optional[str] = None,
+        description: Optional[str] = None,
+        tags: Optional[Iterable[str]] = None,
+        nodes_used: Optional[Iterable[str]] = None,
+        stars: int = 0
+    ) -> None:
+        """Add a single example to the index (no-op if already indexed)"""
+        if example_id is None or example_id in self._positions:
+            return
+
+        pos = len(self._doc_ids)
+        terms = example_terms(title, description, tags, nodes_used)
+        frequencies: Dict[str, int] = {}
+        for term in terms:
+            frequencies[term] = frequencies.get(term, 0) + 1
+
+        for term, tf in frequencies.items():
+            postings = self._postings.setdefault(term, ([], []))
+            postings[0].append(pos)
+            postings[1].append(tf)
+            self._arrays.pop(term, None)
+
+        self._doc_ids.append(example_id)
+        self._positions[example_id] = pos
+        self._lengths.append(len(terms))
+        self._stars.append(stars or 0)
+        self._length_array = None
+        self._stars_array = None
+        self._max_id = max(self._max_id, example_id)
+
+    async def refresh(self, db: AsyncSession, force: bool = False) -> int:
+        """Index examples inserted since the last refresh, returns count added"""
+        if not force and time.monotonic() - self._synced_at < settings.EXAMPLE_INDEX_REFRESH_SECONDS:
+            return 0
+
+        async with self._lock:
+            stmt = select(
+                LearnedExample.id,
+                LearnedExample.title,
+                LearnedExample.description,
+                LearnedExample.tags,
+                LearnedExample.nodes_used,
+                LearnedExample.stars
+            ).where(
+                LearnedExample.id > self._max_id,
+                # Near-duplicates are represented by their cluster's first example
+                LearnedExample.duplicate_of.is_(None)
+            ).order_by(LearnedExample.id)
+
+            result = await db.execute(stmt)
+            added = 0
+            for row in result:
+                self.add(
+                    row.id,
+                    title=row.title,
+                    description=row.description,
+                    tags=row.tags,
+                    nodes_used=row.nodes_used,
+                    stars=row.stars
+                )
+                added += 1
+
+            self._synced_at = time.monotonic()
+            return added
+
+    def _postings_array(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            postings = self._postings.get(term)
+            if postings is None:
+                return None
+            arrays = (
+                np.asarray(postings[0], dtype=np.int64),
+                np.asarray(postings[1], dtype=np.float32)
+            )
+            self._arrays[term] = arrays
+        return arrays
+
+    def search(self, query: str, limit: int = 10) -> List[int]:
+        """Return ids of the best matching examples, most relevant first"""
+        n_docs = len(self._doc_ids)
+        terms = set(tokenize(query))
+        if not n_docs or not terms or limit <= 0:
+            return []
+
+        if self._length_array is None:
+            self._length_array = np.asarray(self._lengths, dtype=np.float32)
+            self._stars_array = np.asarray(self._stars, dtype=np.float32)
+
+        lengths = self._length_array
+        avg_length = float(lengths.mean()) or 1.0
+        norm = self.k1 * (1.0 - self.b + self.b * lengths / avg_length)
+        scores = np.zeros(n_docs, dtype=np.float32)
+
+        for term in terms:
+            arrays = self._postings_array(term)
+            if arrays is None:
+                continue
+            positions, tf = arrays
+            df = positions.size
+            idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+            # Positions are unique within a posting list, so fancy-index add is safe
+            scores[positions] += idf * tf * (self.k1 + 1.0) / (tf + norm[positions])
+
+        hits = np.flatnonzero(scores > 0)
+        if not hits.size:
+            return []
+
+        k = min(limit, hits.size)
+        if k < hits.size:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+
+        # Sort by score, breaking ties by stars
+        order = np.lexsort((-self._stars_array[hits], -scores[hits]))
+        return [self._doc_ids[i] for i in hits[order]]
+
+
+# Process-wide index shared by all services
+example_index = ExampleIndex()
@@ -0,0 +1,149 @@
+"""
+Offline stand-in for an LLM provider, used for benchmarks and local runs
+"""
+import asyncio
+import hashlib
+import json
+import random
+from typing import Any, AsyncIterator, List, Optional
+
+
+class FakeLLMError(RuntimeError):
+    """Injected provider failure"""
+
+
+class FakeChunk:
+    """Minimal stand-in for a streamed message chunk"""
+
+    __slots__ = ("content",)
+
+    def __init__(self, content: str):
+        self.content = content
+
+
+def _message_text(message: Any) -> str:
+    content = getattr(message, "content", message)
+    return content if isinstance(content, str) else str(content)
+
+
+def _analysis(seed: int) -> dict:
+    count = 2 + seed % 3
+    return {
+        "summary": "Automate the described process with an n8n workflow",
+        "identified_components": ["trigger", "data transformation", "notification"],
+        "missing_information": ["Schedule or trigger details", "Target service credentials"],
+        "questions": [
+            {
+                "id": f"q{i + 1}",
+                "question": f"Clarifying question {i + 1}?",
+                "question_type": "choice" if i % 2 else "text",
+                "options": ["Option A", "Option B"] if i % 2 else None,
+                "required": True
+            }
+            for i in range(count)
+        ],
+        "estimated_complexity": ("simple", "medium", "complex")[seed % 3]
+    }
+
+
+def _spec(seed: int) -> str:
+    steps = "\n".join(f"{i + 1}. Step {i + 1}: process the incoming data" for i in range(3 + seed % 4))
+    return (
+        "# Development Specification\n\n"
+        "## Objective\nAutomate the requested process.\n\n"
+        f"## Workflow Steps\n{steps}\n\n"
+        "## Required Nodes\n- Webhook\n- Set\n- HTTP Request\n\n"
+        "## Error Handling\n- Retry failed HTTP requests\n\n"
+        "## Testing Criteria\n- Workflow runs end to end with sample data\n"
+    )
+
+
+def _workflow(seed: int) -> dict:
+    node_types = [
+        ("Webhook", "n8n-nodes-base.webhook", {"path": "incoming", "httpMethod": "POST"}),
+        ("Set", "n8n-nodes-base.set", {"values": {"string": [{"name": "status", "value": "received"}]}}),
+        ("HTTP Request", "n8n-nodes-base.httpRequest", {"url": "https://example.com/api", "method": "POST"}),
+        ("IF", "n8n-nodes-base.if", {"conditions": {"boolean": [{"value1": True}]}}),
+        ("Code", "n8n-nodes-base.code", {"jsCode": "return items;"}),
+        ("Slack", "n8n-nodes-base.slack", {"channel": "#alerts", "text": "Done"}),
+    ]
+    nodes = []
+    for i, (name, node_type, parameters) in enumerate(node_types[:3 + seed % 4]):
+        nodes.append({
+            "id": f"node-{i + 1}",
+            "name": name,
+            "type": node_type,
+            "typeVersion": 1,
+            "position": [250 + 200 * i, 300],
+            "parameters": parameters
+        })
+    connections = {
+        source["name"]: {"main": [[{"node": target["name"], "type": "main", "index": 0}]]}
+        for source, target in zip(nodes, nodes[1:])
+    }
+    return {"name": "Generated Workflow", "nodes": nodes, "connections": connections, "settings": {}}
+
+
+def _review() -> dict:
+    return {
+        "passed": True,
+        "issues": [],
+        "suggestions": ["Add error notifications"],
+        "optimization_opportunities": [],
+        "optimized_json": None
+    }
+
+
+def synthesize_response(messages: List[Any]) -> str:
+    """Build a plausible response for whichever pipeline stage the prompt belongs to"""
+    system = _message_text(messages[0]) if messages else ""
+    user = _message_text(messages[-1]) if messages else ""
+    seed = int(hashlib.sha256(user.encode("utf-8")).hexdigest()[:8], 16)
+
+    if "workflow analyst" in system:
+        return json.dumps(_analysis(seed), indent=2)
+    if "workflow architect" in system:
+        return _spec(seed)
+    if "workflow developer" in system:
+        return json.dumps(_workflow(seed), indent=2)
+    if "workflow reviewer" in system:
+        return json.dumps(_review(), indent=2)
+    return f"Fake response to: {user[:200]}"
+
+
+class FakeChatModel:
+    """Chat client that streams synthesized responses with configurable timing.
+
+    latency is the delay before the first token, tokens_per_second paces the
+    rest of the stream (0 streams as fast as possible) and error_rate is the
+    fraction of calls that fail before producing a token.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        tokens_per_second: float = 0.0,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None,
+        chars_per_token: int = 4,
+        tokens_per_chunk: int = 8
+    ):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.chars_per_token = chars_per_token
+        self.tokens_per_chunk = tokens_per_chunk
+        self._random = random.Random(seed)
+
+    async def astream(self, messages: List[Any]) -> AsyncIterator[FakeChunk]:
+        await asyncio.sleep(self.latency)
+        if self.error_rate and self._random.random() < self.error_rate:
+            raise FakeLLMError("Injected fake provider failure")
+
+        text = synthesize_response(messages)
+        chunk_size = self.chars_per_token * self.tokens_per_chunk
+        delay = self.tokens_per_chunk / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+        for start in range(0, len(text), chunk_size):
+            if start and delay:
+                await asyncio.sleep(delay)
+            yield FakeChunk(text[start:start + chunk_size])
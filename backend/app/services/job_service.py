@@ -0,0 +1,229 @@
+"""
+In-process background jobs for long-running generation pipelines
+"""
+import asyncio
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from app.models.database import AsyncSessionLocal
+from app.schemas.workflow import PipelineRunRequest, BatchRunRequest
+from app.services.workflow_service import WorkflowService
+from app.core.config import settings
+
+
+FINISHED_STATUSES = ("completed", "failed")
+
+
+class PipelineJob:
+    """State of one background job plus its ordered event history"""
+
+    def __init__(self, kind: str):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = "queued"
+        self.stage: Optional[str] = None
+        self.request_id: Optional[int] = None
+        self.error: Optional[str] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.history: List[Dict[str, Any]] = []
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def publish(self, event: str, data: Optional[Dict[str, Any]] = None) -> None:
+        """Record an event and wake every listener"""
+        self.history.append({"event": event, "data": data or {}})
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def on_stage(self, stage: str, data: Dict[str, Any]) -> None:
+        """Stage callback handed to the pipeline"""
+        self.stage = stage
+        if "request_id" in data:
+            self.request_id = data["request_id"]
+        self.publish("stage", {"stage": stage, **data})
+
+    def on_item(self, name: str, item: Dict[str, Any]) -> None:
+        """Item callback handed to the pipeline (questions and nodes as generated)"""
+        if name == "node":
+            # Parameters can be large; listeners only need to see progress
+            item = {"name": item.get("name"), "type": item.get("type")}
+        self.publish(name, item)
+
+    async def events(self) -> AsyncIterator[Dict[str, Any]]:
+        """Replay past events, then follow new ones until the job finishes"""
+        sent = 0
+        while True:
+            changed = self._changed
+            while sent < len(self.history):
+                yield self.history[sent]
+                sent += 1
+            if self.finished:
+                return
+            await changed.wait()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.stage,
+            "request_id": self.request_id,
+            "error": self.error,
+            "result": self.result,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+
+JobRunner = Callable[[PipelineJob], Awaitable[Dict[str, Any]]]
+
+
+class JobManager:
+    """Bounded worker pool that runs queued jobs and keeps recent ones for polling"""
+
+    def __init__(self, max_concurrent: int = 4, retention: int = 1000):
+        self.max_concurrent = max_concurrent
+        self.retention = retention
+        self._jobs: "OrderedDict[str, PipelineJob]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    def _ensure_workers(self) -> None:
+        # Started lazily so the queue binds to the running event loop
+        if self._workers:
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._worker())
+            for _ in range(self.max_concurrent)
+        ]
+
+    async def _worker(self) -> None:
+        while True:
+            job, runner = await self._queue.get()
+            try:
+                await self._run(job, runner)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: PipelineJob, runner: JobRunner) -> None:
+        job.status = "running"
+        job.started_at = datetime.utcnow()
+        job.publish("status", {"status": job.status})
+        try:
+            job.result = await runner(job)
+            job.status = "completed"
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+        job.finished_at = datetime.utcnow()
+        job.publish("status", {"status": job.status, "error": job.error})
+
+    def _trim(self) -> None:
+        """Forget the oldest finished jobs beyond the retention limit"""
+        excess = len(self._jobs) - self.retention
+        if excess <= 0:
+            return
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished][:excess]:
+            del self._jobs[job_id]
+
+    def submit(self, runner: JobRunner, kind: str = "pipeline") -> PipelineJob:
+        """Queue a job and return it immediately"""
+        self._ensure_workers()
+        job = PipelineJob(kind)
+        self._jobs[job.id] = job
+        self._trim()
+        self._queue.put_nowait((job, runner))
+        return job
+
+    def get(self, job_id: str) -> Optional[PipelineJob]:
+        return self._jobs.get(job_id)
+
+    async def stop(self) -> None:
+        """Cancel the workers; queued and running jobs are abandoned"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+
+def pipeline_runner(run_request: PipelineRunRequest) -> JobRunner:
+    """Build a job runner that executes the full pipeline in its own session"""
+    async def run(job: PipelineJob) -> Dict[str, Any]:
+        async with AsyncSessionLocal() as db:
+            service = WorkflowService(db)
+            return await service.run_pipeline(
+                run_request,
+                on_stage=job.on_stage,
+                on_item=job.on_item
+            )
+
+    return run
+
+
+def batch_runner(batch: BatchRunRequest) -> JobRunner:
+    """Build a job runner that fans a batch out over the pipeline.
+    
+    Each item runs in its own session; LLM calls are additionally capped per
+    provider by LLMService, so throughput follows the provider limits.
+    Finished items are published as 'item' events and reflected in job.result.
+    """
+    async def run(job: PipelineJob) -> Dict[str, Any]:
+        items = [
+            {"index": i, "status": "queued", "stage": None, "request_id": None, "error": None}
+            for i in range(len(batch.requirements))
+        ]
+        summary = {"total": len(items), "completed": 0, "failed": 0, "items": items}
+        job.result = summary
+        gate = asyncio.Semaphore(settings.BATCH_MAX_CONCURRENT_ITEMS)
+        
+        async def run_item(index: int) -> None:
+            item = items[index]
+            
+            def on_stage(stage: str, data: Dict[str, Any]) -> None:
+                item["stage"] = stage
+                if "request_id" in data:
+                    item["request_id"] = data["request_id"]
+            
+            async with gate:
+                item["status"] = "running"
+                run_request = PipelineRunRequest(
+                    requirement=batch.requirements[index].requirement,
+                    use_cache=batch.use_cache
+                )
+                try:
+                    async with AsyncSessionLocal() as db:
+                        result = await WorkflowService(db).run_pipeline(run_request, on_stage=on_stage)
+                    item.update(
+                        status="completed",
+                        final_json=result["final_json"],
+                        test_results=result["test_results"]
+                    )
+                    summary["completed"] += 1
+                except Exception as e:
+                    item.update(status="failed", error=str(e))
+                    summary["failed"] += 1
+            
+            job.stage = f"{summary['completed'] + summary['failed']}/{summary['total']}"
+            job.publish("item", dict(item))
+        
+        await asyncio.gather(*(run_item(i) for i in range(len(items))))
+        return summary
+    
+    return run
+
+
+job_manager = JobManager(
+    max_concurrent=settings.PIPELINE_MAX_CONCURRENT_JOBS,
+    retention=settings.PIPELINE_JOB_RETENTION
+)
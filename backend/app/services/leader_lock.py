@@ -0,0 +1,168 @@
+"""
+Database-backed leader lock, so a job runs in only one process at a time
+"""
+import asyncio
+import os
+import socket
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.models.database import AsyncSessionLocal, LeaderLock
+
+
+class LeaderLockHeld(Exception):
+    """The lock is held by another process, or already by this one"""
+
+
+class LeaderLockLost(Exception):
+    """The lease was taken over by another process while the block was running"""
+
+
+class DatabaseLeaderLock:
+    """A named lease in the leader_locks table.
+
+    The holder renews the lease while it works. A holder that dies without
+    releasing it is replaced once the lease expires. Every operation uses
+    its own short session, so the lock never holds a connection open.
+    """
+
+    def __init__(self, name: str, ttl_seconds: int):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        # The lease is per process; this keeps a second block in the same
+        # process from re-entering it while the first is still running
+        self._held = False
+        self._lost = False
+
+    def _expiry(self, now: datetime) -> datetime:
+        return now + timedelta(seconds=self.ttl_seconds)
+
+    @property
+    def held(self) -> bool:
+        """Whether a block in this process is running under the lease"""
+        return self._held
+
+    async def acquire(self) -> bool:
+        """Take the lease if it is free, expired or already ours.
+
+        Our own live lease can only be left over from a lingering block;
+        hold() refuses before getting here while a block is running.
+        """
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            stmt = update(LeaderLock).where(
+                LeaderLock.name == self.name,
+                or_(LeaderLock.holder == self.holder, LeaderLock.expires_at < now)
+            ).values(holder=self.holder, acquired_at=now, expires_at=self._expiry(now))
+            result = await db.execute(stmt)
+            if result.rowcount == 1:
+                await db.commit()
+                return True
+
+            # No row yet, or a live lease held by someone else
+            db.add(LeaderLock(
+                name=self.name,
+                holder=self.holder,
+                acquired_at=now,
+                expires_at=self._expiry(now)
+            ))
+            try:
+                await db.commit()
+            except IntegrityError:
+                await db.rollback()
+                return False
+            return True
+
+    async def renew(self) -> bool:
+        """Extend our lease; False if it was lost to another process"""
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            stmt = update(LeaderLock).where(
+                LeaderLock.name == self.name,
+                LeaderLock.holder == self.holder
+            ).values(expires_at=self._expiry(now))
+            result = await db.execute(stmt)
+            await db.commit()
+            return result.rowcount == 1
+
+    async def release(self) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(LeaderLock).where(
+                LeaderLock.name == self.name,
+                LeaderLock.holder == self.holder
+            ))
+            await db.commit()
+
+    async def current_holder(self) -> Optional[str]:
+        """Holder of a live lease, if any"""
+        async with AsyncSessionLocal() as db:
+            stmt = select(LeaderLock.holder).where(
+                LeaderLock.name == self.name,
+                LeaderLock.expires_at >= datetime.utcnow()
+            )
+            result = await db.execute(stmt)
+            return result.scalar_one_or_none()
+
+    async def is_running(self) -> bool:
+        """Whether a block holds the lease, in this process or any other"""
+        if self._held:
+            return True
+        return await self.current_holder() not in (None, self.holder)
+
+    async def _keep_alive(self, owner: asyncio.Task) -> None:
+        while True:
+            await asyncio.sleep(self.ttl_seconds / 3)
+            if not await self.renew():
+                # Another process took over the expired lease: two leaders
+                # now run the same job, so stop ours
+                print(f"🚨 Lost leader lock '{self.name}' to another process; cancelling this run (split brain)")
+                self._lost = True
+                owner.cancel()
+                return
+
+    @asynccontextmanager
+    async def hold(self, linger: bool = False) -> AsyncIterator[None]:
+        """Hold the lease for the duration of the block, renewing it in the background.
+
+        Raises LeaderLockHeld if another process has it, or a block in
+        this process is already running. With linger the lease is left to
+        expire a full TTL after the block ends, so processes firing the
+        same schedule a little later skip that run. If the lease is lost
+        mid-block the block is cancelled and LeaderLockLost raised.
+        """
+        if self._held:
+            raise LeaderLockHeld(self.name)
+        self._held = True
+        self._lost = False
+        try:
+            if not await self.acquire():
+                raise LeaderLockHeld(self.name)
+            owner = asyncio.current_task()
+            keep_alive = asyncio.create_task(self._keep_alive(owner))
+            try:
+                yield
+            except asyncio.CancelledError:
+                if not self._lost:
+                    raise
+                if hasattr(owner, "uncancel"):
+                    owner.uncancel()
+                raise LeaderLockLost(self.name) from None
+            finally:
+                keep_alive.cancel()
+                try:
+                    await keep_alive
+                except asyncio.CancelledError:
+                    pass
+                # A lost lease is someone else's now; leave it alone
+                if linger and not self._lost:
+                    await self.renew()
+                elif not self._lost:
+                    await self.release()
+        finally:
+            self._held = False
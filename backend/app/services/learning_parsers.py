@@ -0,0 +1,163 @@
+"""
+CPU-bound parsing for the learning crawlers, run in a process pool
+"""
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.services.workflow_fingerprint import workflow_minhash
+from app.services.workflow_summarizer import summarize_workflow
+
+
+def workflow_content_hash(parsed: Dict[str, Any]) -> str:
+    """sha256 of a workflow's canonical JSON, insensitive to key order and whitespace"""
+    canonical = json.dumps(parsed, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def estimate_complexity(workflow: Dict[str, Any]) -> str:
+    """Estimate workflow complexity based on JSON structure"""
+    node_count = len(workflow.get('nodes', []))
+    connection_count = len(workflow.get('connections', {}))
+
+    if node_count <= 3 and connection_count <= 3:
+        return "simple"
+    elif node_count <= 10 and connection_count <= 15:
+        return "medium"
+    else:
+        return "complex"
+
+
+def analyze_workflow(text: str) -> Optional[Dict[str, Any]]:
+    """Parse a candidate workflow file into LearnedExample fields.
+
+    Returns None unless the text is a JSON object with nodes.
+    """
+    try:
+        parsed = json.loads(text)
+    except (json.JSONDecodeError, TypeError):
+        return None
+    if not isinstance(parsed, dict) or 'nodes' not in parsed:
+        return None
+    try:
+        return {
+            "workflow_json": text,
+            "workflow_summary": summarize_workflow(parsed),
+            "content_hash": workflow_content_hash(parsed),
+            "nodes_used": [node.get('type', '') for node in parsed.get('nodes', [])],
+            "complexity_level": estimate_complexity(parsed),
+            "minhash": workflow_minhash(parsed)
+        }
+    except (AttributeError, TypeError):
+        # nodes present but not shaped like n8n nodes
+        return None
+
+
+def analyze_workflows(texts: List[str]) -> List[Optional[Dict[str, Any]]]:
+    """analyze_workflow over a batch, so one pool task covers many files"""
+    return [analyze_workflow(text) for text in texts]
+
+
+def parse_docs_page(html: str) -> List[Dict[str, Any]]:
+    """Workflows embedded as JSON code blocks in a documentation page"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    # Extract workflow examples (this is a simplified example)
+    # In production, you'd parse the actual structure
+    workflows = []
+    for block in soup.find_all('code', class_='language-json'):
+        workflow = analyze_workflow(block.get_text())
+        if workflow is not None:
+            workflows.append(workflow)
+    return workflows
+
+
+def parse_templates_page(html: str, limit: int = 50) -> List[Dict[str, str]]:
+    """Template cards listed on the templates page"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    # Extract template data (structure depends on actual website)
+    # This is a placeholder - you'd need to inspect the actual HTML structure
+    templates = []
+    for template in soup.find_all('div', class_='template-card')[:limit]:
+        title_elem = template.find('h3')
+        desc_elem = template.find('p', class_='description')
+        link_elem = template.find('a')
+        if title_elem and link_elem:
+            templates.append({
+                "title": title_elem.get_text(strip=True),
+                "description": desc_elem.get_text(strip=True) if desc_elem else "",
+                "url": link_elem.get('href', '')
+            })
+    return templates
+
+
+class ParsePool:
+    """Lazily started process pool for learning parsers.
+
+    Workers are spawned rather than forked so they never inherit the event
+    loop, open sockets or database connections of the API process.
+    """
+
+    def __init__(self, max_workers: int = 0):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _replace_broken(self, broken: ProcessPoolExecutor) -> None:
+        """Drop a broken pool, unless a concurrent failure already replaced it"""
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, func: Callable, *args: Any) -> Any:
+        """Run a module-level function in a worker process"""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        try:
+            return await loop.run_in_executor(executor, func, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory); start a fresh pool and retry once.
+            # Every task queued on the broken pool lands here, but only the
+            # first replaces it.
+            self._replace_broken(executor)
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+
+    async def map_batches(self, func: Callable, items: List[Any], batch_size: int) -> List[Any]:
+        """Run func over items in batches across the pool, preserving order.
+
+        Batches run concurrently; the results are returned together once
+        the last batch is done.
+        """
+        batches = [items[start:start + batch_size] for start in range(0, len(items), batch_size)]
+        results = await asyncio.gather(*[self.run(func, batch) for batch in batches])
+        return [result for batch in results for result in batch]
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+parse_pool = ParsePool(max_workers=settings.LEARNING_PARSE_WORKERS)
@@ -3,22 +3,139 @@ Learning Service for collecting and learning from n8n examples
 """
 import asyncio
 import json
-from typing import List, Dict, Any
+import posixpath
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator
 from datetime import datetime
+from urllib.parse import quote
 import httpx
-from bs4 import BeautifulSoup
-from sqlalchemy import select
+from sqlalchemy import select, or_, update, func
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer
 
-from app.models.database import LearnedExample, LearningLog
+from app.models.database import ExampleLSHBucket, LearnedExample, LearningLog, NodeUsageStat, AsyncSessionLocal
+from app.services.crawl_cache import CrawlCache, CrawlResult
+from app.services.example_index import example_index
+from app.services.learning_parsers import (
+    analyze_workflows,
+    parse_docs_page,
+    parse_pool,
+    parse_templates_page,
+    workflow_content_hash
+)
+from app.services.rate_limiter import HostRateLimiter, create_host_rate_limiter
+from app.services.workflow_fingerprint import lsh_bucket_keys, signature_similarity, workflow_minhash
+from app.services.workflow_summarizer import summarize_workflow
 from app.core.config import settings
+from app.core.metrics import (
+    learning_cycle_duration_seconds,
+    learning_examples_found_total,
+    learning_examples_added_total
+)
+
+
+# Keep IN (...) lists well under SQLite's bound-parameter limit
+DEDUPE_CHUNK_SIZE = 400
+
+# Repository paths that never hold n8n workflows
+GITHUB_SKIP_DIRS = {
+    "node_modules", ".github", ".vscode", ".idea", ".devcontainer", "dist", "build",
+    "vendor", "coverage", "locales", "i18n"
+}
+GITHUB_SKIP_FILES = {
+    "package.json", "package-lock.json", "composer.json", "lerna.json", "nx.json", "turbo.json",
+    "renovate.json", "manifest.json", "app.json", "vercel.json", "firebase.json", "angular.json",
+    "deno.json", "biome.json", "cspell.json", "tslint.json", "babel.config.json"
+}
+GITHUB_SKIP_PREFIXES = ("tsconfig", "jsconfig", ".eslintrc", ".prettierrc", ".babelrc")
+
+
+def _record_learning_metrics(log: LearningLog) -> None:
+    """Export a finished LearningLog's duration and counts"""
+    if log.started_at and log.completed_at:
+        learning_cycle_duration_seconds.labels(log.learning_type, log.status).observe(
+            (log.completed_at - log.started_at).total_seconds()
+        )
+    learning_examples_found_total.labels(log.learning_type).inc(log.examples_found or 0)
+    learning_examples_added_total.labels(log.learning_type).inc(log.examples_added or 0)
+
+
+def select_workflow_paths(tree: List[Dict[str, Any]], limit: int) -> List[str]:
+    """Pick likely workflow files from a recursive git tree listing.
+    
+    Keeps .json blobs within the size bounds outside tooling directories,
+    drops well-known config files, and prefers paths that mention workflows.
+    """
+    paths = []
+    for item in tree:
+        path = item.get("path", "")
+        if item.get("type") != "blob" or not path.lower().endswith(".json"):
+            continue
+        size = item.get("size") or 0
+        if not settings.GITHUB_MIN_FILE_BYTES <= size <= settings.GITHUB_MAX_FILE_BYTES:
+            continue
+        directory, name = posixpath.split(path.lower())
+        if name in GITHUB_SKIP_FILES or name.startswith(GITHUB_SKIP_PREFIXES) or name.endswith(".schema.json"):
+            continue
+        if GITHUB_SKIP_DIRS.intersection(directory.split("/")):
+            continue
+        paths.append(path)
+    
+    def priority(path: str) -> Tuple[int, int, str]:
+        lowered = path.lower()
+        hinted = "workflow" in lowered or "n8n" in lowered
+        return (0 if hinted else 1, path.count("/"), path)
+    
+    return sorted(paths, key=priority)[:limit]
+
+
+def create_crawler_client() -> httpx.AsyncClient:
+    """Keep-alive HTTP client sized for the crawlers' concurrency"""
+    return httpx.AsyncClient(
+        timeout=30.0,
+        follow_redirects=True,
+        limits=httpx.Limits(
+            max_connections=settings.LEARNING_MAX_CONCURRENT_REPOS + settings.LEARNING_MAX_CONCURRENT_DOWNLOADS,
+            max_keepalive_connections=settings.LEARNING_MAX_CONCURRENT_DOWNLOADS
+        )
+    )
 
 
 class LearningService:
     """Service for learning from n8n examples"""
     
-    def __init__(self, db: AsyncSession):
+    def __init__(
+        self,
+        db: AsyncSession,
+        rate_limiter: Optional[HostRateLimiter] = None,
+        http_client: Optional[httpx.AsyncClient] = None
+    ):
         self.db = db
+        self.rate_limiter = rate_limiter or create_host_rate_limiter()
+        self.http_client = http_client
+    
+    @asynccontextmanager
+    async def _crawler_client(self) -> AsyncIterator[httpx.AsyncClient]:
+        """The shared crawler client, or a temporary one when none was given"""
+        if self.http_client is not None:
+            yield self.http_client
+            return
+        async with create_crawler_client() as client:
+            yield client
+    
+    async def _run_source(self, method_name: str, http_client: Optional[httpx.AsyncClient] = None) -> Dict[str, Any]:
+        """Run one learning source on its own session so sources can overlap"""
+        async with AsyncSessionLocal() as db:
+            service = LearningService(
+                db,
+                rate_limiter=self.rate_limiter,
+                http_client=http_client or self.http_client
+            )
+            try:
+                return await getattr(service, method_name)()
+            except Exception as e:
+                return {"error": str(e)}
     
     async def run_learning_cycle(self) -> Dict[str, Any]:
         """Run complete learning cycle"""
@@ -27,28 +144,21 @@ class LearningService:
             "sources": {}
         }
         
-        # Learn from official docs
         if settings.LEARNING_ENABLED:
-            try:
-                docs_result = await self.learn_from_official_docs()
-                results["sources"]["official_docs"] = docs_result
-            except Exception as e:
-                results["sources"]["official_docs"] = {"error": str(e)}
-            
-            # Learn from templates
-            try:
-                templates_result = await self.learn_from_templates()
-                results["sources"]["templates"] = templates_result
-            except Exception as e:
-                results["sources"]["templates"] = {"error": str(e)}
-            
-            # Learn from GitHub
+            # Docs, templates and GitHub are crawled concurrently
+            sources = {
+                "official_docs": "learn_from_official_docs",
+                "templates": "learn_from_templates",
+            }
             if settings.GITHUB_TOKEN:
-                try:
-                    github_result = await self.learn_from_github()
-                    results["sources"]["github"] = github_result
-                except Exception as e:
-                    results["sources"]["github"] = {"error": str(e)}
+                sources["github"] = "learn_from_github"
+            
+            # One pooled client for every source in the cycle
+            async with self._crawler_client() as client:
+                source_results = await asyncio.gather(*[
+                    self._run_source(method_name, client) for method_name in sources.values()
+                ])
+            results["sources"] = dict(zip(sources.keys(), source_results))
         
         results["completed_at"] = datetime.utcnow().isoformat()
         return results
@@ -65,81 +175,72 @@ class LearningService:
         
         examples_found = 0
         examples_added = 0
+        candidates: List[LearnedExample] = []
+        crawl_cache = CrawlCache(self.db, self.rate_limiter, source="docs")
         
         try:
+            await crawl_cache.load()
+            
             # Crawl n8n docs for workflow examples
-            async with httpx.AsyncClient(timeout=30.0) as client:
+            async with self._crawler_client() as client:
                 # Example: Crawl workflow examples page
                 urls_to_crawl = [
                     f"{settings.N8N_DOCS_URL}/workflows/",
                     f"{settings.N8N_DOCS_URL}/integrations/",
                 ]
                 
-                for url in urls_to_crawl:
-                    try:
-                        response = await client.get(url)
-                        if response.status_code == 200:
-                            soup = BeautifulSoup(response.text, 'html.parser')
-                            
-                            # Extract workflow examples (this is a simplified example)
-                            # In production, you'd parse the actual structure
-                            code_blocks = soup.find_all('code', class_='language-json')
-                            
-                            for block in code_blocks:
-                                try:
-                                    workflow_json = block.get_text()
-                                    # Validate it's a workflow JSON
-                                    parsed = json.loads(workflow_json)
-                                    if 'nodes' in parsed:
-                                        examples_found += 1
-                                        
-                                        # Extract nodes used
-                                        nodes_used = [node.get('type', '') for node in parsed.get('nodes', [])]
-                                        
-                                        # Check if already exists
-                                        stmt = select(LearnedExample).where(
-                                            LearnedExample.source == "official_docs",
-                                            LearnedExample.workflow_json == workflow_json
-                                        )
-                                        result = await self.db.execute(stmt)
-                                        existing = result.scalar_one_or_none()
-                                        
-                                        if not existing:
-                                            example = LearnedExample(
-                                                title=f"Official Docs Example {examples_found}",
-                                                description="Extracted from n8n official documentation",
-                                                source="official_docs",
-                                                source_url=url,
-                                                workflow_json=workflow_json,
-                                                nodes_used=nodes_used,
-                                                complexity_level=self._estimate_complexity(parsed),
-                                                learned_at=datetime.utcnow()
-                                            )
-                                            self.db.add(example)
-                                            examples_added += 1
-                                except (json.JSONDecodeError, Exception):
-                                    continue
-                    except Exception:
-                        continue
+                responses = await asyncio.gather(*[
+                    crawl_cache.get(client, url) for url in urls_to_crawl
+                ], return_exceptions=True)
+            
+            # Pages unchanged since the last crawl were already learned from
+            changed = [
+                response for response in responses
+                if not isinstance(response, Exception) and response.changed
+            ]
+            # HTML and JSON parsing run in worker processes, off the event loop
+            pages = await asyncio.gather(*[
+                parse_pool.run(parse_docs_page, response.text) for response in changed
+            ])
+            
+            for response, workflows in zip(changed, pages):
+                for workflow in workflows:
+                    examples_found += 1
+                    candidates.append(LearnedExample(
+                        title=f"Official Docs Example {examples_found}",
+                        description="Extracted from n8n official documentation",
+                        source="official_docs",
+                        source_url=response.url,
+                        learned_at=datetime.utcnow(),
+                        **workflow
+                    ))
             
+            # Deduplicate the whole crawl in one batch
+            examples_added = await self._store_examples(candidates)
             await self.db.commit()
+            await crawl_cache.save()
+            if examples_added:
+                await example_index.refresh(self.db, force=True)
             
             log.status = "completed"
             log.examples_found = examples_found
             log.examples_added = examples_added
             log.completed_at = datetime.utcnow()
             await self.db.commit()
+            _record_learning_metrics(log)
             
         except Exception as e:
             log.status = "failed"
             log.error_message = str(e)
             log.completed_at = datetime.utcnow()
             await self.db.commit()
+            _record_learning_metrics(log)
             raise
         
         return {
             "examples_found": examples_found,
-            "examples_added": examples_added
+            "examples_added": examples_added,
+            "fetches": crawl_cache.counts
         }
     
     async def learn_from_templates(self) -> Dict[str, Any]:
@@ -154,56 +255,43 @@ class LearningService:
         
         examples_found = 0
         examples_added = 0
+        crawl_cache = CrawlCache(self.db, self.rate_limiter, source="templates")
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
+            await crawl_cache.load()
+            
+            async with self._crawler_client() as client:
                 # Note: This is a simplified example
                 # In production, you'd use n8n's API or scrape their templates page
-                response = await client.get(settings.N8N_TEMPLATES_URL)
-                
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    
-                    # Extract template data (structure depends on actual website)
-                    # This is a placeholder - you'd need to inspect the actual HTML structure
-                    templates = soup.find_all('div', class_='template-card')
-                    
-                    for template in templates[:50]:  # Limit to 50 templates
-                        try:
-                            # Extract template information
-                            title_elem = template.find('h3')
-                            desc_elem = template.find('p', class_='description')
-                            link_elem = template.find('a')
-                            
-                            if title_elem and link_elem:
-                                title = title_elem.get_text(strip=True)
-                                description = desc_elem.get_text(strip=True) if desc_elem else ""
-                                template_url = link_elem.get('href', '')
-                                
-                                # Fetch template JSON (if available)
-                                # This would require actual API access
-                                examples_found += 1
-                        except Exception:
-                            continue
+                response = await crawl_cache.get(client, settings.N8N_TEMPLATES_URL)
+            
+            if response.changed:
+                templates = await parse_pool.run(parse_templates_page, response.text)
+                # Fetching each template's JSON would require actual API access
+                examples_found += len(templates)
             
             await self.db.commit()
+            await crawl_cache.save()
             
             log.status = "completed"
             log.examples_found = examples_found
             log.examples_added = examples_added
             log.completed_at = datetime.utcnow()
             await self.db.commit()
+            _record_learning_metrics(log)
             
         except Exception as e:
             log.status = "failed"
             log.error_message = str(e)
             log.completed_at = datetime.utcnow()
             await self.db.commit()
+            _record_learning_metrics(log)
             raise
         
         return {
             "examples_found": examples_found,
-            "examples_added": examples_added
+            "examples_added": examples_added,
+            "fetches": crawl_cache.counts
         }
     
     async def learn_from_github(self) -> Dict[str, Any]:
@@ -218,14 +306,18 @@ class LearningService:
         
         examples_found = 0
         examples_added = 0
+        candidates: List[LearnedExample] = []
+        crawl_cache = CrawlCache(self.db, self.rate_limiter, source="github")
         
         try:
+            await crawl_cache.load()
+            
             headers = {
                 "Authorization": f"token {settings.GITHUB_TOKEN}",
                 "Accept": "application/vnd.github.v3+json"
             }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
+            async with self._crawler_client() as client:
                 # Search for n8n workflows on GitHub
                 search_url = "https://api.github.com/search/repositories"
                 params = {
@@ -235,107 +327,476 @@ class LearningService:
                     "per_page": 30
                 }
                 
-                response = await client.get(search_url, headers=headers, params=params)
+                # The result list is kept so an unchanged (304) search can be replayed
+                response = await crawl_cache.get(client, search_url, headers=headers, params=params, keep_body=True)
                 
-                if response.status_code == 200:
+                if response.text is not None:
                     data = response.json()
-                    repositories = data.get("items", [])
+                    repositories = [
+                        repo for repo in data.get("items", [])
+                        if repo.get("stargazers_count", 0) >= settings.GITHUB_MIN_STARS
+                    ]
                     
-                    for repo in repositories:
-                        if repo.get("stargazers_count", 0) < settings.GITHUB_MIN_STARS:
-                            continue
+                    # Repos and their file downloads are fetched concurrently
+                    repo_semaphore = asyncio.Semaphore(settings.LEARNING_MAX_CONCURRENT_REPOS)
+                    download_semaphore = asyncio.Semaphore(settings.LEARNING_MAX_CONCURRENT_DOWNLOADS)
+                    
+                    async def download(download_url: str) -> Optional[CrawlResult]:
+                        async with download_semaphore:
+                            try:
+                                return await crawl_cache.get(client, download_url)
+                            except httpx.HTTPError:
+                                return None
+                    
+                    async def crawl_repo(repo: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+                        # One recursive tree listing finds JSON files in every folder
+                        branch = repo.get("default_branch") or "main"
+                        trees_url = repo.get("trees_url", "").replace("{/sha}", f"/{quote(branch, safe='')}")
+                        
+                        async with repo_semaphore:
+                            try:
+                                tree_response = await crawl_cache.get(
+                                    client,
+                                    trees_url,
+                                    headers=headers,
+                                    params={"recursive": "1"}
+                                )
+                            except httpx.HTTPError:
+                                return []
                         
-                        # Search for JSON files in the repository
-                        contents_url = repo.get("contents_url", "").replace("{+path}", "")
+                        # Trees are only cached once all their files were fetched,
+                        # so an unchanged tree means every file in it is unchanged too
+                        if not tree_response.changed:
+                            return []
                         
+                        download_urls: List[str] = []
                         try:
-                            contents_response = await client.get(
-                                contents_url,
-                                headers=headers
+                            # Raw downloads do not count against the API rate limit
+                            paths = select_workflow_paths(
+                                tree_response.json().get("tree", []),
+                                settings.GITHUB_MAX_FILES_PER_REPO
                             )
-                            
-                            if contents_response.status_code == 200:
-                                contents = contents_response.json()
-                                
-                                for item in contents:
-                                    if item.get("name", "").endswith(".json"):
-                                        # Download and parse the JSON file
-                                        download_url = item.get("download_url")
-                                        if download_url:
-                                            file_response = await client.get(download_url)
-                                            if file_response.status_code == 200:
-                                                try:
-                                                    workflow_json = file_response.text
-                                                    parsed = json.loads(workflow_json)
-                                                    
-                                                    if 'nodes' in parsed:
-                                                        examples_found += 1
-                                                        
-                                                        nodes_used = [
-                                                            node.get('type', '')
-                                                            for node in parsed.get('nodes', [])
-                                                        ]
-                                                        
-                                                        # Check if exists
-                                                        stmt = select(LearnedExample).where(
-                                                            LearnedExample.source_url == download_url
-                                                        )
-                                                        result = await self.db.execute(stmt)
-                                                        existing = result.scalar_one_or_none()
-                                                        
-                                                        if not existing:
-                                                            example = LearnedExample(
-                                                                title=repo.get("name", ""),
-                                                                description=repo.get("description", ""),
-                                                                source="github",
-                                                                source_url=download_url,
-                                                                workflow_json=workflow_json,
-                                                                nodes_used=nodes_used,
-                                                                complexity_level=self._estimate_complexity(parsed),
-                                                                stars=repo.get("stargazers_count", 0),
-                                                                learned_at=datetime.utcnow()
-                                                            )
-                                                            self.db.add(example)
-                                                            examples_added += 1
-                                                except (json.JSONDecodeError, Exception):
-                                                    continue
+                            download_urls = [
+                                f"https://raw.githubusercontent.com/{repo['full_name']}/{quote(branch)}/{quote(path)}"
+                                for path in paths
+                            ]
+                            file_responses = await asyncio.gather(*[download(url) for url in download_urls])
+                            if any(r is None or r.status == "failed" for r in file_responses):
+                                # Keep the tree uncached so the missing files are retried next run
+                                crawl_cache.discard(trees_url, params={"recursive": "1"})
+                            # Unchanged files were stored on an earlier run
+                            files = [(r.url, r.text) for r in file_responses if r is not None and r.changed]
+                            # JSON parsing and summarizing run in worker processes, in batches
+                            analyses = await parse_pool.map_batches(
+                                analyze_workflows,
+                                [text for _, text in files],
+                                settings.LEARNING_PARSE_BATCH_SIZE
+                            )
+                            return [
+                                (url, analysis)
+                                for (url, _), analysis in zip(files, analyses)
+                                if analysis is not None
+                            ]
                         except Exception:
+                            # Nothing from this tree was stored; fetch the tree and its files again next run
+                            crawl_cache.discard(trees_url, params={"recursive": "1"})
+                            for download_url in download_urls:
+                                crawl_cache.discard(download_url)
+                            raise
+                    
+                    repo_files = await asyncio.gather(
+                        *[crawl_repo(repo) for repo in repositories],
+                        return_exceptions=True
+                    )
+                    
+                    for repo, files in zip(repositories, repo_files):
+                        if isinstance(files, Exception):
                             continue
                         
-                        # Rate limiting
-                        await asyncio.sleep(1)
+                        for download_url, analysis in files:
+                            examples_found += 1
+                            candidates.append(LearnedExample(
+                                title=repo.get("name", ""),
+                                description=repo.get("description", ""),
+                                source="github",
+                                source_url=download_url,
+                                stars=repo.get("stargazers_count", 0),
+                                learned_at=datetime.utcnow(),
+                                **analysis
+                            ))
             
+            # Deduplicate the whole crawl in one batch (by content and file URL)
+            examples_added = await self._store_examples(candidates, dedupe_by_url=True)
             await self.db.commit()
+            await crawl_cache.save()
+            if examples_added:
+                await example_index.refresh(self.db, force=True)
             
             log.status = "completed"
             log.examples_found = examples_found
             log.examples_added = examples_added
             log.completed_at = datetime.utcnow()
             await self.db.commit()
+            _record_learning_metrics(log)
             
         except Exception as e:
             log.status = "failed"
             log.error_message = str(e)
             log.completed_at = datetime.utcnow()
             await self.db.commit()
+            _record_learning_metrics(log)
             raise
         
         return {
             "examples_found": examples_found,
-            "examples_added": examples_added
+            "examples_added": examples_added,
+            "fetches": crawl_cache.counts
         }
     
-    def _estimate_complexity(self, workflow_json: Dict[str, Any]) -> str:
-        """Estimate workflow complexity based on JSON structure"""
-        node_count = len(workflow_json.get('nodes', []))
-        connection_count = len(workflow_json.get('connections', {}))
-        
-        if node_count <= 3 and connection_count <= 3:
-            return "simple"
-        elif node_count <= 10 and connection_count <= 15:
-            return "medium"
+    async def _store_examples(
+        self,
+        candidates: List[LearnedExample],
+        dedupe_by_url: bool = False
+    ) -> int:
+        """Insert candidates that are not already stored, checking the batch with one query per chunk.
+        
+        Candidates are matched on content_hash and, when dedupe_by_url is set,
+        on source_url as well. Returns the number of examples added; rows
+        another session stored in the meantime are skipped, not counted.
+        """
+        seen_hashes = set()
+        seen_urls = set()
+        unique: List[LearnedExample] = []
+        for example in candidates:
+            if example.content_hash in seen_hashes:
+                continue
+            if dedupe_by_url and example.source_url in seen_urls:
+                continue
+            seen_hashes.add(example.content_hash)
+            seen_urls.add(example.source_url)
+            unique.append(example)
+        
+        existing_hashes = set()
+        existing_urls = set()
+        for start in range(0, len(unique), DEDUPE_CHUNK_SIZE):
+            chunk = unique[start:start + DEDUPE_CHUNK_SIZE]
+            conditions = [LearnedExample.content_hash.in_([ex.content_hash for ex in chunk])]
+            if dedupe_by_url:
+                conditions.append(LearnedExample.source_url.in_([ex.source_url for ex in chunk]))
+            
+            stmt = select(LearnedExample.content_hash, LearnedExample.source_url).where(or_(*conditions))
+            result = await self.db.execute(stmt)
+            for content_hash, source_url in result:
+                existing_hashes.add(content_hash)
+                existing_urls.add(source_url)
+        
+        new_examples = [
+            ex for ex in unique
+            if ex.content_hash not in existing_hashes
+            and not (dedupe_by_url and ex.source_url in existing_urls)
+        ]
+        new_examples = await self._cluster_near_duplicates(
+            new_examples,
+            reject=settings.LEARNING_NEAR_DUPLICATE_ACTION == "reject",
+            insert=True
+        )
+        
+        # Keep node usage stats current without rescanning the corpus
+        node_counts = Counter()
+        for ex in new_examples:
+            if ex.duplicate_of is None:
+                node_counts.update(node for node in ex.nodes_used or [] if node)
+        await self._increment_node_usage(node_counts)
+        
+        return len(new_examples)
+    
+    async def _cluster_near_duplicates(
+        self,
+        examples: List[LearnedExample],
+        reject: bool = False,
+        insert: bool = False
+    ) -> List[LearnedExample]:
+        """Link structural near-duplicates to the representative of their cluster.
+        
+        Examples are compared only with the representatives sharing an LSH
+        bucket, so the lookup does not grow with the corpus. A match at
+        LEARNING_NEAR_DUPLICATE_THRESHOLD or above gets duplicate_of set, or
+        with reject is dropped. Anything else becomes a representative and is
+        bucketed. With insert, new examples are stored via _insert_examples
+        and only those actually inserted are returned; otherwise the examples
+        kept are added to the session and returned.
+        """
+        keys = {ex: lsh_bucket_keys(ex.minhash or []) for ex in examples}
+        all_keys = sorted({key for ex_keys in keys.values() for key in ex_keys})
+        
+        # bucket -> representatives, stored (ids) or earlier in this batch (examples)
+        buckets: Dict[str, List[Any]] = {}
+        for start in range(0, len(all_keys), DEDUPE_CHUNK_SIZE):
+            stmt = select(ExampleLSHBucket.bucket, ExampleLSHBucket.example_id).where(
+                ExampleLSHBucket.bucket.in_(all_keys[start:start + DEDUPE_CHUNK_SIZE])
+            )
+            for bucket, example_id in await self.db.execute(stmt):
+                buckets.setdefault(bucket, []).append(example_id)
+        
+        candidate_ids = sorted({ref for refs in buckets.values() for ref in refs})
+        signatures: Dict[int, List[int]] = {}
+        for start in range(0, len(candidate_ids), DEDUPE_CHUNK_SIZE):
+            stmt = select(LearnedExample.id, LearnedExample.minhash).where(
+                LearnedExample.id.in_(candidate_ids[start:start + DEDUPE_CHUNK_SIZE])
+            )
+            for example_id, signature in await self.db.execute(stmt):
+                signatures[example_id] = signature
+        
+        threshold = settings.LEARNING_NEAR_DUPLICATE_THRESHOLD
+        matches: Dict[LearnedExample, Any] = {}
+        representatives: List[LearnedExample] = []
+        kept: List[LearnedExample] = []
+        for ex in examples:
+            best, best_similarity = None, threshold
+            for ref in {ref for key in keys[ex] for ref in buckets.get(key, [])}:
+                signature = ref.minhash if isinstance(ref, LearnedExample) else signatures.get(ref)
+                similarity = signature_similarity(ex.minhash, signature or [])
+                if similarity >= best_similarity:
+                    best, best_similarity = ref, similarity
+            
+            if best is None:
+                representatives.append(ex)
+                for key in keys[ex]:
+                    buckets.setdefault(key, []).append(ex)
+            elif reject:
+                continue
+            else:
+                matches[ex] = best
+            kept.append(ex)
+        
+        if insert:
+            # Representatives first, so their duplicates can point at their ids
+            inserted = set(await self._insert_examples(representatives))
+            for ex, ref in matches.items():
+                ex.duplicate_of = ref.id if isinstance(ref, LearnedExample) else ref
+            inserted.update(await self._insert_examples(list(matches)))
+            # A representative stored meanwhile by another session is bucketed by it
+            representatives = [ex for ex in representatives if ex in inserted]
+            kept = [ex for ex in kept if ex in inserted]
+        else:
+            self.db.add_all(kept)
+            if matches or representatives:
+                await self.db.flush()  # Assign ids to new representatives
+            for ex, ref in matches.items():
+                ex.duplicate_of = ref.id if isinstance(ref, LearnedExample) else ref
+        self.db.add_all([
+            ExampleLSHBucket(bucket=key, example_id=ex.id)
+            for ex in representatives
+            for key in keys[ex]
+        ])
+        return kept
+    
+    async def _insert_examples(self, examples: List[LearnedExample]) -> List[LearnedExample]:
+        """Insert new examples, skipping any whose content_hash is already stored.
+        
+        Another session may store the same workflow between our duplicate
+        check and this insert, so conflicts are ignored rather than raised.
+        Every example gets an id: its new row's, or that of the row already
+        stored for its content. Returns the examples actually inserted.
+        """
+        hashed = [ex for ex in examples if ex.content_hash]
+        dialect = self.db.bind.dialect.name
+        if not hashed or dialect not in ("sqlite", "postgresql"):
+            self.db.add_all(examples)
+            if examples:
+                await self.db.flush()
+            return examples
+        
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
         else:
-            return "complex"
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(LearnedExample).on_conflict_do_nothing(
+            index_elements=[LearnedExample.content_hash]
+        ).returning(LearnedExample.id, LearnedExample.content_hash)
+        result = await self.db.execute(stmt, [
+            {
+                column.key: getattr(ex, column.key)
+                for column in LearnedExample.__table__.columns
+                if not column.primary_key and getattr(ex, column.key) is not None
+            }
+            for ex in hashed
+        ])
+        inserted_ids = {content_hash: example_id for example_id, content_hash in result}
+        
+        stored_ids = {}
+        skipped = sorted({ex.content_hash for ex in hashed} - inserted_ids.keys())
+        for start in range(0, len(skipped), DEDUPE_CHUNK_SIZE):
+            stmt = select(LearnedExample.content_hash, LearnedExample.id).where(
+                LearnedExample.content_hash.in_(skipped[start:start + DEDUPE_CHUNK_SIZE])
+            )
+            stored_ids.update(dict((await self.db.execute(stmt)).all()))
+        
+        inserted = []
+        for ex in hashed:
+            if ex.content_hash in inserted_ids:
+                ex.id = inserted_ids[ex.content_hash]
+                inserted.append(ex)
+            else:
+                ex.id = stored_ids.get(ex.content_hash)
+        
+        unhashed = [ex for ex in examples if not ex.content_hash]
+        if unhashed:
+            self.db.add_all(unhashed)
+            await self.db.flush()
+        return inserted + unhashed
+    
+    async def _increment_node_usage(self, node_counts: Dict[str, int]) -> None:
+        """Add to the per-node-type usage counters"""
+        if not node_counts:
+            return
+        
+        dialect = self.db.bind.dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            if dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+            stmt = insert(NodeUsageStat)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[NodeUsageStat.node_type],
+                set_={"count": NodeUsageStat.count + stmt.excluded.count}
+            )
+            await self.db.execute(stmt, [
+                {"node_type": node_type, "count": count}
+                for node_type, count in node_counts.items()
+            ])
+            return
+        
+        for node_type, count in node_counts.items():
+            result = await self.db.execute(
+                update(NodeUsageStat)
+                .where(NodeUsageStat.node_type == node_type)
+                .values(count=NodeUsageStat.count + count)
+            )
+            if result.rowcount == 0:
+                self.db.add(NodeUsageStat(node_type=node_type, count=count))
+    
+    async def rebuild_node_usage_stats(self, only_if_empty: bool = False) -> int:
+        """Recount node usage from stored examples, returns the number of node types"""
+        if only_if_empty:
+            existing = await self.db.scalar(select(func.count()).select_from(NodeUsageStat))
+            if existing:
+                return 0
+        
+        node_counts = Counter()
+        result = await self.db.stream(
+            select(LearnedExample.nodes_used).where(LearnedExample.duplicate_of.is_(None))
+        )
+        async for nodes_used in result.scalars():
+            node_counts.update(node for node in nodes_used or [] if node)
+        
+        await self.db.execute(NodeUsageStat.__table__.delete())
+        await self._increment_node_usage(node_counts)
+        await self.db.commit()
+        return len(node_counts)
+    
+    async def backfill_content_hashes(self) -> int:
+        """Hash examples stored before content_hash existed.
+        
+        Rows whose content duplicates an already hashed example keep a NULL hash.
+        """
+        stmt = select(LearnedExample.content_hash).where(LearnedExample.content_hash.is_not(None))
+        result = await self.db.execute(stmt)
+        known = set(result.scalars().all())
+        
+        stmt = select(LearnedExample.id, LearnedExample.workflow_json).where(
+            LearnedExample.content_hash.is_(None)
+        ).order_by(LearnedExample.id)
+        result = await self.db.execute(stmt)
+        
+        updated = 0
+        for example_id, workflow_json in result.all():
+            try:
+                content_hash = workflow_content_hash(json.loads(workflow_json))
+            except (json.JSONDecodeError, TypeError):
+                continue
+            if content_hash in known:
+                continue
+            known.add(content_hash)
+            example = await self.db.get(LearnedExample, example_id)
+            example.content_hash = content_hash
+            updated += 1
+        
+        await self.db.commit()
+        return updated
+    
+    async def backfill_fingerprints(self) -> int:
+        """Fingerprint examples stored before near-duplicate detection and cluster them.
+        
+        Existing near-duplicates are always clustered, never deleted.
+        Returns the number of examples linked to a cluster.
+        """
+        stmt = select(LearnedExample.id).where(LearnedExample.minhash.is_(None)).order_by(LearnedExample.id)
+        ids = list((await self.db.execute(stmt)).scalars().all())
+        
+        clustered = 0
+        for start in range(0, len(ids), DEDUPE_CHUNK_SIZE):
+            stmt = select(LearnedExample).options(undefer(LearnedExample.workflow_json)).where(
+                LearnedExample.id.in_(ids[start:start + DEDUPE_CHUNK_SIZE])
+            ).order_by(LearnedExample.id)
+            examples = list((await self.db.execute(stmt)).scalars().all())
+            for example in examples:
+                try:
+                    example.minhash = workflow_minhash(json.loads(example.workflow_json))
+                except (json.JSONDecodeError, TypeError, AttributeError):
+                    example.minhash = []
+            await self._cluster_near_duplicates(examples)
+            clustered += sum(1 for example in examples if example.duplicate_of is not None)
+            await self.db.commit()
+        return clustered
+    
+    async def backfill_workflow_summaries(self) -> int:
+        """Summarize examples stored before workflow_summary existed"""
+        stmt = select(LearnedExample.id, LearnedExample.workflow_json).where(
+            LearnedExample.workflow_summary.is_(None)
+        ).order_by(LearnedExample.id)
+        result = await self.db.execute(stmt)
+        
+        updated = 0
+        for example_id, workflow_json in result.all():
+            summary = summarize_workflow(workflow_json)
+            if summary is None:
+                continue
+            await self.db.execute(
+                update(LearnedExample)
+                .where(LearnedExample.id == example_id)
+                .values(workflow_summary=summary)
+            )
+            updated += 1
+        
+        await self.db.commit()
+        return updated
+    
+    async def compress_legacy_workflows(self) -> int:
+        """Compress workflow bodies stored as plain text before compression existed.
+        
+        Only needed for SQLite databases created by create_all; server databases
+        are converted by the Alembic migration.
+        """
+        if self.db.bind.dialect.name != "sqlite":
+            return 0
+        raw = LearnedExample.__table__.c.workflow_json
+        stmt = select(LearnedExample.id).where(func.typeof(raw) == "text").order_by(LearnedExample.id)
+        ids = (await self.db.execute(stmt)).scalars().all()
+        
+        for start in range(0, len(ids), DEDUPE_CHUNK_SIZE):
+            chunk = ids[start:start + DEDUPE_CHUNK_SIZE]
+            stmt = select(LearnedExample.id, LearnedExample.workflow_json).where(LearnedExample.id.in_(chunk))
+            for example_id, workflow_json in (await self.db.execute(stmt)).all():
+                # Rewriting the value runs it through CompressedText
+                await self.db.execute(
+                    update(LearnedExample)
+                    .where(LearnedExample.id == example_id)
+                    .values(workflow_json=workflow_json)
+                )
+            await self.db.commit()
+        return len(ids)
     
     async def get_relevant_examples(
         self,
@@ -343,9 +804,22 @@ class LearningService:
         limit: int = 10
     ) -> List[LearnedExample]:
         """Get relevant learned examples based on requirement"""
-        # Simple approach: return recent examples
-        # In production, you'd use semantic search or embeddings
-        stmt = select(LearnedExample).order_by(
+        # Rank with the BM25 index, picking up rows added by other processes
+        await example_index.refresh(self.db)
+        ranked_ids = example_index.search(requirement, limit)
+        
+        if ranked_ids:
+            # Examples clustered as near-duplicates after this process indexed them are dropped here
+            stmt = select(LearnedExample).where(
+                LearnedExample.id.in_(ranked_ids),
+                LearnedExample.duplicate_of.is_(None)
+            )
+            result = await self.db.execute(stmt)
+            by_id = {example.id: example for example in result.scalars().all()}
+            return [by_id[example_id] for example_id in ranked_ids if example_id in by_id]
+        
+        # Nothing matched: fall back to the most popular examples
+        stmt = select(LearnedExample).where(LearnedExample.duplicate_of.is_(None)).order_by(
             LearnedExample.stars.desc(),
             LearnedExample.learned_at.desc()
         ).limit(limit)
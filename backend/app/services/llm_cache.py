@@ -0,0 +1,190 @@
+"""
+Content-addressed cache of LLM responses (in-memory LRU backed by a DB table)
+"""
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, delete
+
+from app.models.database import AsyncSessionLocal, LLMResponseCacheEntry
+from app.core.config import settings
+
+
+# Config fields that change the completion for identical messages
+CACHE_CONFIG_FIELDS = ("model_name", "temperature", "max_tokens", "api_url")
+
+# Prune the DB tier once every this many writes
+PRUNE_EVERY = 100
+
+
+def cache_key(provider: str, config: Optional[Dict[str, Any]], messages: List[Any]) -> str:
+    """Hash provider, model settings and rendered messages into a cache key"""
+    config = config or {}
+    payload = {
+        "provider": provider,
+        "config": {field: config.get(field) for field in CACHE_CONFIG_FIELDS},
+        "messages": [[message.type, message.content] for message in messages]
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class LLMResponseCache:
+    """Two-tier response cache with TTL, LRU eviction and hit/miss counters"""
+
+    def __init__(
+        self,
+        ttl: float = 86400,
+        max_entries: int = 1000,
+        max_bytes: int = 50 * 1024 * 1024,
+        persist: bool = True,
+        db_max_entries: int = 10000
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.persist = persist
+        self.db_max_entries = db_max_entries
+        # key -> (expires_at, response, size in bytes)
+        self._entries: "OrderedDict[str, Tuple[float, str, int]]" = OrderedDict()
+        self._bytes = 0
+        self._writes = 0
+        self.counters = {
+            "memory_hits": 0,
+            "db_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "errors": 0
+        }
+
+    def _remember(self, key: str, response: str, expires_at: float) -> None:
+        self._forget(key)
+        size = len(response.encode("utf-8"))
+        self._entries[key] = (expires_at, response, size)
+        self._bytes += size
+
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            _, (_, _, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.counters["evictions"] += 1
+
+    def _forget(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry:
+            self._bytes -= entry[2]
+
+    async def get(self, key: str) -> Optional[str]:
+        """Look up a response, checking memory first and then the DB tier"""
+        entry = self._entries.get(key)
+        if entry:
+            if entry[0] > time.time():
+                self._entries.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return entry[1]
+            self._forget(key)
+
+        if self.persist:
+            try:
+                async with AsyncSessionLocal() as db:
+                    stmt = select(LLMResponseCacheEntry).where(
+                        LLMResponseCacheEntry.key == key,
+                        LLMResponseCacheEntry.expires_at > datetime.utcnow()
+                    )
+                    result = await db.execute(stmt)
+                    row = result.scalar_one_or_none()
+                    if row:
+                        remaining = (row.expires_at - datetime.utcnow()).total_seconds()
+                        self._remember(key, row.response, time.time() + remaining)
+                        self.counters["db_hits"] += 1
+                        return row.response
+            except Exception:
+                # The cache must never break an LLM call
+                self.counters["errors"] += 1
+
+        self.counters["misses"] += 1
+        return None
+
+    async def set(
+        self,
+        key: str,
+        response: str,
+        provider: str,
+        model_name: Optional[str] = None
+    ) -> None:
+        """Store a response in both tiers"""
+        self._remember(key, response, time.time() + self.ttl)
+        self.counters["stores"] += 1
+
+        if not self.persist:
+            return
+
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.merge(LLMResponseCacheEntry(
+                    key=key,
+                    provider=provider,
+                    model_name=model_name,
+                    response=response,
+                    created_at=datetime.utcnow(),
+                    expires_at=datetime.utcnow() + timedelta(seconds=self.ttl)
+                ))
+                await db.commit()
+
+                self._writes += 1
+                if self._writes % PRUNE_EVERY == 0:
+                    await self._prune(db)
+        except Exception:
+            self.counters["errors"] += 1
+
+    async def _prune(self, db) -> None:
+        """Drop expired rows and keep the DB tier under its size limit"""
+        await db.execute(
+            delete(LLMResponseCacheEntry).where(
+                LLMResponseCacheEntry.expires_at <= datetime.utcnow()
+            )
+        )
+        keep = select(LLMResponseCacheEntry.key).order_by(
+            LLMResponseCacheEntry.created_at.desc()
+        ).limit(self.db_max_entries)
+        await db.execute(
+            delete(LLMResponseCacheEntry).where(LLMResponseCacheEntry.key.not_in(keep))
+        )
+        await db.commit()
+
+    async def clear(self) -> None:
+        """Empty both tiers"""
+        self._entries.clear()
+        self._bytes = 0
+        if self.persist:
+            async with AsyncSessionLocal() as db:
+                await db.execute(delete(LLMResponseCacheEntry))
+                await db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current memory usage"""
+        hits = self.counters["memory_hits"] + self.counters["db_hits"]
+        lookups = hits + self.counters["misses"]
+        return {
+            **self.counters,
+            "hits": hits,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "enabled": settings.LLM_CACHE_ENABLED
+        }
+
+
+llm_response_cache = LLMResponseCache(
+    ttl=settings.LLM_CACHE_TTL_SECONDS,
+    max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+    max_bytes=settings.LLM_CACHE_MAX_BYTES,
+    persist=settings.LLM_CACHE_PERSIST,
+    db_max_entries=settings.LLM_CACHE_DB_MAX_ENTRIES
+)
@@ -0,0 +1,122 @@
+"""
+Process-wide registry of reusable LLM chat clients
+"""
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+
+
+# Config fields that change how a client is built
+CLIENT_CONFIG_FIELDS = ("api_key", "api_url", "model_name", "temperature", "max_tokens")
+
+# Config fields that identify one provider account/endpoint for concurrency caps
+CONCURRENCY_CONFIG_FIELDS = ("api_key", "api_url", "model_name")
+
+
+def config_fingerprint(
+    provider: str,
+    config: Optional[Dict[str, Any]],
+    fields: Tuple[str, ...] = CLIENT_CONFIG_FIELDS
+) -> str:
+    """Stable hash of a provider config, used as the registry key"""
+    config = config or {}
+    payload = {"provider": provider}
+    payload.update({field: config.get(field) for field in fields})
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class LLMClientRegistry:
+    """Caches chat clients by config hash and shares one keep-alive HTTP pool"""
+
+    def __init__(self, idle_ttl: float = 600.0):
+        self.idle_ttl = idle_ttl
+        self._clients: "OrderedDict[str, Any]" = OrderedDict()
+        self._last_used: Dict[str, float] = {}
+        self._http_client: Optional[httpx.AsyncClient] = None
+        # endpoint key -> (limit, semaphore)
+        self._semaphores: Dict[str, Tuple[int, asyncio.Semaphore]] = {}
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """Shared async HTTP client with a keep-alive connection pool"""
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(settings.LLM_HTTP_TIMEOUT_SECONDS, connect=10.0),
+                limits=httpx.Limits(
+                    max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE,
+                    keepalive_expiry=settings.LLM_CLIENT_IDLE_TTL_SECONDS
+                )
+            )
+        return self._http_client
+
+    def get(
+        self,
+        provider: str,
+        config: Optional[Dict[str, Any]],
+        factory: Callable[[], Any]
+    ) -> Any:
+        """Return the cached client for this config, building it on first use"""
+        now = time.monotonic()
+        self.evict_idle(now)
+
+        key = config_fingerprint(provider, config)
+        client = self._clients.get(key)
+        if client is None:
+            client = factory()
+            self._clients[key] = client
+        else:
+            self._clients.move_to_end(key)
+        self._last_used[key] = now
+        return client
+
+    def semaphore(self, provider: str, config: Optional[Dict[str, Any]]) -> asyncio.Semaphore:
+        """Semaphore capping concurrent requests to one provider endpoint"""
+        limit = (config or {}).get("max_concurrency") or settings.LLM_DEFAULT_MAX_CONCURRENCY
+        key = config_fingerprint(provider, config, CONCURRENCY_CONFIG_FIELDS)
+        entry = self._semaphores.get(key)
+        if entry is None or entry[0] != limit:
+            # A changed cap takes effect for new calls; in-flight calls finish on the old one
+            entry = (limit, asyncio.Semaphore(limit))
+            self._semaphores[key] = entry
+        return entry[1]
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Drop clients that have not been used within the idle TTL"""
+        now = time.monotonic() if now is None else now
+        evicted = 0
+        # Entries are kept in least-recently-used order
+        while self._clients:
+            key = next(iter(self._clients))
+            if now - self._last_used.get(key, 0.0) < self.idle_ttl:
+                break
+            self._clients.pop(key)
+            self._last_used.pop(key, None)
+            evicted += 1
+        return evicted
+
+    def clear(self) -> None:
+        """Forget all cached clients"""
+        self._clients.clear()
+        self._last_used.clear()
+
+    async def aclose(self) -> None:
+        """Forget all clients and close the shared HTTP pool"""
+        self.clear()
+        if self._http_client is not None and not self._http_client.is_closed:
+            await self._http_client.aclose()
+        self._http_client = None
+
+
+llm_client_registry = LLMClientRegistry(idle_ttl=settings.LLM_CLIENT_IDLE_TTL_SECONDS)
@@ -0,0 +1,121 @@
+"""
+In-process cache of the active LLM configuration
+"""
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.database import LLMConfig, ConfigVersion
+from app.core.config import settings
+
+
+LLM_CONFIG_VERSION_KEY = "llm_config"
+
+
+def llm_config_to_dict(config: LLMConfig) -> Dict[str, Any]:
+    """Convert an LLMConfig row to the dict LLMService expects"""
+    return {
+        "provider": config.provider,
+        "api_key": config.api_key,
+        "api_url": config.api_url,
+        "model_name": config.model_name,
+        "temperature": config.temperature,
+        "max_tokens": config.max_tokens,
+        "max_concurrency": config.max_concurrency
+    }
+
+
+class ActiveLLMConfigCache:
+    """Caches the active (and secondary) LLMConfig and detects changes through a DB version counter"""
+
+    def __init__(self, check_interval: float = 30.0):
+        self.check_interval = check_interval
+        self._config: Optional[Dict[str, Any]] = None
+        self._secondary: Optional[Dict[str, Any]] = None
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+
+    @property
+    def version(self) -> Optional[int]:
+        """Version of the cached copy (None if nothing is cached)"""
+        return self._version
+
+    async def _read_version(self, db: AsyncSession) -> int:
+        stmt = select(ConfigVersion.version).where(ConfigVersion.name == LLM_CONFIG_VERSION_KEY)
+        result = await db.execute(stmt)
+        return result.scalar_one_or_none() or 0
+
+    async def _load(self, db: AsyncSession, flag) -> Optional[Dict[str, Any]]:
+        stmt = select(LLMConfig).where(flag == True).limit(1)
+        result = await db.execute(stmt)
+        config = result.scalar_one_or_none()
+        return llm_config_to_dict(config) if config else None
+
+    async def _refresh(self, db: AsyncSession) -> None:
+        """Reload both configs if the version changed, at most once per check interval"""
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < self.check_interval:
+            return
+
+        version = await self._read_version(db)
+        if version != self._version:
+            self._config = await self._load(db, LLMConfig.is_active)
+            self._secondary = await self._load(db, LLMConfig.is_secondary)
+            self._version = version
+        self._checked_at = now
+
+    async def get(self, db: AsyncSession) -> Optional[Dict[str, Any]]:
+        """Get the active config, hitting the DB at most once per check interval"""
+        await self._refresh(db)
+        return dict(self._config) if self._config else None
+
+    async def get_secondary(self, db: AsyncSession) -> Optional[Dict[str, Any]]:
+        """Get the secondary (hedging) config, if one is designated"""
+        await self._refresh(db)
+        return dict(self._secondary) if self._secondary else None
+
+    def clear(self) -> None:
+        """Drop the local copy so the next lookup reloads it"""
+        self._config = None
+        self._secondary = None
+        self._version = None
+        self._checked_at = 0.0
+
+    async def invalidate(self, db: AsyncSession) -> None:
+        """Bump the shared version counter and drop the local copy.
+
+        Call after the config change is committed; other workers reload
+        once they see the new version.
+        """
+        dialect = db.bind.dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            # One statement, so two workers bumping the first version cannot collide
+            if dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+            stmt = insert(ConfigVersion).values(
+                name=LLM_CONFIG_VERSION_KEY,
+                version=1,
+                updated_at=datetime.utcnow()
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[ConfigVersion.name],
+                set_={"version": ConfigVersion.version + 1, "updated_at": stmt.excluded.updated_at}
+            )
+            await db.execute(stmt)
+        else:
+            stmt = update(ConfigVersion).where(
+                ConfigVersion.name == LLM_CONFIG_VERSION_KEY
+            ).values(version=ConfigVersion.version + 1)
+            result = await db.execute(stmt)
+            if result.rowcount == 0:
+                db.add(ConfigVersion(name=LLM_CONFIG_VERSION_KEY, version=1))
+        await db.commit()
+        self.clear()
+
+
+active_llm_config_cache = ActiveLLMConfigCache(check_interval=settings.LLM_CONFIG_CACHE_CHECK_SECONDS)
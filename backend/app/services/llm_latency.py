@@ -0,0 +1,101 @@
+"""
+Per-provider LLM latency histograms
+"""
+import bisect
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Upper bounds (seconds) of the histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS = (
+    0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 7.5,
+    10.0, 15.0, 20.0, 30.0, 45.0, 60.0, 90.0, 120.0, 180.0, 300.0
+)
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram of latencies in seconds"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts: List[int] = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket containing the q-quantile (None if empty)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                return self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+        return self.buckets[-1]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 3),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99)
+        }
+
+
+class LLMLatencyTracker:
+    """First-token and total latency histograms per provider/model"""
+
+    def __init__(self):
+        self._histograms: Dict[Tuple[str, str, str], LatencyHistogram] = {}
+        self.failures: Dict[Tuple[str, str], int] = {}
+
+    @staticmethod
+    def _target(provider: str, config: Optional[Dict[str, Any]]) -> Tuple[str, str]:
+        return provider, (config or {}).get("model_name") or ""
+
+    def histogram(self, provider: str, config: Optional[Dict[str, Any]], kind: str) -> LatencyHistogram:
+        key = self._target(provider, config) + (kind,)
+        if key not in self._histograms:
+            self._histograms[key] = LatencyHistogram()
+        return self._histograms[key]
+
+    def observe(self, provider: str, config: Optional[Dict[str, Any]], kind: str, seconds: float) -> None:
+        """Record a 'first_token' or 'total' latency"""
+        self.histogram(provider, config, kind).observe(seconds)
+
+    def record_failure(self, provider: str, config: Optional[Dict[str, Any]]) -> None:
+        target = self._target(provider, config)
+        self.failures[target] = self.failures.get(target, 0) + 1
+
+    def hedge_delay(
+        self,
+        provider: str,
+        config: Optional[Dict[str, Any]],
+        quantile: float,
+        min_samples: int,
+        default: float,
+        floor: float
+    ) -> float:
+        """How long to wait for a first token before hedging.
+
+        The given first-token quantile once enough samples exist, else the default.
+        """
+        histogram = self.histogram(provider, config, "first_token")
+        if histogram.count < min_samples:
+            return default
+        return max(floor, histogram.quantile(quantile))
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [
+            {"provider": provider, "model": model, "kind": kind, **histogram.to_dict()}
+            for (provider, model, kind), histogram in sorted(self._histograms.items())
+        ]
+
+
+llm_latency = LLMLatencyTracker()
@@ -1,32 +1,83 @@
 """
 LLM Service for interacting with various LLM providers
 """
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, AsyncIterator, Tuple, Callable, Iterable, TYPE_CHECKING
+import asyncio
 import json
-import httpx
-from langchain.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
-from langchain_community.chat_models import ChatOllama
+import time
 from app.core.config import settings
+from app.core.metrics import (
+    llm_call_duration_seconds,
+    llm_first_token_seconds,
+    llm_prompt_tokens_total,
+    llm_completion_tokens_total
+)
+from app.services.llm_client_pool import llm_client_registry
+from app.services.llm_cache import llm_response_cache, cache_key
+from app.services.llm_latency import llm_latency
+from app.services.workflow_summarizer import summarize_workflow, CHARS_PER_TOKEN
+from app.services.streaming_json import StreamingJSONParser, MalformedJSONError
+
+# LangChain and provider SDKs are imported on first use to keep startup fast
+if TYPE_CHECKING:
+    from langchain_core.prompts import ChatPromptTemplate
+
+# Appended to the prompt when a previous attempt produced malformed JSON
+JSON_RETRY_INSTRUCTION = "Reply with a single valid JSON value only: no prose, no markdown, no comments."
+
+ItemCallback = Callable[[str, Dict[str, Any]], None]
+
+
+def _chat_prompt(messages: List[Tuple[str, str]]) -> "ChatPromptTemplate":
+    """Build a chat prompt template (imports LangChain on first use)"""
+    from langchain_core.prompts import ChatPromptTemplate
+    return ChatPromptTemplate.from_messages(messages)
+
+
+async def _first_chunk(stream: AsyncIterator[str]) -> Optional[str]:
+    """Next chunk of a stream, or None when it is exhausted"""
+    try:
+        return await stream.__anext__()
+    except StopAsyncIteration:
+        return None
 
 
 class LLMService:
     """Service for LLM interactions"""
     
-    def __init__(self, provider: str = None, config: Dict[str, Any] = None):
-        """Initialize LLM service"""
+    def __init__(
+        self,
+        provider: str = None,
+        config: Dict[str, Any] = None,
+        secondary: Optional["LLMService"] = None
+    ):
+        """Initialize LLM service; secondary is the hedging/failover target"""
         self.provider = provider or settings.DEFAULT_LLM_PROVIDER
         self.config = config or {}
-        self.client = self._initialize_client()
+        self.secondary = secondary
+        # Clients are shared process-wide and rebuilt only when the config changes
+        self.client = llm_client_registry.get(
+            self.provider,
+            self.config,
+            self._initialize_client
+        )
     
     def _initialize_client(self):
         """Initialize LLM client based on provider"""
         if self.provider == "openai":
+            from langchain_openai import ChatOpenAI
+            from openai import AsyncOpenAI
+            api_key = self.config.get("api_key", settings.OPENAI_API_KEY)
             return ChatOpenAI(
-                api_key=self.config.get("api_key", settings.OPENAI_API_KEY),
+                api_key=api_key,
                 model=self.config.get("model_name", "gpt-4-turbo-preview"),
                 temperature=self.config.get("temperature", 0.7) / 100,
-                max_tokens=self.config.get("max_tokens", 4000)
+                max_tokens=self.config.get("max_tokens", 4000),
+                # Reuse the registry's keep-alive connection pool
+                async_client=AsyncOpenAI(
+                    api_key=api_key,
+                    http_client=llm_client_registry.http_client
+                ).chat.completions
             )
         elif self.provider == "gemini":
             from langchain_google_genai import ChatGoogleGenerativeAI
@@ -45,18 +96,302 @@ class LLMService:
                 max_tokens=self.config.get("max_tokens", 4000)
             )
         elif self.provider == "ollama":
+            from langchain_community.chat_models import ChatOllama
             return ChatOllama(
                 base_url=self.config.get("api_url", settings.OLLAMA_BASE_URL),
                 model=self.config.get("model_name", settings.OLLAMA_MODEL),
                 temperature=self.config.get("temperature", 0.7) / 100
             )
+        elif self.provider == "fake":
+            from app.services.fake_llm import FakeChatModel
+            return FakeChatModel(
+                latency=settings.FAKE_LLM_LATENCY_SECONDS,
+                tokens_per_second=settings.FAKE_LLM_TOKENS_PER_SECOND,
+                error_rate=settings.FAKE_LLM_ERROR_RATE,
+                seed=settings.FAKE_LLM_SEED
+            )
         else:
             raise ValueError(f"Unsupported LLM provider: {self.provider}")
     
-    async def analyze_requirement(self, requirement: str, context: Optional[str] = None) -> Dict[str, Any]:
-        """Analyze user requirement and generate questions"""
+    def _cache_key(self, messages: List[Any], use_cache: bool) -> Optional[str]:
+        """Cache key for rendered messages, or None when caching is off"""
+        if not (use_cache and settings.LLM_CACHE_ENABLED):
+            return None
+        return cache_key(self.provider, self.config, messages)
+    
+    async def _provider_chunks(
+        self,
+        messages: List[Any],
+        slot_acquired: Optional[asyncio.Event] = None
+    ) -> AsyncIterator[str]:
+        """Stream completion text from this service's own provider, recording latency.
+        
+        slot_acquired is set once the provider's concurrency slot is held.
+        """
+        model = self.config.get("model_name") or ""
+        prompt_chars = sum(len(str(getattr(message, "content", message))) for message in messages)
+        llm_prompt_tokens_total.labels(self.provider, model).inc(prompt_chars // CHARS_PER_TOKEN)
+        async with llm_client_registry.semaphore(self.provider, self.config):
+            if slot_acquired is not None:
+                slot_acquired.set()
+            started = time.monotonic()
+            first = True
+            completion_chars = 0
+            # Consumers may stop early once they have what they need; that still counts as ok
+            status = "ok"
+            try:
+                async for chunk in self.client.astream(messages):
+                    if not chunk.content:
+                        continue
+                    if first:
+                        first_token = time.monotonic() - started
+                        llm_latency.observe(self.provider, self.config, "first_token", first_token)
+                        llm_first_token_seconds.labels(self.provider, model).observe(first_token)
+                        first = False
+                    completion_chars += len(chunk.content)
+                    yield chunk.content
+            except asyncio.CancelledError:
+                status = "cancelled"
+                raise
+            except Exception:
+                status = "error"
+                llm_latency.record_failure(self.provider, self.config)
+                raise
+            finally:
+                elapsed = time.monotonic() - started
+                llm_call_duration_seconds.labels(self.provider, model, status).observe(elapsed)
+                llm_completion_tokens_total.labels(self.provider, model).inc(completion_chars // CHARS_PER_TOKEN)
+            llm_latency.observe(self.provider, self.config, "total", time.monotonic() - started)
+    
+    async def _race_first_chunk(
+        self,
+        messages: List[Any]
+    ) -> Tuple[AsyncIterator[str], Optional[str]]:
+        """Start the primary, hedge to the secondary if it is slow or fails.
+        
+        Returns the stream that produced a first chunk first, with that chunk;
+        the other stream is cancelled. Raises if every provider fails.
+        """
+        delay = llm_latency.hedge_delay(
+            self.provider,
+            self.config,
+            quantile=settings.LLM_HEDGE_QUANTILE,
+            min_samples=settings.LLM_HEDGE_MIN_SAMPLES,
+            default=settings.LLM_HEDGE_DEFAULT_DELAY_SECONDS,
+            floor=settings.LLM_HEDGE_MIN_DELAY_SECONDS
+        )
+        pending: Dict[asyncio.Future, AsyncIterator[str]] = {}
+        
+        def start(service: "LLMService", slot_acquired: Optional[asyncio.Event] = None) -> None:
+            stream = service._provider_chunks(messages, slot_acquired)
+            pending[asyncio.ensure_future(_first_chunk(stream))] = stream
+        
+        primary_slot = asyncio.Event()
+        start(self, primary_slot)
+        hedged = False
+        error: Optional[BaseException] = None
+        try:
+            # Time queued behind the primary's concurrency cap is not slowness
+            # of the provider, so the hedge delay starts once it holds a slot
+            slot_wait = asyncio.ensure_future(primary_slot.wait())
+            try:
+                await asyncio.wait([slot_wait, *pending], return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                slot_wait.cancel()
+            
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=None if hedged else delay,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    # Primary has not produced a first token in time
+                    hedged = True
+                    start(self.secondary)
+                    continue
+                
+                for task in done:
+                    stream = pending.pop(task)
+                    if task.exception() is None:
+                        return stream, task.result()
+                    error = task.exception()
+                if not hedged:
+                    # Primary failed before its first token: fail over
+                    hedged = True
+                    start(self.secondary)
+            raise error
+        finally:
+            # Cancel the loser (or everything, if we are being cancelled)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for stream in pending.values():
+                await stream.aclose()
+    
+    async def _chunks(self, messages: List[Any]) -> AsyncIterator[str]:
+        """Stream completion text, hedged against the secondary provider when enabled.
+        
+        Only the wait for the first token is hedged; a stream that fails after
+        it has started is not restarted elsewhere.
+        """
+        if not (settings.LLM_HEDGING_ENABLED and self.secondary):
+            async for chunk in self._provider_chunks(messages):
+                yield chunk
+            return
+        
+        stream, chunk = await self._race_first_chunk(messages)
+        try:
+            if chunk is not None:
+                yield chunk
+                async for chunk in stream:
+                    yield chunk
+        finally:
+            await stream.aclose()
+    
+    async def _complete(
+        self,
+        prompt: "ChatPromptTemplate",
+        inputs: Dict[str, Any],
+        use_cache: bool = True
+    ) -> str:
+        """Render the prompt and return the completion text, using the response cache"""
+        messages = prompt.format_messages(**inputs)
+        key = self._cache_key(messages, use_cache)
+        
+        if key:
+            cached = await llm_response_cache.get(key)
+            if cached is not None:
+                return cached
+        
+        content = "".join([chunk async for chunk in self._chunks(messages)])
+        
+        if key:
+            await llm_response_cache.set(
+                key,
+                content,
+                self.provider,
+                self.config.get("model_name")
+            )
+        return content
+    
+    async def _stream(
+        self,
+        prompt: "ChatPromptTemplate",
+        inputs: Dict[str, Any],
+        use_cache: bool = True
+    ) -> AsyncIterator[str]:
+        """Render the prompt and stream completion tokens, using the response cache"""
+        messages = prompt.format_messages(**inputs)
+        key = self._cache_key(messages, use_cache)
+        
+        if key:
+            cached = await llm_response_cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+        
+        chunks = []
+        async for chunk in self._chunks(messages):
+            chunks.append(chunk)
+            yield chunk
+        
+        # Only complete streams are cached
+        if key:
+            await llm_response_cache.set(
+                key,
+                "".join(chunks),
+                self.provider,
+                self.config.get("model_name")
+            )
+    
+    async def _complete_json(
+        self,
+        prompt: "ChatPromptTemplate",
+        inputs: Dict[str, Any],
+        use_cache: bool = True,
+        collect: Iterable[str] = (),
+        on_item: Optional[ItemCallback] = None
+    ) -> Tuple[Any, str]:
+        """Stream a JSON completion through the incremental parser.
         
-        prompt = ChatPromptTemplate.from_messages([
+        Generation is cancelled as soon as the output can no longer parse, or
+        once the JSON value closes, and retried up to LLM_JSON_MAX_ATTEMPTS times.
+        Elements of the top-level arrays named in collect are passed to on_item
+        as they complete. Returns the parsed value and its JSON text; raises
+        MalformedJSONError (carrying the raw output) if every attempt fails.
+        """
+        messages = prompt.format_messages(**inputs)
+        key = self._cache_key(messages, use_cache)
+        emitted: Dict[str, int] = {}
+        
+        def surface(items: List[Tuple[str, Any]], seen: Dict[str, int]) -> None:
+            # A retry re-generates items an aborted attempt already surfaced
+            for name, item in items:
+                seen[name] = seen.get(name, 0) + 1
+                if seen[name] > emitted.get(name, 0):
+                    emitted[name] = seen[name]
+                    if on_item:
+                        on_item(name, item)
+        
+        if key:
+            cached = await llm_response_cache.get(key)
+            if cached is not None:
+                parser = StreamingJSONParser(collect, max_preamble=len(cached))
+                try:
+                    items = parser.feed(cached)
+                    result = parser.result()
+                    surface(items, {})
+                    return result, parser.json_text()
+                except (MalformedJSONError, json.JSONDecodeError):
+                    pass  # Not JSON (e.g. stored by a plain completion); regenerate
+        
+        attempt_messages = messages
+        error: Optional[MalformedJSONError] = None
+        for _ in range(max(1, settings.LLM_JSON_MAX_ATTEMPTS)):
+            parser = StreamingJSONParser(collect, max_preamble=settings.LLM_JSON_MAX_PREAMBLE_CHARS)
+            seen: Dict[str, int] = {}
+            try:
+                stream = self._chunks(attempt_messages)
+                try:
+                    async for chunk in stream:
+                        surface(parser.feed(chunk), seen)
+                        if parser.complete:
+                            break  # Don't pay for trailing prose
+                finally:
+                    await stream.aclose()
+                result = parser.result()
+            except MalformedJSONError as e:
+                error = e
+            except json.JSONDecodeError as e:
+                error = MalformedJSONError(str(e), parser.text)
+            else:
+                if key:
+                    await llm_response_cache.set(
+                        key,
+                        parser.json_text(),
+                        self.provider,
+                        self.config.get("model_name")
+                    )
+                return result, parser.json_text()
+            from langchain_core.messages import HumanMessage
+            attempt_messages = messages + [HumanMessage(content=JSON_RETRY_INSTRUCTION)]
+        
+        raise error
+    
+    async def analyze_requirement(
+        self,
+        requirement: str,
+        context: Optional[str] = None,
+        use_cache: bool = True,
+        on_question: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """Analyze user requirement and generate questions.
+        
+        on_question receives each question as soon as it has been generated.
+        """
+        
+        prompt = _chat_prompt([
             ("system", """You are an expert n8n workflow analyst. Your task is to analyze user requirements 
             and identify what information is needed to create a perfect n8n workflow.
             
@@ -74,33 +409,33 @@ class LLMService:
             ("user", "Requirement: {requirement}\n\nContext: {context}")
         ])
         
-        chain = prompt | self.client
-        response = await chain.ainvoke({
-            "requirement": requirement,
-            "context": context or "None provided"
-        })
-        
-        # Parse response
+        on_item = (lambda name, item: on_question(item)) if on_question else None
         try:
-            result = json.loads(response.content)
-            return result
-        except json.JSONDecodeError:
-            # If LLM doesn't return valid JSON, extract information
-            return {
-                "summary": response.content[:200],
-                "identified_components": [],
-                "missing_information": [],
-                "questions": [],
-                "estimated_complexity": "medium"
-            }
+            result, content = await self._complete_json(prompt, {
+                "requirement": requirement,
+                "context": context or "None provided"
+            }, use_cache=use_cache, collect=("questions",), on_item=on_item)
+            if isinstance(result, dict):
+                return result
+        except MalformedJSONError as e:
+            content = e.text
+        
+        # If LLM doesn't return valid JSON, extract information
+        return {
+            "summary": content[:200],
+            "identified_components": [],
+            "missing_information": [],
+            "questions": [],
+            "estimated_complexity": "medium"
+        }
     
-    async def generate_development_spec(
+    def _development_spec_prompt(
         self,
         requirement: str,
         answers: List[Dict[str, str]],
         learned_examples: List[Dict[str, Any]]
-    ) -> str:
-        """Generate detailed development specification"""
+    ) -> Tuple["ChatPromptTemplate", Dict[str, Any]]:
+        """Build the development spec prompt and its inputs"""
         
         # Prepare examples context
         examples_context = "\n\n".join([
@@ -117,7 +452,7 @@ class LLMService:
             for i, ans in enumerate(answers)
         ])
         
-        prompt = ChatPromptTemplate.from_messages([
+        prompt = _chat_prompt([
             ("system", """You are an expert n8n workflow architect. Create a comprehensive development specification 
             document for building an n8n workflow based on user requirements and answers.
             
@@ -147,29 +482,52 @@ Relevant Examples:
 Generate a comprehensive development specification document.""")
         ])
         
-        chain = prompt | self.client
-        response = await chain.ainvoke({
+        return prompt, {
             "requirement": requirement,
             "answers": answers_context,
             "examples": examples_context
-        })
+        }
+    
+    async def generate_development_spec(
+        self,
+        requirement: str,
+        answers: List[Dict[str, str]],
+        learned_examples: List[Dict[str, Any]],
+        use_cache: bool = True
+    ) -> str:
+        """Generate detailed development specification"""
         
-        return response.content
+        prompt, inputs = self._development_spec_prompt(requirement, answers, learned_examples)
+        return await self._complete(prompt, inputs, use_cache=use_cache)
     
-    async def generate_n8n_json(
+    async def stream_development_spec(
+        self,
+        requirement: str,
+        answers: List[Dict[str, str]],
+        learned_examples: List[Dict[str, Any]],
+        use_cache: bool = True
+    ) -> AsyncIterator[str]:
+        """Stream the development specification token by token"""
+        
+        prompt, inputs = self._development_spec_prompt(requirement, answers, learned_examples)
+        async for chunk in self._stream(prompt, inputs, use_cache=use_cache):
+            yield chunk
+    
+    def _n8n_json_prompt(
         self,
         development_spec: str,
         learned_examples: List[Dict[str, Any]]
-    ) -> str:
-        """Generate n8n workflow JSON based on development spec"""
+    ) -> Tuple["ChatPromptTemplate", Dict[str, Any]]:
+        """Build the workflow JSON prompt and its inputs"""
         
-        # Prepare example JSONs
+        # Prepare example skeletons (precomputed at ingest, summarized here for older rows)
         examples_json = "\n\n".join([
-            f"Example {i+1} ({ex.get('title', 'Untitled')}):\n{ex.get('workflow_json', '{}')[:500]}..."
+            f"Example {i+1} ({ex.get('title', 'Untitled')}):\n"
+            f"{ex.get('workflow_summary') or summarize_workflow(ex.get('workflow_json') or '{}') or '{}'}"
             for i, ex in enumerate(learned_examples[:3])
         ])
         
-        prompt = ChatPromptTemplate.from_messages([
+        prompt = _chat_prompt([
             ("system", """You are an expert n8n workflow developer. Generate a complete, valid n8n workflow JSON 
             based on the development specification.
             
@@ -186,28 +544,66 @@ Generate a comprehensive development specification document.""")
             ("user", """Development Specification:
 {spec}
 
-Reference Examples (for structure):
+Reference Examples (structural skeletons; ids, positions and credentials omitted):
 {examples}
 
 Generate the complete n8n workflow JSON:""")
         ])
         
-        chain = prompt | self.client
-        response = await chain.ainvoke({
+        return prompt, {
             "spec": development_spec,
             "examples": examples_json
-        })
+        }
+    
+    async def generate_n8n_json(
+        self,
+        development_spec: str,
+        learned_examples: List[Dict[str, Any]],
+        use_cache: bool = True,
+        on_node: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> str:
+        """Generate n8n workflow JSON based on development spec.
+        
+        on_node receives each node as soon as it has been generated. If no
+        attempt yields valid JSON the raw output is returned for validation.
+        """
         
-        return response.content
+        prompt, inputs = self._n8n_json_prompt(development_spec, learned_examples)
+        try:
+            _, workflow_json = await self._complete_json(
+                prompt, inputs, use_cache=use_cache, collect=("nodes",),
+                on_item=(lambda name, item: on_node(item)) if on_node else None
+            )
+            return workflow_json
+        except MalformedJSONError as e:
+            return e.text
+    
+    async def stream_n8n_json(
+        self,
+        development_spec: str,
+        learned_examples: List[Dict[str, Any]],
+        use_cache: bool = True
+    ) -> AsyncIterator[str]:
+        """Stream the n8n workflow JSON token by token"""
+        
+        prompt, inputs = self._n8n_json_prompt(development_spec, learned_examples)
+        async for chunk in self._stream(prompt, inputs, use_cache=use_cache):
+            yield chunk
     
     async def test_and_optimize_workflow(
         self,
         workflow_json: str,
-        development_spec: str
+        development_spec: str,
+        known_issues: Optional[List[str]] = None,
+        use_cache: bool = True
     ) -> Dict[str, Any]:
-        """Test and optimize the generated workflow"""
+        """Test and optimize the generated workflow.
         
-        prompt = ChatPromptTemplate.from_messages([
+        known_issues are findings from the local validator; the structural
+        checks it covers are not repeated by the model.
+        """
+        
+        prompt = _chat_prompt([
             ("system", """You are an expert n8n workflow reviewer. Analyze the generated workflow JSON and:
             
             1. Check for errors or invalid configurations
@@ -230,23 +626,31 @@ Generate the complete n8n workflow JSON:""")
 Generated Workflow JSON:
 {workflow}
 
+Local structural checks (JSON validity, node names, connections, trigger) already ran.
+Do not repeat them; focus on the specification, node configuration, security and cost.
+Findings from those checks:
+{local_checks}
+
 Analyze and optimize:""")
         ])
         
-        chain = prompt | self.client
-        response = await chain.ainvoke({
-            "spec": development_spec,
-            "workflow": workflow_json
-        })
-        
         try:
-            result = json.loads(response.content)
-            return result
-        except json.JSONDecodeError:
-            return {
-                "passed": True,
-                "issues": [],
-                "suggestions": [],
-                "optimization_opportunities": [],
-                "optimized_json": workflow_json
-            }
+            result, _ = await self._complete_json(prompt, {
+                "spec": development_spec,
+                "workflow": workflow_json,
+                "local_checks": "\n".join(f"- {issue}" for issue in known_issues or []) or "None"
+            }, use_cache=use_cache)
+            if isinstance(result, dict):
+                return result
+            error = "expected a JSON object"
+        except MalformedJSONError as e:
+            error = str(e)
+        
+        # An unreadable review must not count as a pass
+        return {
+            "passed": False,
+            "issues": [f"Workflow review did not return valid JSON ({error})"],
+            "suggestions": [],
+            "optimization_opportunities": [],
+            "optimized_json": None
+        }
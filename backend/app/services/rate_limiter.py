@@ -0,0 +1,126 @@
+"""
+Per-host token-bucket rate limiting for the learning crawlers
+"""
+import asyncio
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core.config import settings
+
+
+# Below this share of the advertised limit, spread the remaining calls over the window
+LOW_REMAINING_RATIO = 0.1
+
+
+class TokenBucket:
+    """Async token bucket that can also be paused until a given time"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """Block all requests for the given number of seconds"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class HostRateLimiter:
+    """Keeps one token bucket per host and adapts it to rate-limit headers"""
+
+    def __init__(self, rate: float = 5.0, burst: int = 10):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    @staticmethod
+    def bucket_key(url: str) -> str:
+        """GitHub's search API has its own quota, so it gets its own bucket"""
+        parts = urlsplit(url)
+        if parts.netloc == "api.github.com" and parts.path.startswith("/search"):
+            return f"{parts.netloc}/search"
+        return parts.netloc
+
+    def bucket(self, url: str) -> TokenBucket:
+        key = self.bucket_key(url)
+        if key not in self._buckets:
+            self._buckets[key] = TokenBucket(self.rate, self.burst)
+        return self._buckets[key]
+
+    def update_from_response(self, response: httpx.Response) -> None:
+        """Honour X-RateLimit-* and Retry-After headers"""
+        bucket = self.bucket(str(response.request.url))
+        headers = response.headers
+
+        retry_after = _to_float(headers.get("Retry-After"))
+        if retry_after is not None and response.status_code in (403, 429):
+            bucket.pause(retry_after)
+            return
+
+        remaining = _to_float(headers.get("X-RateLimit-Remaining"))
+        reset = _to_float(headers.get("X-RateLimit-Reset"))
+        if remaining is None or reset is None:
+            return
+
+        window = max(reset - time.time(), 1.0)
+        limit = _to_float(headers.get("X-RateLimit-Limit")) or remaining
+        if remaining <= 0:
+            bucket.pause(window)
+        elif remaining < limit * LOW_REMAINING_RATIO:
+            # Spread what is left over the rest of the window
+            bucket.rate = min(self.rate, remaining / window)
+        else:
+            bucket.rate = self.rate
+
+    async def request(
+        self,
+        client: httpx.AsyncClient,
+        method: str,
+        url: str,
+        **kwargs
+    ) -> httpx.Response:
+        """Send a request once the host's bucket allows it"""
+        await self.bucket(url).acquire()
+        response = await client.request(method, url, **kwargs)
+        self.update_from_response(response)
+        return response
+
+    async def get(self, client: httpx.AsyncClient, url: str, **kwargs) -> httpx.Response:
+        return await self.request(client, "GET", url, **kwargs)
+
+
+def _to_float(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def create_host_rate_limiter() -> HostRateLimiter:
+    """Build a limiter from the learning settings"""
+    return HostRateLimiter(
+        rate=settings.LEARNING_HOST_RATE_PER_SECOND,
+        burst=settings.LEARNING_HOST_BURST
+    )
@@ -0,0 +1,241 @@
+"""
+Incremental JSON parsing of streamed LLM output
+"""
+import json
+import re
+from typing import Any, Iterable, List, Optional, Tuple
+
+
+_NUMBER_RE = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?$")
+_LITERALS = {"true", "false", "null"}
+_LITERAL_CHARS = set("0123456789+-.abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ")
+_WHITESPACE = " \t\r\n"
+_FENCE_RE = re.compile(r"^\s*```[\w-]*\s*|\s*```\s*$")
+
+
+class MalformedJSONError(ValueError):
+    """Raised as soon as streamed output can no longer become valid JSON"""
+
+    def __init__(self, message: str, text: str = ""):
+        super().__init__(message)
+        self.text = text
+
+
+class _Frame:
+    """One open object or array"""
+
+    __slots__ = ("kind", "key", "state", "pending_key")
+
+    def __init__(self, kind: str, key: Optional[str]):
+        self.kind = kind  # "{" or "["
+        self.key = key  # Key this container is stored under in its parent object
+        self.state = "first"  # first, key, key_string, colon, value, next
+        self.pending_key: Optional[str] = None
+
+
+class StreamingJSONParser:
+    """Validates JSON structure chunk by chunk.
+
+    Leading prose or markdown fences before the first '{' or '[' are skipped
+    (up to max_preamble characters) and anything after the root value closes
+    is ignored. Elements of top-level arrays named in ``collect`` are returned
+    from feed() as soon as they are complete.
+    """
+
+    def __init__(self, collect: Iterable[str] = (), max_preamble: int = 300):
+        self.collect = set(collect)
+        self.max_preamble = max_preamble
+        self.complete = False
+        self._stack: List[_Frame] = []
+        self._started = False
+        self._preamble = 0
+        self._in_string = False
+        self._escape = False
+        self._string_parts: Optional[List[str]] = None  # Only kept for keys
+        self._literal: Optional[List[str]] = None
+        self._received: List[str] = []
+        # Root value and the collected element currently being captured
+        self._root_parts: List[str] = []
+        self._item_parts: Optional[List[str]] = None
+        self._item_key: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        """Everything received so far"""
+        return "".join(self._received)
+
+    def _fail(self, message: str) -> None:
+        raise MalformedJSONError(message, self.text)
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Consume a chunk; return (array name, element) pairs completed by it"""
+        self._received.append(chunk)
+        if self.complete:
+            return []
+
+        items = []
+        root_start = 0 if self._started else None
+        item_start = 0 if self._item_parts is not None else None
+
+        for i, char in enumerate(chunk):
+            if not self._started:
+                if char in "{[":
+                    self._started = True
+                    root_start = i
+                elif char not in _WHITESPACE:
+                    self._preamble += 1
+                    if self._preamble > self.max_preamble:
+                        self._fail("No JSON value found in output")
+                    continue
+                else:
+                    continue
+
+            if self._in_string:
+                self._string_char(char)
+                continue
+
+            if self._literal is not None:
+                if char in _LITERAL_CHARS:
+                    self._literal.append(char)
+                    continue
+                self._end_literal()
+
+            if char in _WHITESPACE:
+                continue
+
+            if char in "{[":
+                key = self._begin_value()
+                frame = _Frame(char, key)
+                if (
+                    char == "{"
+                    and len(self._stack) == 2
+                    and self._stack[1].kind == "["
+                    and self._stack[1].key in self.collect
+                ):
+                    self._item_parts = []
+                    self._item_key = self._stack[1].key
+                    item_start = i
+                self._stack.append(frame)
+            elif char in "}]":
+                self._close(char)
+                if self._item_parts is not None and len(self._stack) == 2:
+                    self._item_parts.append(chunk[item_start:i + 1])
+                    items.append((self._item_key, self._parse_item()))
+                    self._item_parts = None
+                    item_start = None
+                if not self._stack:
+                    self._root_parts.append(chunk[root_start:i + 1])
+                    self.complete = True
+                    return items
+            elif char == '"':
+                frame = self._stack[-1]
+                if frame.kind == "{" and frame.state in ("first", "key"):
+                    self._string_parts = []
+                    frame.state = "key_string"
+                else:
+                    self._begin_value()
+                    self._string_parts = None
+                self._in_string = True
+            elif char == ":":
+                frame = self._stack[-1]
+                if frame.kind != "{" or frame.state != "colon":
+                    self._fail("Unexpected ':'")
+                frame.state = "value"
+            elif char == ",":
+                frame = self._stack[-1]
+                if frame.state != "next":
+                    self._fail("Unexpected ','")
+                frame.state = "key" if frame.kind == "{" else "value"
+            elif char in _LITERAL_CHARS:
+                self._begin_value()
+                self._literal = [char]
+            else:
+                self._fail(f"Unexpected character {char!r}")
+
+        if self._started and root_start is not None:
+            self._root_parts.append(chunk[root_start:])
+        if self._item_parts is not None and item_start is not None:
+            self._item_parts.append(chunk[item_start:])
+        return items
+
+    def _begin_value(self) -> Optional[str]:
+        """Check a value may start here; return the key it is stored under"""
+        if not self._stack:
+            return None
+        frame = self._stack[-1]
+        if frame.kind == "{":
+            if frame.state == "colon":
+                self._fail("Expected ':' after object key")
+            if frame.state != "value":
+                self._fail("Expected an object key")
+            key = frame.pending_key
+        else:
+            if frame.state not in ("first", "value"):
+                self._fail("Expected ',' or ']'")
+            key = None
+        frame.state = "next"
+        return key
+
+    def _close(self, char: str) -> None:
+        if not self._stack:
+            self._fail(f"Unexpected {char!r}")
+        frame = self._stack[-1]
+        expected = "}" if frame.kind == "{" else "]"
+        if char != expected:
+            self._fail(f"Mismatched {char!r}")
+        if frame.state not in ("first", "next"):
+            self._fail(f"Unexpected {char!r} after ',' or ':'")
+        self._stack.pop()
+
+    def _string_char(self, char: str) -> None:
+        if self._string_parts is not None:
+            self._string_parts.append(char)
+        if self._escape:
+            self._escape = False
+            return
+        if char == "\\":
+            self._escape = True
+        elif char == '"':
+            self._in_string = False
+            frame = self._stack[-1]
+            if frame.state == "key_string":
+                raw = '"' + "".join(self._string_parts)
+                frame.pending_key = json.loads(raw)
+                frame.state = "colon"
+            self._string_parts = None
+        elif ord(char) < 0x20:
+            self._fail("Unescaped control character in string")
+
+    def _end_literal(self) -> None:
+        token = "".join(self._literal)
+        self._literal = None
+        if token not in _LITERALS and not _NUMBER_RE.match(token):
+            self._fail(f"Invalid literal {token!r}")
+
+    def _parse_item(self) -> Any:
+        return json.loads("".join(self._item_parts))
+
+    def result(self) -> Any:
+        """Parse the complete root value"""
+        if not self.complete:
+            self._fail("Output ended before the JSON value was complete")
+        return json.loads("".join(self._root_parts))
+
+    def json_text(self) -> str:
+        """Raw text of the root value (complete or not)"""
+        return "".join(self._root_parts)
+
+
+def partial_json_text(text: str) -> str:
+    """JSON value of a possibly unfinished completion, without prose or markdown fences.
+
+    Unlike workflow_validator.extract_json_text this also cuts an incomplete
+    value out of a stream that stopped early. Falls back to the
+    fence-stripped text when no JSON value starts in it.
+    """
+    parser = StreamingJSONParser(max_preamble=len(text))
+    try:
+        parser.feed(text)
+    except MalformedJSONError:
+        pass
+    return parser.json_text() or _FENCE_RE.sub("", text)
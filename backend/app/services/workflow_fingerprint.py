@@ -0,0 +1,102 @@
+"""
+Structural MinHash fingerprints of n8n workflows for near-duplicate detection
+"""
+import hashlib
+import json
+import random
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Set
+
+
+# 64 hash functions split into 8 bands of 8 rows: pairs above ~0.77
+# Jaccard similarity share a bucket with high probability, pairs below ~0.5 rarely do
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 8
+LSH_ROWS = MINHASH_PERMUTATIONS // LSH_BANDS
+
+# Workflows with fewer features look alike by accident (trigger -> one action)
+MIN_SHINGLES = 5
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MASK_32 = (1 << 32) - 1
+
+# Fixed seed: signatures are stored, so the permutations must never change
+_rng = random.Random(0x6E386E)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(MINHASH_PERMUTATIONS)
+]
+
+
+def _hash64(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def workflow_shingles(workflow: Dict[str, Any]) -> Set[str]:
+    """Features of a workflow's structure, independent of how it was exported.
+
+    Node types, top-level parameter values and type-to-type connections are
+    kept. Node ids, names, positions, credentials and node order never
+    enter a feature, so re-exports and forks that only change those match.
+    """
+    nodes = [node for node in workflow.get('nodes', []) if isinstance(node, dict)]
+    types_by_name = {node.get('name'): node.get('type', '') for node in nodes}
+
+    features = Counter()
+    for node in nodes:
+        node_type = node.get('type', '')
+        features[f"n:{node_type}"] += 1
+        parameters = node.get('parameters')
+        if isinstance(parameters, dict):
+            for key, value in parameters.items():
+                value_text = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+                features[f"p:{node_type}:{key}={value_text}"] += 1
+
+    connections = workflow.get('connections')
+    for source, outputs in (connections.items() if isinstance(connections, dict) else []):
+        source_type = types_by_name.get(source, "")
+        for kind, branches in (outputs.items() if isinstance(outputs, dict) else []):
+            for output_index, branch in enumerate(branches or []):
+                for link in branch or []:
+                    if isinstance(link, dict):
+                        target_type = types_by_name.get(link.get('node'), "")
+                        features[f"e:{kind}:{source_type}:{output_index}>{target_type}"] += 1
+
+    # Repeated features are numbered so counts still count
+    return {f"{feature}#{n}" for feature, count in features.items() for n in range(count)}
+
+
+def minhash_signature(shingles: Iterable[str]) -> List[int]:
+    """MinHash signature (32-bit values) of a non-empty shingle set"""
+    hashes = [_hash64(shingle) for shingle in shingles]
+    return [
+        min(((a * h + b) % _MERSENNE_PRIME) & _MASK_32 for h in hashes)
+        for a, b in _PERMUTATIONS
+    ]
+
+
+def workflow_minhash(workflow: Dict[str, Any]) -> List[int]:
+    """Signature of a workflow, or [] if it is too small to fingerprint"""
+    shingles = workflow_shingles(workflow)
+    if len(shingles) < MIN_SHINGLES:
+        return []
+    return minhash_signature(shingles)
+
+
+def signature_similarity(a: List[int], b: List[int]) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures"""
+    if not a or len(a) != len(b):
+        return 0.0
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+def lsh_bucket_keys(signature: List[int]) -> List[str]:
+    """One bucket key per LSH band; near-duplicates share at least one"""
+    if len(signature) != MINHASH_PERMUTATIONS:
+        return []
+    keys = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+        digest = hashlib.blake2b(",".join(map(str, rows)).encode("ascii"), digest_size=8).hexdigest()
+        keys.append(f"{band}:{digest}")
+    return keys
@@ -1,20 +1,51 @@
 """
 Workflow Service for managing workflow generation process
 """
-from typing import Dict, Any, List, Optional
-from sqlalchemy import select, desc
+from typing import Dict, Any, List, Optional, AsyncIterator, Callable
+from sqlalchemy import select, desc, func, or_, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
+import base64
+import json
 
-from app.models.database import WorkflowRequest, LLMConfig
+import anyio
+
+from app.models.database import AsyncSessionLocal, WorkflowRequest
 from app.services.llm_service import LLMService
+from app.services.llm_config_cache import active_llm_config_cache
+from app.services.streaming_json import partial_json_text
+from app.services.workflow_validator import validate_workflow
 from app.services.learning_service import LearningService
 from app.schemas.workflow import (
     UserRequirement,
     Answer,
     DevelopmentSpec,
-    WorkflowResponse
+    WorkflowResponse,
+    WorkflowSummary,
+    PipelineRunRequest
 )
+from app.core.config import settings
+from app.core.metrics import timed_stage, timed_stream
+
+
+# Length of the requirement preview in history listings
+REQUIREMENT_PREVIEW_LENGTH = 200
+
+
+def encode_cursor(created_at: datetime, request_id: int) -> str:
+    """Encode a keyset pagination cursor"""
+    raw = f"{created_at.isoformat()}|{request_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str):
+    """Decode a keyset pagination cursor into (created_at, id)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        created_at, request_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), int(request_id)
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid cursor")
 
 
 class WorkflowService:
@@ -24,22 +55,83 @@ class WorkflowService:
         self.db = db
         self.learning_service = LearningService(db)
     
+    async def _get_request(self, request_id: int) -> WorkflowRequest:
+        """Get workflow request, reusing the copy already loaded in this session"""
+        request = await self.db.get(WorkflowRequest, request_id)
+        
+        if not request:
+            raise ValueError("Request not found")
+        return request
+    
+    async def _mark_stream_failed(self, request_id: int, **values: Any) -> None:
+        """Mark a request failed after its stream broke off, keeping the partial output.
+        
+        A client disconnect cancels the request's scope, session included,
+        so this runs shielded on a session of its own.
+        """
+        with anyio.CancelScope(shield=True):
+            async with AsyncSessionLocal() as db:
+                failed = await db.get(WorkflowRequest, request_id)
+                if failed is None:
+                    return
+                for key, value in values.items():
+                    setattr(failed, key, value)
+                failed.status = "failed"
+                failed.updated_at = datetime.utcnow()
+                await db.commit()
+    
     async def _get_active_llm_config(self) -> Optional[Dict[str, Any]]:
-        """Get active LLM configuration"""
-        stmt = select(LLMConfig).where(LLMConfig.is_active == True).limit(1)
-        result = await self.db.execute(stmt)
-        config = result.scalar_one_or_none()
-        
-        if config:
-            return {
-                "provider": config.provider,
-                "api_key": config.api_key,
-                "api_url": config.api_url,
-                "model_name": config.model_name,
-                "temperature": config.temperature,
-                "max_tokens": config.max_tokens
+        """Get active LLM configuration (cached in-process)"""
+        return await active_llm_config_cache.get(self.db)
+    
+    async def _get_llm_service(self) -> LLMService:
+        """Get LLM service for the active configuration, with the secondary for hedging"""
+        llm_config = await self._get_active_llm_config()
+        secondary = None
+        if settings.LLM_HEDGING_ENABLED:
+            secondary_config = await active_llm_config_cache.get_secondary(self.db)
+            if secondary_config and secondary_config != llm_config:
+                secondary = LLMService(
+                    provider=secondary_config.get("provider"),
+                    config=secondary_config
+                )
+        return LLMService(
+            provider=llm_config.get("provider") if llm_config else None,
+            config=llm_config,
+            secondary=secondary
+        )
+    
+    async def _get_spec_examples(self, requirement: str) -> List[Dict[str, Any]]:
+        """Get reference examples for development spec generation"""
+        examples = await self.learning_service.get_relevant_examples(
+            requirement,
+            limit=10
+        )
+        
+        return [
+            {
+                "title": ex.title,
+                "description": ex.description,
+                "nodes_used": ex.nodes_used,
+                "complexity_level": ex.complexity_level
             }
-        return None
+            for ex in examples
+        ]
+    
+    async def _get_json_examples(self, requirement: str) -> List[Dict[str, Any]]:
+        """Get reference examples for workflow JSON generation"""
+        examples = await self.learning_service.get_relevant_examples(
+            requirement,
+            limit=5
+        )
+        
+        return [
+            {
+                "title": ex.title,
+                "workflow_summary": ex.workflow_summary
+            }
+            for ex in examples
+        ]
     
     async def create_workflow_request(
         self,
@@ -61,35 +153,30 @@ class WorkflowService:
         
         return WorkflowResponse.model_validate(request)
     
+    @timed_stage("analyze_requirement")
     async def analyze_requirement(
         self,
-        request_id: int
+        request_id: int,
+        use_cache: bool = True,
+        on_question: Optional[Callable[[Dict[str, Any]], None]] = None
     ) -> Dict[str, Any]:
         """Analyze user requirement and generate questions"""
         
         # Get request
-        stmt = select(WorkflowRequest).where(WorkflowRequest.id == request_id)
-        result = await self.db.execute(stmt)
-        request = result.scalar_one_or_none()
-        
-        if not request:
-            raise ValueError("Request not found")
+        request = await self._get_request(request_id)
         
         # Update status
         request.status = "analyzing"
         await self.db.commit()
         
-        # Get LLM config and initialize service
-        llm_config = await self._get_active_llm_config()
-        llm_service = LLMService(
-            provider=llm_config.get("provider") if llm_config else None,
-            config=llm_config
-        )
+        llm_service = await self._get_llm_service()
         
         # Analyze requirement
         analysis = await llm_service.analyze_requirement(
             request.user_requirement,
-            context=None
+            context=None,
+            use_cache=use_cache,
+            on_question=on_question
         )
         
         # Save analysis
@@ -109,12 +196,7 @@ class WorkflowService:
         """Submit answers to questions"""
         
         # Get request
-        stmt = select(WorkflowRequest).where(WorkflowRequest.id == request_id)
-        result = await self.db.execute(stmt)
-        request = result.scalar_one_or_none()
-        
-        if not request:
-            raise ValueError("Request not found")
+        request = await self._get_request(request_id)
         
         # Save answers
         answers_data = [
@@ -136,49 +218,28 @@ class WorkflowService:
         
         return {"message": "Answers submitted successfully"}
     
+    @timed_stage("generate_development_spec")
     async def generate_development_spec(
         self,
-        request_id: int
+        request_id: int,
+        use_cache: bool = True
     ) -> str:
         """Generate development specification"""
         
         # Get request
-        stmt = select(WorkflowRequest).where(WorkflowRequest.id == request_id)
-        result = await self.db.execute(stmt)
-        request = result.scalar_one_or_none()
-        
-        if not request:
-            raise ValueError("Request not found")
+        request = await self._get_request(request_id)
         
         # Get relevant examples
-        examples = await self.learning_service.get_relevant_examples(
-            request.user_requirement,
-            limit=10
-        )
+        examples_data = await self._get_spec_examples(request.user_requirement)
         
-        examples_data = [
-            {
-                "title": ex.title,
-                "description": ex.description,
-                "nodes_used": ex.nodes_used,
-                "complexity_level": ex.complexity_level,
-                "workflow_json": ex.workflow_json
-            }
-            for ex in examples
-        ]
-        
-        # Get LLM config
-        llm_config = await self._get_active_llm_config()
-        llm_service = LLMService(
-            provider=llm_config.get("provider") if llm_config else None,
-            config=llm_config
-        )
+        llm_service = await self._get_llm_service()
         
         # Generate spec
         spec = await llm_service.generate_development_spec(
             request.user_requirement,
             request.user_answers or [],
-            examples_data
+            examples_data,
+            use_cache=use_cache
         )
         
         # Save spec
@@ -189,6 +250,48 @@ class WorkflowService:
         
         return spec
     
+    @timed_stream("stream_development_spec")
+    async def stream_development_spec(
+        self,
+        request_id: int,
+        use_cache: bool = True
+    ) -> AsyncIterator[str]:
+        """Stream development specification, saving it once complete.
+        
+        Lookups run before the stream is returned, so a missing request
+        raises ValueError here rather than mid-stream.
+        """
+        
+        # Get request
+        request = await self._get_request(request_id)
+        
+        examples_data = await self._get_spec_examples(request.user_requirement)
+        llm_service = await self._get_llm_service()
+        
+        async def stream() -> AsyncIterator[str]:
+            chunks = []
+            try:
+                async for chunk in llm_service.stream_development_spec(
+                    request.user_requirement,
+                    request.user_answers or [],
+                    examples_data,
+                    use_cache=use_cache
+                ):
+                    chunks.append(chunk)
+                    yield chunk
+            except BaseException:
+                # Includes the client disconnecting; keep what was generated for inspection
+                await self._mark_stream_failed(request_id, development_spec="".join(chunks))
+                raise
+            
+            # Save spec only after the stream completed
+            request.development_spec = "".join(chunks)
+            request.status = "spec_review"
+            request.updated_at = datetime.utcnow()
+            await self.db.commit()
+        
+        return stream()
+    
     async def update_development_spec(
         self,
         request_id: int,
@@ -197,12 +300,7 @@ class WorkflowService:
         """Update development specification after user review"""
         
         # Get request
-        stmt = select(WorkflowRequest).where(WorkflowRequest.id == request_id)
-        result = await self.db.execute(stmt)
-        request = result.scalar_one_or_none()
-        
-        if not request:
-            raise ValueError("Request not found")
+        request = await self._get_request(request_id)
         
         request.development_spec = updated_spec
         request.status = "spec_approved"
@@ -211,48 +309,32 @@ class WorkflowService:
         
         return {"message": "Development spec updated successfully"}
     
+    @timed_stage("generate_workflow_json")
     async def generate_workflow_json(
         self,
-        request_id: int
+        request_id: int,
+        use_cache: bool = True,
+        on_node: Optional[Callable[[Dict[str, Any]], None]] = None
     ) -> str:
         """Generate n8n workflow JSON"""
         
         # Get request
-        stmt = select(WorkflowRequest).where(WorkflowRequest.id == request_id)
-        result = await self.db.execute(stmt)
-        request = result.scalar_one_or_none()
-        
-        if not request:
-            raise ValueError("Request not found")
+        request = await self._get_request(request_id)
         
         request.status = "generating_json"
         await self.db.commit()
         
         # Get relevant examples
-        examples = await self.learning_service.get_relevant_examples(
-            request.user_requirement,
-            limit=5
-        )
-        
-        examples_data = [
-            {
-                "title": ex.title,
-                "workflow_json": ex.workflow_json
-            }
-            for ex in examples
-        ]
+        examples_data = await self._get_json_examples(request.user_requirement)
         
-        # Get LLM config
-        llm_config = await self._get_active_llm_config()
-        llm_service = LLMService(
-            provider=llm_config.get("provider") if llm_config else None,
-            config=llm_config
-        )
+        llm_service = await self._get_llm_service()
         
         # Generate JSON
         workflow_json = await llm_service.generate_n8n_json(
             request.development_spec,
-            examples_data
+            examples_data,
+            use_cache=use_cache,
+            on_node=on_node
         )
         
         # Save generated JSON
@@ -263,32 +345,88 @@ class WorkflowService:
         
         return workflow_json
     
+    @timed_stream("stream_workflow_json")
+    async def stream_workflow_json(
+        self,
+        request_id: int,
+        use_cache: bool = True
+    ) -> AsyncIterator[str]:
+        """Stream n8n workflow JSON, saving it once complete"""
+        
+        # Get request
+        request = await self._get_request(request_id)
+        
+        request.status = "generating_json"
+        await self.db.commit()
+        
+        examples_data = await self._get_json_examples(request.user_requirement)
+        llm_service = await self._get_llm_service()
+        
+        async def stream() -> AsyncIterator[str]:
+            chunks = []
+            try:
+                async for chunk in llm_service.stream_n8n_json(
+                    request.development_spec,
+                    examples_data,
+                    use_cache=use_cache
+                ):
+                    chunks.append(chunk)
+                    yield chunk
+            except BaseException:
+                # Includes the client disconnecting; keep what was generated for inspection
+                await self._mark_stream_failed(
+                    request_id,
+                    generated_json=partial_json_text("".join(chunks))
+                )
+                raise
+            
+            # Save generated JSON only after the stream completed
+            request.generated_json = partial_json_text("".join(chunks))
+            request.status = "testing"
+            request.updated_at = datetime.utcnow()
+            await self.db.commit()
+        
+        return stream()
+    
+    @timed_stage("test_and_optimize")
     async def test_and_optimize(
         self,
-        request_id: int
+        request_id: int,
+        use_cache: bool = True
     ) -> Dict[str, Any]:
         """Test and optimize generated workflow"""
         
         # Get request
-        stmt = select(WorkflowRequest).where(WorkflowRequest.id == request_id)
-        result = await self.db.execute(stmt)
-        request = result.scalar_one_or_none()
+        request = await self._get_request(request_id)
         
-        if not request:
-            raise ValueError("Request not found")
-        
-        # Get LLM config
-        llm_config = await self._get_active_llm_config()
-        llm_service = LLMService(
-            provider=llm_config.get("provider") if llm_config else None,
-            config=llm_config
-        )
+        # Structural checks run locally; the LLM review is skipped when they fail
+        report = validate_workflow(request.generated_json)
         
-        # Test and optimize
-        test_result = await llm_service.test_and_optimize_workflow(
-            request.generated_json,
-            request.development_spec
-        )
+        if not report.passed:
+            test_result = report.to_test_result()
+        else:
+            llm_service = await self._get_llm_service()
+            
+            # Test and optimize
+            test_result = await llm_service.test_and_optimize_workflow(
+                report.workflow_json,
+                request.development_spec,
+                known_issues=report.warnings,
+                use_cache=use_cache
+            )
+            test_result["issues"] = report.warnings + [
+                issue for issue in test_result.get("issues", [])
+                if issue not in report.warnings
+            ]
+            test_result["local_validation"] = {"errors": [], "warnings": report.warnings}
+            
+            # Never replace a structurally valid workflow with a broken one
+            optimized = test_result.get("optimized_json")
+            if optimized and not isinstance(optimized, str):
+                optimized = json.dumps(optimized, indent=2)
+            if optimized and not validate_workflow(optimized).passed:
+                optimized = None
+            test_result["optimized_json"] = optimized
         
         # Save results
         request.test_results = test_result
@@ -297,7 +435,7 @@ class WorkflowService:
         if test_result.get("optimized_json"):
             request.final_json = test_result["optimized_json"]
         else:
-            request.final_json = request.generated_json
+            request.final_json = report.workflow_json or request.generated_json
         
         request.status = "completed"
         request.updated_at = datetime.utcnow()
@@ -305,15 +443,86 @@ class WorkflowService:
         
         return test_result
     
+    async def run_pipeline(
+        self,
+        run_request: PipelineRunRequest,
+        on_stage: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+        on_item: Optional[Callable[[str, Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """Run every generation stage for one requirement without client round trips.
+        
+        Requirement analysis is skipped when answers are supplied up front;
+        otherwise any generated questions are left unanswered. on_item receives
+        ("question", question) and ("node", node) as soon as each is generated.
+        """
+        notify = on_stage or (lambda stage, data: None)
+        surface = on_item or (lambda name, item: None)
+        use_cache = run_request.use_cache
+        
+        created = await self.create_workflow_request(
+            UserRequirement(requirement=run_request.requirement)
+        )
+        request_id = created.id
+        notify("created", {"request_id": request_id})
+        
+        try:
+            if run_request.answers is None:
+                notify("analyzing", {})
+                analysis = await self.analyze_requirement(
+                    request_id,
+                    use_cache=use_cache,
+                    on_question=lambda question: surface("question", question)
+                )
+                notify("analyzed", {"questions": analysis.get("questions", [])})
+                answers_data = []
+            else:
+                answers_data = [
+                    {
+                        "question_id": f"q{i + 1}",
+                        "question": ans.question,
+                        "answer": ans.answer
+                    }
+                    for i, ans in enumerate(run_request.answers)
+                ]
+            
+            request = await self._get_request(request_id)
+            request.user_answers = answers_data
+            await self.db.commit()
+            
+            notify("generating_spec", {})
+            await self.generate_development_spec(request_id, use_cache=use_cache)
+            
+            notify("generating_json", {})
+            await self.generate_workflow_json(
+                request_id,
+                use_cache=use_cache,
+                on_node=lambda node: surface("node", node)
+            )
+            
+            notify("testing", {})
+            test_result = await self.test_and_optimize(request_id, use_cache=use_cache)
+        except Exception:
+            await self.db.rollback()
+            request = await self._get_request(request_id)
+            request.status = "failed"
+            request.updated_at = datetime.utcnow()
+            await self.db.commit()
+            raise
+        
+        request = await self._get_request(request_id)
+        return {
+            "request_id": request_id,
+            "final_json": request.final_json,
+            "test_results": test_result
+        }
+    
     async def get_workflow_request(
         self,
         request_id: int
     ) -> Optional[WorkflowResponse]:
         """Get workflow request by ID"""
         
-        stmt = select(WorkflowRequest).where(WorkflowRequest.id == request_id)
-        result = await self.db.execute(stmt)
-        request = result.scalar_one_or_none()
+        request = await self.db.get(WorkflowRequest, request_id)
         
         if request:
             return WorkflowResponse.model_validate(request)
@@ -322,24 +531,66 @@ class WorkflowService:
     async def list_workflow_requests(
         self,
         skip: int = 0,
-        limit: int = 20
+        limit: int = 20,
+        cursor: Optional[str] = None
     ) -> Dict[str, Any]:
-        """List workflow requests"""
+        """List workflow request summaries, newest first.
+        
+        Pass the returned next_cursor to fetch the following page; skip is
+        only honoured when no cursor is given.
+        """
+        if limit < 1 or skip < 0:
+            raise ValueError("limit must be positive and skip non-negative")
         
         # Get total count
-        count_stmt = select(WorkflowRequest)
-        count_result = await self.db.execute(count_stmt)
-        total = len(count_result.scalars().all())
+        total = await self.db.scalar(select(func.count(WorkflowRequest.id)))
+        
+        # Only summary columns are loaded; full payloads come from get_workflow_request
+        stmt = select(
+            WorkflowRequest.id,
+            WorkflowRequest.status,
+            func.substr(
+                WorkflowRequest.user_requirement, 1, REQUIREMENT_PREVIEW_LENGTH
+            ).label("requirement_preview"),
+            WorkflowRequest.created_at,
+            WorkflowRequest.updated_at
+        ).order_by(
+            desc(WorkflowRequest.created_at),
+            desc(WorkflowRequest.id)
+        )
+        
+        if cursor:
+            created_at, request_id = decode_cursor(cursor)
+            stmt = stmt.where(or_(
+                WorkflowRequest.created_at < created_at,
+                and_(
+                    WorkflowRequest.created_at == created_at,
+                    WorkflowRequest.id < request_id
+                )
+            ))
+        elif skip:
+            stmt = stmt.offset(skip)
         
-        # Get paginated results
-        stmt = select(WorkflowRequest).order_by(
-            desc(WorkflowRequest.created_at)
-        ).offset(skip).limit(limit)
+        # Fetch one extra row to know whether another page exists
+        result = await self.db.execute(stmt.limit(limit + 1))
+        rows = result.all()
         
-        result = await self.db.execute(stmt)
-        requests = result.scalars().all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
         
         return {
-            "total": total,
-            "items": [WorkflowResponse.model_validate(req) for req in requests]
+            "total": total or 0,
+            "items": [
+                WorkflowSummary(
+                    id=row.id,
+                    status=row.status or "pending",
+                    requirement_preview=row.requirement_preview or "",
+                    created_at=row.created_at,
+                    updated_at=row.updated_at
+                )
+                for row in rows
+            ],
+            "next_cursor": next_cursor
         }
@@ -0,0 +1,138 @@
+"""
+Compact structural summaries of n8n workflows for prompt context
+"""
+import json
+from typing import Any, Dict, List, Optional, Union
+
+from app.core.config import settings
+
+
+# Rough characters-per-token ratio for JSON text
+CHARS_PER_TOKEN = 4
+
+# Workflow-level keys worth keeping; ids, pinData, meta, settings etc. are dropped
+WORKFLOW_KEYS = ("name",)
+
+# Progressively harsher settings tried until the summary fits the budget:
+# (max string length, max parameter depth, keep parameters)
+COMPACTION_LEVELS = [
+    (200, 4, True),
+    (80, 3, True),
+    (40, 2, True),
+    (40, 1, True),
+    (0, 0, False),
+]
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def _compact_value(value: Any, max_string: int, depth: int) -> Any:
+    """Trim long strings and deep structures, dropping empty values"""
+    if isinstance(value, str):
+        if len(value) > max_string:
+            return value[:max_string] + "…"
+        return value
+    if isinstance(value, dict):
+        if depth <= 0:
+            return "{…}"
+        compacted = {}
+        for key, item in value.items():
+            if _is_empty(item):
+                continue
+            compacted[key] = _compact_value(item, max_string, depth - 1)
+        return compacted
+    if isinstance(value, list):
+        if depth <= 0:
+            return "[…]"
+        return [_compact_value(item, max_string, depth - 1) for item in value if not _is_empty(item)]
+    return value
+
+
+def _compact_node(node: Dict[str, Any], max_string: int, depth: int, keep_parameters: bool) -> Dict[str, Any]:
+    compacted = {"name": node.get("name"), "type": node.get("type")}
+    if "typeVersion" in node:
+        compacted["typeVersion"] = node["typeVersion"]
+    parameters = node.get("parameters")
+    if keep_parameters and isinstance(parameters, dict) and parameters:
+        parameters = _compact_value(parameters, max_string, depth)
+        if parameters:
+            compacted["parameters"] = parameters
+    return compacted
+
+
+def _compact_connections(connections: Any, names: set) -> Dict[str, Any]:
+    """Keep the n8n connection layout, minus links to dropped nodes"""
+    compacted = {}
+    if not isinstance(connections, dict):
+        return compacted
+    for source, outputs in connections.items():
+        if source not in names or not isinstance(outputs, dict):
+            continue
+        kept_outputs = {}
+        for output_type, branches in outputs.items():
+            kept_branches = []
+            for branch in branches or []:
+                kept_branches.append([
+                    {"node": link["node"], "type": link.get("type", output_type), "index": link.get("index", 0)}
+                    for link in branch or []
+                    if isinstance(link, dict) and link.get("node") in names
+                ])
+            if any(kept_branches):
+                kept_outputs[output_type] = kept_branches
+        if kept_outputs:
+            compacted[source] = kept_outputs
+    return compacted
+
+
+def _render(workflow: Dict[str, Any], nodes: List[Dict[str, Any]], level: int) -> str:
+    max_string, depth, keep_parameters = COMPACTION_LEVELS[level]
+    skeleton = {key: workflow[key] for key in WORKFLOW_KEYS if workflow.get(key)}
+    skeleton["nodes"] = [_compact_node(node, max_string, depth, keep_parameters) for node in nodes]
+    names = {node.get("name") for node in nodes}
+    skeleton["connections"] = _compact_connections(workflow.get("connections"), names)
+    return json.dumps(skeleton, ensure_ascii=False, separators=(",", ":"))
+
+
+def summarize_workflow(
+    workflow: Union[str, Dict[str, Any]],
+    token_budget: Optional[int] = None
+) -> Optional[str]:
+    """Turn a workflow into a valid, minified JSON skeleton within a token budget.
+
+    Keeps node names, types and key parameters plus the connection graph;
+    ids, positions and credentials are dropped. Parameters are trimmed harder
+    until the result fits, and as a last resort trailing nodes are dropped.
+    Returns None if the workflow cannot be parsed.
+    """
+    token_budget = token_budget or settings.EXAMPLE_SUMMARY_TOKEN_BUDGET
+    if isinstance(workflow, str):
+        try:
+            workflow = json.loads(workflow)
+        except (json.JSONDecodeError, TypeError):
+            return None
+    if not isinstance(workflow, dict):
+        return None
+
+    nodes = [node for node in workflow.get("nodes") or [] if isinstance(node, dict)]
+
+    for level in range(len(COMPACTION_LEVELS)):
+        summary = _render(workflow, nodes, level)
+        if estimate_tokens(summary) <= token_budget:
+            return summary
+
+    # Even bare nodes do not fit: keep the leading nodes and their edges
+    last_level = len(COMPACTION_LEVELS) - 1
+    low, high = 0, len(nodes)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(_render(workflow, nodes[:middle], last_level)) <= token_budget:
+            low = middle
+        else:
+            high = middle - 1
+    return _render(workflow, nodes[:low], last_level)
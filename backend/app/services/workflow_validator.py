@@ -0,0 +1,165 @@
+"""
+Deterministic structural validation of generated n8n workflows
+"""
+import json
+import re
+from typing import Any, Dict, List, Optional, Set
+
+
+_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*\n?(.*?)\n?\s*```\s*$", re.DOTALL)
+
+# Node types that start an execution without a "Trigger" suffix
+TRIGGER_NODE_TYPES = {
+    "n8n-nodes-base.webhook",
+    "n8n-nodes-base.cron",
+    "n8n-nodes-base.interval",
+    "n8n-nodes-base.start",
+}
+
+# Node types that never take part in the execution graph
+NON_EXECUTING_NODE_TYPES = {
+    "n8n-nodes-base.stickyNote",
+}
+
+
+class ValidationReport:
+    """Outcome of local workflow validation"""
+
+    def __init__(self):
+        self.errors: List[str] = []
+        self.warnings: List[str] = []
+        self.workflow_json: Optional[str] = None  # Cleaned JSON text, when it parsed
+
+    @property
+    def passed(self) -> bool:
+        return not self.errors
+
+    def to_test_result(self) -> Dict[str, Any]:
+        """Render the report in the TestResult shape"""
+        return {
+            "passed": self.passed,
+            "issues": self.errors + self.warnings,
+            "suggestions": [],
+            "optimization_opportunities": [],
+            "local_validation": {"errors": self.errors, "warnings": self.warnings}
+        }
+
+
+def extract_json_text(text: str) -> str:
+    """Strip markdown fences or surrounding prose from an LLM JSON answer"""
+    text = text or ""
+    fenced = _FENCE_RE.match(text)
+    if fenced:
+        return fenced.group(1).strip()
+
+    stripped = text.strip()
+    if stripped.startswith("{"):
+        return stripped
+
+    start, end = stripped.find("{"), stripped.rfind("}")
+    if start != -1 and end > start:
+        return stripped[start:end + 1]
+    return stripped
+
+
+def is_trigger_node(node_type: str) -> bool:
+    return node_type in TRIGGER_NODE_TYPES or node_type.lower().endswith("trigger")
+
+
+def _connection_targets(source: str, outputs: Any, errors: List[str]) -> List[str]:
+    """Target node names of one source node's connections, reporting malformed links"""
+    targets = []
+    if not isinstance(outputs, dict):
+        errors.append(f"Connections of '{source}' must be an object")
+        return targets
+    for kind, branches in outputs.items():
+        if not isinstance(branches, list):
+            errors.append(f"'{kind}' connections of '{source}' must be an array")
+            continue
+        for branch in branches:
+            # n8n stores an output with no links as null
+            if branch is None:
+                continue
+            if not isinstance(branch, list):
+                errors.append(f"'{kind}' output of '{source}' must be an array of links")
+                continue
+            for link in branch:
+                if not isinstance(link, dict) or not isinstance(link.get("node"), str):
+                    errors.append(f"Connection from '{source}' has a link without a target node name")
+                    continue
+                targets.append(link["node"])
+    return targets
+
+
+def validate_workflow(text: str) -> ValidationReport:
+    """Run the structural checks that do not need an LLM"""
+    report = ValidationReport()
+    cleaned = extract_json_text(text)
+
+    try:
+        workflow = json.loads(cleaned)
+    except json.JSONDecodeError as e:
+        report.errors.append(f"Workflow is not valid JSON: {e.msg} (line {e.lineno}, column {e.colno})")
+        return report
+
+    if not isinstance(workflow, dict):
+        report.errors.append("Workflow JSON must be an object")
+        return report
+    report.workflow_json = cleaned
+
+    nodes = workflow.get("nodes")
+    if not isinstance(nodes, list) or not nodes:
+        report.errors.append("Workflow has no 'nodes' array")
+        return report
+
+    names: Set[str] = set()
+    executing: Dict[str, str] = {}
+    for i, node in enumerate(nodes):
+        if not isinstance(node, dict):
+            report.errors.append(f"Node #{i + 1} is not an object")
+            continue
+        name, node_type = node.get("name"), node.get("type")
+        if not name:
+            report.errors.append(f"Node #{i + 1} has no name")
+            continue
+        if not isinstance(name, str):
+            report.errors.append(f"Node #{i + 1} name must be a string")
+            continue
+        if not node_type:
+            report.errors.append(f"Node '{name}' has no type")
+        elif not isinstance(node_type, str):
+            report.errors.append(f"Node '{name}' type must be a string")
+            node_type = None
+        if name in names:
+            report.errors.append(f"Duplicate node name '{name}'")
+        names.add(name)
+        if node_type not in NON_EXECUTING_NODE_TYPES:
+            executing[name] = node_type or ""
+
+    connections = workflow.get("connections", {})
+    if not isinstance(connections, dict):
+        report.errors.append("'connections' must be an object")
+        connections = {}
+
+    connected: Set[str] = set()
+    for source, outputs in connections.items():
+        if source not in names:
+            report.errors.append(f"Connection from unknown node '{source}'")
+        targets = _connection_targets(source, outputs, report.errors)
+        for target in targets:
+            if target not in names:
+                report.errors.append(f"Connection from '{source}' to unknown node '{target}'")
+        if targets:
+            connected.add(source)
+            connected.update(targets)
+
+    triggers = [name for name, node_type in executing.items() if is_trigger_node(node_type)]
+    if not triggers:
+        report.errors.append("Workflow has no trigger node")
+
+    if len(executing) > 1:
+        for name in executing:
+            if name not in connected:
+                report.warnings.append(f"Node '{name}' is not connected to any other node")
+
+    return report
@@ -0,0 +1,177 @@
+"""
+Standalone learning worker
+
+    python -m app.worker learn          # run learning cycles on LEARNING_SCHEDULE_CRON
+    python -m app.worker learn --once   # run one cycle now and exit
+    python -m app.worker backfill       # bring stored examples up to date and exit
+
+DB-backed leader locks make sure only one process (worker or API) runs a
+cycle, or the example backfills, at a time. Set
+LEARNING_SCHEDULER_IN_PROCESS=false on the API processes when a worker
+owns the schedule; the worker then runs the backfills too.
+"""
+import argparse
+import asyncio
+import re
+import signal
+import sys
+from typing import Any, Dict, List, Optional
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.cron import CronTrigger
+
+from app.core.config import settings
+from app.models.database import AsyncSessionLocal, init_db
+from app.services.leader_lock import DatabaseLeaderLock, LeaderLockHeld, LeaderLockLost
+
+
+LEARNING_LOCK_NAME = "learning_cycle"
+BACKFILL_LOCK_NAME = "example_backfills"
+
+# crontab numbers weekdays from Sunday (0 or 7); APScheduler from Monday
+CRON_WEEKDAYS = ("sun", "mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+learning_lock = DatabaseLeaderLock(LEARNING_LOCK_NAME, settings.LEARNING_LOCK_TTL_SECONDS)
+backfill_lock = DatabaseLeaderLock(BACKFILL_LOCK_NAME, settings.LEARNING_LOCK_TTL_SECONDS)
+
+
+def learning_trigger(expression: str) -> CronTrigger:
+    """APScheduler trigger for a standard five-field crontab expression"""
+    fields = expression.split()
+    if len(fields) != 5:
+        raise ValueError(f"Expected 5 crontab fields, got {expression!r}")
+    minute, hour, day, month, day_of_week = fields
+    # Numbers after "/" are steps, not weekdays
+    day_of_week = re.sub(
+        r"(?<![/\d])\d+",
+        lambda match: CRON_WEEKDAYS[int(match.group())],
+        day_of_week
+    )
+    return CronTrigger(minute=minute, hour=hour, day=day, month=month, day_of_week=day_of_week)
+
+
+async def run_learning_job(linger: bool = False) -> Optional[Dict[str, Any]]:
+    """Run one learning cycle under the leader lock.
+
+    Returns None without running if the cycle is already running, here or
+    in another process, and if the lock is lost part-way through.
+    Scheduled runs pass linger so that every process firing the same
+    schedule runs the cycle only once between them.
+    """
+    from app.services.learning_service import LearningService
+
+    try:
+        async with learning_lock.hold(linger=linger):
+            async with AsyncSessionLocal() as db:
+                return await LearningService(db).run_learning_cycle()
+    except LeaderLockHeld:
+        print("⏭️ Learning cycle skipped: it is already running")
+        return None
+    except LeaderLockLost:
+        print("⚠️ Learning cycle aborted: the lock was lost")
+        return None
+
+
+async def run_backfills() -> Optional[Dict[str, int]]:
+    """Bring examples stored by older versions up to date, under the backfill lock.
+
+    Hashes, summaries, fingerprints, compression and node counters are
+    filled in once per database rather than by every process that starts.
+    Returns None without running if another process holds the lock.
+    """
+    from app.services.learning_service import LearningService
+
+    try:
+        async with backfill_lock.hold():
+            async with AsyncSessionLocal() as db:
+                service = LearningService(db)
+                return {
+                    "content_hashes": await service.backfill_content_hashes(),
+                    "workflow_summaries": await service.backfill_workflow_summaries(),
+                    "clustered": await service.backfill_fingerprints(),
+                    "compressed": await service.compress_legacy_workflows(),
+                    "node_types": await service.rebuild_node_usage_stats(only_if_empty=True)
+                }
+    except LeaderLockHeld:
+        print("⏭️ Example backfills skipped: they are already running")
+        return None
+    except LeaderLockLost:
+        print("⚠️ Example backfills aborted: the lock was lost")
+        return None
+
+
+async def scheduled_learning() -> None:
+    if await run_learning_job(linger=True) is not None:
+        print("✅ Scheduled learning cycle completed")
+
+
+def start_learning_scheduler(scheduler: AsyncIOScheduler) -> None:
+    """Add the learning cycle to a scheduler and start it"""
+    scheduler.add_job(
+        scheduled_learning,
+        learning_trigger(settings.LEARNING_SCHEDULE_CRON),
+        id="learning_cycle",
+        max_instances=1,
+        coalesce=True
+    )
+    scheduler.start()
+
+
+async def learn(once: bool) -> int:
+    await init_db()
+    try:
+        await run_backfills()
+        if once:
+            results = await run_learning_job()
+            if results is None:
+                return 1
+            print(f"✅ Learning cycle completed: {results['sources']}")
+            return 0
+
+        scheduler = AsyncIOScheduler()
+        start_learning_scheduler(scheduler)
+        print(f"✅ Learning worker started ({settings.LEARNING_SCHEDULE_CRON})")
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        await stop.wait()
+        scheduler.shutdown()
+        return 0
+    finally:
+        from app.services.learning_parsers import parse_pool
+        parse_pool.shutdown()
+        print("👋 Learning worker stopped")
+
+
+async def backfill() -> int:
+    await init_db()
+    results = await run_backfills()
+    if results is None:
+        return 1
+    print(f"✅ Example backfills completed: {results}")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.worker", description=__doc__.split("\n\n")[0].strip())
+    commands = parser.add_subparsers(dest="command", required=True)
+    learn_parser = commands.add_parser("learn", help="run the learning cycle")
+    learn_parser.add_argument("--once", action="store_true", help="run one cycle now and exit")
+    commands.add_parser("backfill", help="bring stored examples up to date")
+    args = parser.parse_args(argv)
+
+    if args.command == "backfill":
+        return asyncio.run(backfill())
+
+    if args.command == "learn":
+        if not settings.LEARNING_ENABLED:
+            print("LEARNING_ENABLED is false; nothing to do")
+            return 0
+        return asyncio.run(learn(args.once))
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,339 @@
+"""
+End-to-end pipeline benchmark.
+
+Drives every /api/workflow stage (create, analyze, answers, spec, JSON,
+test) through the FastAPI app in-process, against the offline ``fake`` LLM
+provider and a throwaway SQLite database, and reports requests per second
+and p50/p95/p99 latency per endpoint. No network access is needed.
+
+Usage (from backend/):
+    python benchmarks/pipeline.py
+    python benchmarks/pipeline.py --pipelines 200 --concurrency 16 --latency 0.2 --tokens-per-second 80
+    python benchmarks/pipeline.py --mode both --stream
+    python benchmarks/pipeline.py --json > baseline.json
+    python benchmarks/pipeline.py --compare baseline.json --max-regression 10
+
+With --compare, exits non-zero when a p95 latency or the pipeline
+throughput is more than --max-regression percent worse than the baseline.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SAMPLE_REQUIREMENTS = (
+    "When a form is submitted, save the answers to Google Sheets and notify Slack",
+    "Every morning fetch new GitHub issues and email a summary to the team",
+    "Sync new Stripe customers into HubSpot and tag them by plan",
+    "Watch an RSS feed and post new articles to a Discord channel",
+    "Back up Airtable records to S3 as CSV once a day",
+)
+
+JOB_POLL_SECONDS = 0.01
+
+
+def configure_environment(args: argparse.Namespace, data_dir: str) -> None:
+    """Point the app at a scratch database and the fake provider (before importing it)"""
+    os.environ.update({
+        "DATABASE_URL": f"sqlite+aiosqlite:///{os.path.join(data_dir, 'benchmark.db')}",
+        "DEFAULT_LLM_PROVIDER": "fake",
+        "LEARNING_ENABLED": "false",
+        "DB_ECHO": "false",
+        "LLM_HEDGING_ENABLED": "false",
+        "FAKE_LLM_LATENCY_SECONDS": str(args.latency),
+        "FAKE_LLM_TOKENS_PER_SECOND": str(args.tokens_per_second),
+        "FAKE_LLM_ERROR_RATE": str(args.error_rate),
+        "FAKE_LLM_SEED": str(args.seed),
+        "LLM_DEFAULT_MAX_CONCURRENCY": str(args.llm_concurrency),
+        "PIPELINE_MAX_CONCURRENT_JOBS": str(args.concurrency),
+    })
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(q * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+class Recorder:
+    """Latency samples and error counts per endpoint"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.enabled = True
+
+    @contextlib.asynccontextmanager
+    async def measure(self, endpoint: str):
+        started = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            if self.enabled:
+                self.samples.setdefault(endpoint, []).append(time.perf_counter() - started)
+                if not ok:
+                    self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def summary(self, wall_seconds: float) -> Dict[str, Dict[str, float]]:
+        endpoints = {}
+        for endpoint, samples in self.samples.items():
+            ordered = sorted(samples)
+            endpoints[endpoint] = {
+                "requests": len(ordered),
+                "errors": self.errors.get(endpoint, 0),
+                "rps": round(len(ordered) / wall_seconds, 2) if wall_seconds else 0.0,
+                "mean_ms": round(1000 * sum(ordered) / len(ordered), 2),
+                "p50_ms": round(1000 * percentile(ordered, 0.50), 2),
+                "p95_ms": round(1000 * percentile(ordered, 0.95), 2),
+                "p99_ms": round(1000 * percentile(ordered, 0.99), 2),
+            }
+        return endpoints
+
+
+async def call(client, recorder: Recorder, endpoint: str, method: str, url: str, **kwargs) -> Any:
+    """Issue one request under the endpoint's timer; non-2xx responses count as errors"""
+    async with recorder.measure(endpoint):
+        response = await client.request(method, url, **kwargs)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{endpoint}: HTTP {response.status_code} {response.text[:200]}")
+        if response.headers.get("content-type", "").startswith("text/event-stream"):
+            if "event: error" in response.text:
+                raise RuntimeError(f"{endpoint}: stream reported an error")
+            return response.text
+        return response.json()
+
+
+async def run_stages(client, recorder: Recorder, requirement: str, stream: bool) -> None:
+    """One pipeline through the step-by-step endpoints"""
+    created = await call(client, recorder, "create", "POST", "/api/workflow/create", json={"requirement": requirement})
+    base = f"/api/workflow/{created['id']}"
+    params = {"use_cache": "false"}
+
+    analysis = await call(client, recorder, "analyze", "POST", f"{base}/analyze", params=params)
+    answers = [
+        {"question_id": question["id"], "answer": "Use sensible defaults"}
+        for question in analysis.get("questions") or []
+    ]
+    await call(client, recorder, "answers", "POST", f"{base}/answers", json=answers)
+
+    suffix = "/stream" if stream else ""
+    await call(client, recorder, f"generate-spec{suffix}", "POST", f"{base}/generate-spec{suffix}", params=params)
+    await call(client, recorder, f"generate-json{suffix}", "POST", f"{base}/generate-json{suffix}", params=params)
+    await call(client, recorder, "test-optimize", "POST", f"{base}/test-optimize", params=params)
+    await call(client, recorder, "get", "GET", base)
+
+
+async def run_job(client, recorder: Recorder, requirement: str) -> None:
+    """One pipeline as a background job, polled until it finishes"""
+    async with recorder.measure("run (job end-to-end)"):
+        # No up-front answers, so the job runs requirement analysis as well
+        job = await call(client, recorder, "run", "POST", "/api/workflow/run", json={
+            "requirement": requirement,
+            "use_cache": False
+        })
+        while job["status"] not in ("completed", "failed"):
+            await asyncio.sleep(JOB_POLL_SECONDS)
+            job = await call(client, recorder, "jobs/{id}", "GET", f"/api/workflow/jobs/{job['job_id']}")
+        if job["status"] == "failed":
+            raise RuntimeError(f"job failed: {job.get('error')}")
+
+
+async def drive(client, recorder: Recorder, args: argparse.Namespace, count: int) -> Tuple[int, int]:
+    """Run count pipelines with bounded concurrency; return (succeeded, failed)"""
+    next_index = 0
+    outcome = [0, 0]
+
+    async def worker():
+        nonlocal next_index
+        while next_index < count:
+            index = next_index
+            next_index += 1
+            requirement = f"{SAMPLE_REQUIREMENTS[index % len(SAMPLE_REQUIREMENTS)]} (#{index})"
+            use_jobs = args.mode == "jobs" or (args.mode == "both" and index % 2)
+            try:
+                if use_jobs:
+                    await run_job(client, recorder, requirement)
+                else:
+                    await run_stages(client, recorder, requirement, args.stream)
+                outcome[0] += 1
+            except Exception:
+                outcome[1] += 1
+
+    await asyncio.gather(*(worker() for _ in range(max(1, min(args.concurrency, count)))))
+    return outcome[0], outcome[1]
+
+
+async def benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    import httpx
+    from main import app
+
+    recorder = Recorder()
+    # Startup banners go to stderr so --json output stays clean
+    with contextlib.redirect_stdout(sys.stderr):
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+                recorder.enabled = False
+                await drive(client, recorder, args, args.warmup)
+                recorder.enabled = True
+
+                started = time.perf_counter()
+                succeeded, failed = await drive(client, recorder, args, args.pipelines)
+                wall_seconds = time.perf_counter() - started
+
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "parameters": {
+            "pipelines": args.pipelines,
+            "concurrency": args.concurrency,
+            "mode": args.mode,
+            "stream": args.stream,
+            "latency": args.latency,
+            "tokens_per_second": args.tokens_per_second,
+            "error_rate": args.error_rate,
+            "llm_concurrency": args.llm_concurrency,
+            "seed": args.seed,
+        },
+        "wall_seconds": round(wall_seconds, 3),
+        "pipelines_succeeded": succeeded,
+        "pipelines_failed": failed,
+        "pipelines_per_second": round(args.pipelines / wall_seconds, 2) if wall_seconds else 0.0,
+        "endpoints": recorder.summary(wall_seconds),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND_DIR,
+            capture_output=True,
+            text=True
+        )
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    parameters = report["parameters"]
+    print(
+        f"Pipeline benchmark @ {report['commit'] or 'unknown commit'}: {parameters['pipelines']} pipelines, "
+        f"concurrency {parameters['concurrency']}, mode {parameters['mode']}"
+        f"{' (streaming)' if parameters['stream'] else ''}"
+    )
+    print(
+        f"  fake LLM: {parameters['latency']:.3f} s to first token, "
+        f"{parameters['tokens_per_second'] or 'unlimited'} tokens/s, "
+        f"{parameters['error_rate']:.0%} errors, {parameters['llm_concurrency']} concurrent calls"
+    )
+    print(
+        f"  {report['pipelines_per_second']:.2f} pipelines/s over {report['wall_seconds']:.2f} s "
+        f"({report['pipelines_succeeded']} ok, {report['pipelines_failed']} failed)"
+    )
+    print()
+    print(f"  {'endpoint':<26} {'requests':>8} {'errors':>6} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for endpoint, row in report["endpoints"].items():
+        print(
+            f"  {endpoint:<26} {row['requests']:>8} {row['errors']:>6} {row['rps']:>8.2f} "
+            f"{row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f}"
+        )
+
+
+def _change(current: float, baseline: float) -> Optional[float]:
+    if not baseline:
+        return None
+    return 100.0 * (current - baseline) / baseline
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], max_regression: Optional[float]) -> bool:
+    """Print deltas against a baseline report; return True if a regression exceeds the limit"""
+    regressed = False
+    print()
+    print(f"  Compared with {baseline.get('commit') or 'baseline'} (positive = slower):")
+    if baseline.get("parameters") != report["parameters"]:
+        print("  warning: benchmark parameters differ from the baseline")
+
+    throughput = _change(report["pipelines_per_second"], baseline.get("pipelines_per_second", 0))
+    if throughput is not None:
+        print(f"  {'pipelines/s':<26} {baseline['pipelines_per_second']:>9.2f} -> {report['pipelines_per_second']:>9.2f} ({throughput:+.1f}%)")
+        if max_regression is not None and -throughput > max_regression:
+            regressed = True
+
+    for endpoint, row in report["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(endpoint)
+        if not before:
+            print(f"  {endpoint:<26} new endpoint")
+            continue
+        deltas = []
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            change = _change(row[key], before[key])
+            deltas.append(f"{key[:3]} {change:+.1f}%" if change is not None else f"{key[:3]} n/a")
+        print(f"  {endpoint:<26} {'  '.join(deltas)}")
+        p95 = _change(row["p95_ms"], before["p95_ms"])
+        if max_regression is not None and p95 is not None and p95 > max_regression:
+            regressed = True
+    return regressed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the workflow pipeline against a fake LLM")
+    parser.add_argument("--pipelines", type=int, default=50, help="Pipelines to measure")
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured pipelines run first")
+    parser.add_argument("--concurrency", type=int, default=8, help="Pipelines in flight at once")
+    parser.add_argument("--mode", choices=("stages", "jobs", "both"), default="stages",
+                        help="Step-by-step endpoints, background /run jobs, or alternate between them")
+    parser.add_argument("--stream", action="store_true", help="Use the SSE variants of the spec and JSON stages")
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake LLM seconds to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Fake LLM token rate (0 = unlimited)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of fake LLM calls that fail")
+    parser.add_argument("--llm-concurrency", type=int, default=16, help="Concurrent fake LLM calls allowed")
+    parser.add_argument("--seed", type=int, default=1234, help="Seed for injected failures")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--compare", help="Baseline report (from --json) to compare against")
+    parser.add_argument("--max-regression", type=float,
+                        help="With --compare, fail if p95 or throughput is this many percent worse")
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix="n8n-benchmark-")
+    try:
+        configure_environment(args, data_dir)
+        report = asyncio.run(benchmark(args))
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        out = sys.stderr
+    else:
+        print_report(report)
+        out = sys.stdout
+
+    regressed = False
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        with contextlib.redirect_stdout(out):
+            regressed = compare(report, baseline, args.max_regression)
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""
+Startup import-time benchmark.
+
+Imports the app in fresh interpreters with ``-X importtime`` and reports
+the slowest modules, so import-graph regressions are easy to spot.
+
+Usage (from backend/):
+    python benchmarks/startup.py
+    python benchmarks/startup.py --runs 5 --top 30 --budget 1.5
+    python benchmarks/startup.py --json > startup.json
+
+Exits non-zero when --budget is exceeded or a module that must stay lazy
+(see LAZY_MODULES) is loaded at startup.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Packages that must only be imported when first used
+LAZY_MODULES = (
+    "langchain",
+    "langchain_core",
+    "langchain_openai",
+    "langchain_community",
+    "langchain_google_genai",
+    "openai",
+    "anthropic",
+    "bs4",
+    "pandas",
+    "selenium",
+    "playwright",
+)
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """Parse -X importtime output into (module, self_us, cumulative_us)"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def run_once(module: str) -> Tuple[float, List[Tuple[str, int, int]]]:
+    """Import the module in a fresh interpreter; return wall seconds and import rows"""
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR, PYTHONWARNINGS="ignore")
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr[-2000:])
+        raise SystemExit(f"Importing {module} failed")
+    return elapsed, parse_importtime(result.stderr)
+
+
+def benchmark(module: str, runs: int) -> Dict[str, object]:
+    """Best-of-N wall time plus per-module cumulative import times (best run per module)"""
+    wall_times = []
+    cumulative: Dict[str, int] = {}
+    self_times: Dict[str, int] = {}
+    loaded = set()
+    for _ in range(runs):
+        elapsed, rows = run_once(module)
+        wall_times.append(elapsed)
+        for name, self_us, cumulative_us in rows:
+            loaded.add(name)
+            cumulative[name] = min(cumulative.get(name, cumulative_us), cumulative_us)
+            self_times[name] = min(self_times.get(name, self_us), self_us)
+
+    lazy_loaded = sorted(
+        name for name in loaded
+        if name.split(".")[0] in LAZY_MODULES and "." not in name
+    )
+    return {
+        "module": module,
+        "runs": runs,
+        "wall_seconds": round(min(wall_times), 3),
+        "import_seconds": round(cumulative.get(module, 0) / 1e6, 3),
+        "modules": [
+            {
+                "name": name,
+                "cumulative_ms": round(cumulative[name] / 1000, 1),
+                "self_ms": round(self_times[name] / 1000, 1)
+            }
+            for name in sorted(cumulative, key=cumulative.get, reverse=True)
+        ],
+        "lazy_violations": lazy_loaded
+    }
+
+
+def print_report(report: Dict[str, object], top: int) -> None:
+    print(f"Startup benchmark: import {report['module']} (best of {report['runs']})")
+    print(f"  interpreter wall time: {report['wall_seconds']:.3f} s")
+    print(f"  import time:           {report['import_seconds']:.3f} s")
+    print()
+    print(f"  {'cumulative ms':>14} {'self ms':>9}  module")
+    for row in report["modules"][:top]:
+        print(f"  {row['cumulative_ms']:>14.1f} {row['self_ms']:>9.1f}  {row['name']}")
+
+    app_rows = [row for row in report["modules"] if row["name"].startswith("app.")]
+    if app_rows:
+        print()
+        print("  App modules:")
+        for row in app_rows:
+            print(f"  {row['cumulative_ms']:>14.1f} {row['self_ms']:>9.1f}  {row['name']}")
+
+    if report["lazy_violations"]:
+        print()
+        print(f"  Loaded at startup but should be lazy: {', '.join(report['lazy_violations'])}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure app import time per module")
+    parser.add_argument("--module", default="main", help="Module to import (default: main)")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to run (best is kept)")
+    parser.add_argument("--top", type=int, default=20, help="Slowest modules to list")
+    parser.add_argument("--budget", type=float, help="Fail if import time exceeds this many seconds")
+    parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    args = parser.parse_args()
+
+    report = benchmark(args.module, max(1, args.runs))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, args.top)
+
+    failed = bool(report["lazy_violations"])
+    if args.budget is not None and report["import_seconds"] > args.budget:
+        print(f"\nImport time {report['import_seconds']:.3f} s exceeds budget {args.budget:.3f} s", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,15 @@
 """
 Main FastAPI application
 """
+import asyncio
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 from app.core.config import settings
+from app.core.metrics import MetricsMiddleware, CONTENT_TYPE as METRICS_CONTENT_TYPE, registry as metrics_registry
 from app.models.database import init_db
 from app.api import workflow, llm_config, learning
 
@@ -26,35 +28,46 @@ async def lifespan(app: FastAPI):
     await init_db()
     print("✅ Database initialized")
     
-    # Start scheduler for learning
-    if settings.LEARNING_ENABLED:
-        from app.services.learning_service import LearningService
-        from app.models.database import AsyncSessionLocal
-        
-        async def scheduled_learning():
-            async with AsyncSessionLocal() as db:
-                service = LearningService(db)
-                await service.run_learning_cycle()
-                print("✅ Scheduled learning cycle completed")
-        
-        # Schedule weekly learning
-        scheduler.add_job(
-            scheduled_learning,
-            'cron',
-            day_of_week=0,  # Sunday
-            hour=0,
-            minute=0
-        )
-        scheduler.start()
-        print("✅ Learning scheduler started (weekly on Sundays)")
+    # Build the relevance index
+    from app.services.example_index import example_index
+    from app.models.database import AsyncSessionLocal
+    async with AsyncSessionLocal() as db:
+        indexed = await example_index.refresh(db, force=True)
+    print(f"✅ Example index built ({indexed} examples)")
+    
+    # Bring legacy examples up to date in the background, in one process only;
+    # with a separate learning worker, the worker does it
+    backfills = None
+    if settings.LEARNING_SCHEDULER_IN_PROCESS:
+        from app.worker import run_backfills
+        backfills = asyncio.create_task(run_backfills())
+    
+    # Start scheduler for learning (off when a separate `python -m app.worker learn` runs it)
+    if settings.LEARNING_ENABLED and settings.LEARNING_SCHEDULER_IN_PROCESS:
+        from app.worker import start_learning_scheduler
+        start_learning_scheduler(scheduler)
+        print(f"✅ Learning scheduler started ({settings.LEARNING_SCHEDULE_CRON})")
     
     print(f"🌐 Server running on {settings.HOST}:{settings.PORT}")
     
     yield
     
     # Shutdown
+    if backfills is not None and not backfills.done():
+        backfills.cancel()
+        await asyncio.gather(backfills, return_exceptions=True)
+    
     if scheduler.running:
         scheduler.shutdown()
+    
+    from app.services.job_service import job_manager
+    await job_manager.stop()
+    
+    from app.services.llm_client_pool import llm_client_registry
+    await llm_client_registry.aclose()
+    
+    from app.services.learning_parsers import parse_pool
+    parse_pool.shutdown()
     print("👋 Shutting down...")
 
 
@@ -73,6 +86,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 # Include routers
 app.include_router(workflow.router)
@@ -96,6 +110,12 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics"""
+    return Response(metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
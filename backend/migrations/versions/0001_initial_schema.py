@@ -0,0 +1,152 @@
+"""initial schema
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('config_versions',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table('learned_examples',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('source', sa.String(length=255), nullable=False),
+    sa.Column('source_url', sa.String(length=512), nullable=True),
+    sa.Column('workflow_json', sa.Text(), nullable=False),
+    sa.Column('workflow_summary', sa.Text(), nullable=True),
+    sa.Column('content_hash', sa.String(length=64), nullable=True),
+    sa.Column('tags', sa.JSON(), nullable=True),
+    sa.Column('nodes_used', sa.JSON(), nullable=True),
+    sa.Column('complexity_level', sa.String(length=50), nullable=True),
+    sa.Column('stars', sa.Integer(), nullable=True),
+    sa.Column('learned_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('learned_examples', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_learned_examples_content_hash'), ['content_hash'], unique=True)
+        batch_op.create_index(batch_op.f('ix_learned_examples_id'), ['id'], unique=False)
+        batch_op.create_index('ix_learned_examples_source_stars', ['source', 'stars', 'learned_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_learned_examples_source_url'), ['source_url'], unique=False)
+        batch_op.create_index('ix_learned_examples_stars_learned_at', ['stars', 'learned_at'], unique=False)
+
+    op.create_table('learning_logs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('learning_type', sa.String(length=50), nullable=False),
+    sa.Column('examples_found', sa.Integer(), nullable=True),
+    sa.Column('examples_added', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('error_message', sa.Text(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('learning_logs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_learning_logs_id'), ['id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_learning_logs_started_at'), ['started_at'], unique=False)
+
+    op.create_table('llm_configs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('provider', sa.String(length=50), nullable=False),
+    sa.Column('api_key', sa.String(length=255), nullable=True),
+    sa.Column('api_url', sa.String(length=512), nullable=True),
+    sa.Column('model_name', sa.String(length=100), nullable=False),
+    sa.Column('temperature', sa.Integer(), nullable=True),
+    sa.Column('max_tokens', sa.Integer(), nullable=True),
+    sa.Column('max_concurrency', sa.Integer(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('is_default', sa.Boolean(), nullable=True),
+    sa.Column('is_secondary', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('llm_configs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_llm_configs_id'), ['id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_llm_configs_is_active'), ['is_active'], unique=False)
+
+    op.create_table('llm_response_cache',
+    sa.Column('key', sa.String(length=64), nullable=False),
+    sa.Column('provider', sa.String(length=50), nullable=False),
+    sa.Column('model_name', sa.String(length=100), nullable=True),
+    sa.Column('response', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    with op.batch_alter_table('llm_response_cache', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_llm_response_cache_expires_at'), ['expires_at'], unique=False)
+
+    op.create_table('node_usage_stats',
+    sa.Column('node_type', sa.String(length=255), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('node_type')
+    )
+    op.create_table('workflow_requests',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_requirement', sa.Text(), nullable=False),
+    sa.Column('analyzed_requirement', sa.JSON(), nullable=True),
+    sa.Column('questions_asked', sa.JSON(), nullable=True),
+    sa.Column('user_answers', sa.JSON(), nullable=True),
+    sa.Column('development_spec', sa.Text(), nullable=True),
+    sa.Column('generated_json', sa.Text(), nullable=True),
+    sa.Column('test_results', sa.JSON(), nullable=True),
+    sa.Column('final_json', sa.Text(), nullable=True),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('workflow_requests', schema=None) as batch_op:
+        batch_op.create_index('ix_workflow_requests_created_at_id', ['created_at', 'id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_workflow_requests_id'), ['id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_workflow_requests_status'), ['status'], unique=False)
+
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('workflow_requests', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_workflow_requests_status'))
+        batch_op.drop_index(batch_op.f('ix_workflow_requests_id'))
+        batch_op.drop_index('ix_workflow_requests_created_at_id')
+
+    op.drop_table('workflow_requests')
+    op.drop_table('node_usage_stats')
+    with op.batch_alter_table('llm_response_cache', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_llm_response_cache_expires_at'))
+
+    op.drop_table('llm_response_cache')
+    with op.batch_alter_table('llm_configs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_llm_configs_is_active'))
+        batch_op.drop_index(batch_op.f('ix_llm_configs_id'))
+
+    op.drop_table('llm_configs')
+    with op.batch_alter_table('learning_logs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_learning_logs_started_at'))
+        batch_op.drop_index(batch_op.f('ix_learning_logs_id'))
+
+    op.drop_table('learning_logs')
+    with op.batch_alter_table('learned_examples', schema=None) as batch_op:
+        batch_op.drop_index('ix_learned_examples_stars_learned_at')
+        batch_op.drop_index(batch_op.f('ix_learned_examples_source_url'))
+        batch_op.drop_index('ix_learned_examples_source_stars')
+        batch_op.drop_index(batch_op.f('ix_learned_examples_id'))
+        batch_op.drop_index(batch_op.f('ix_learned_examples_content_hash'))
+
+    op.drop_table('learned_examples')
+    op.drop_table('config_versions')
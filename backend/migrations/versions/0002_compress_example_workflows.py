@@ -0,0 +1,86 @@
+"""store learned example workflows compressed
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+ZLIB_HEADER = b"\x78"
+
+
+def _rewrite(convert) -> None:
+    """Apply convert to every workflow body, in id order and in batches"""
+    connection = op.get_bind()
+    examples = sa.table(
+        'learned_examples',
+        sa.column('id', sa.Integer()),
+        sa.column('workflow_json', sa.LargeBinary())
+    )
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(examples.c.id, examples.c.workflow_json)
+            .where(examples.c.id > last_id)
+            .order_by(examples.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        for example_id, body in rows:
+            converted = convert(body)
+            if converted is not None:
+                connection.execute(
+                    examples.update().where(examples.c.id == example_id).values(workflow_json=converted)
+                )
+        last_id = rows[-1][0]
+
+
+def _compress(body):
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    body = bytes(body)
+    if body[:1] == ZLIB_HEADER:
+        return None
+    return zlib.compress(body, 6)
+
+
+def _decompress(body):
+    body = bytes(body)
+    if body[:1] != ZLIB_HEADER:
+        return None
+    return zlib.decompress(body)
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('learned_examples', schema=None) as batch_op:
+        batch_op.alter_column(
+            'workflow_json',
+            existing_type=sa.Text(),
+            type_=sa.LargeBinary(),
+            existing_nullable=False,
+            postgresql_using="convert_to(workflow_json, 'UTF8')"
+        )
+    _rewrite(_compress)
+
+
+def downgrade() -> None:
+    _rewrite(_decompress)
+    with op.batch_alter_table('learned_examples', schema=None) as batch_op:
+        batch_op.alter_column(
+            'workflow_json',
+            existing_type=sa.LargeBinary(),
+            type_=sa.Text(),
+            existing_nullable=False,
+            postgresql_using="convert_from(workflow_json, 'UTF8')"
+        )
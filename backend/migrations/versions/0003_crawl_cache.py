@@ -0,0 +1,37 @@
+"""crawl cache for conditional re-fetching
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('crawl_cache',
+    sa.Column('url', sa.String(length=1024), nullable=False),
+    sa.Column('source', sa.String(length=50), nullable=False),
+    sa.Column('etag', sa.String(length=255), nullable=True),
+    sa.Column('last_modified', sa.String(length=64), nullable=True),
+    sa.Column('content_hash', sa.String(length=64), nullable=True),
+    sa.Column('body', sa.LargeBinary(), nullable=True),
+    sa.Column('fetched_at', sa.DateTime(), nullable=True),
+    sa.Column('checked_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('url')
+    )
+    with op.batch_alter_table('crawl_cache', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_crawl_cache_source'), ['source'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('crawl_cache', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_crawl_cache_source'))
+
+    op.drop_table('crawl_cache')
@@ -0,0 +1,41 @@
+"""structural fingerprints and LSH buckets for near-duplicate examples
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('example_lsh_buckets',
+    sa.Column('bucket', sa.String(length=32), nullable=False),
+    sa.Column('example_id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('bucket', 'example_id')
+    )
+    with op.batch_alter_table('example_lsh_buckets', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_example_lsh_buckets_example_id'), ['example_id'], unique=False)
+
+    with op.batch_alter_table('learned_examples', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('minhash', sa.JSON(), nullable=True))
+        batch_op.add_column(sa.Column('duplicate_of', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_learned_examples_duplicate_of'), ['duplicate_of'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('learned_examples', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_learned_examples_duplicate_of'))
+        batch_op.drop_column('duplicate_of')
+        batch_op.drop_column('minhash')
+
+    with op.batch_alter_table('example_lsh_buckets', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_example_lsh_buckets_example_id'))
+
+    op.drop_table('example_lsh_buckets')
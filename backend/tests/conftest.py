@@ -0,0 +1,13 @@
+"""
+Test settings: a throwaway SQLite database and no background learning
+"""
+import os
+import sys
+import tempfile
+
+_data_dir = tempfile.mkdtemp(prefix="n8n-tests-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(_data_dir, 'test.db')}"
+os.environ["LEARNING_PARSE_WORKERS"] = "1"
+os.environ["GITHUB_TOKEN"] = "test-token"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,66 @@
+"""
+Leader lock leases: re-entrance, lingering and losing the lease
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from app.models.database import AsyncSessionLocal, LeaderLock, init_db
+from app.services.leader_lock import DatabaseLeaderLock, LeaderLockHeld, LeaderLockLost
+
+
+def test_lock_is_not_reentrant_within_a_process():
+    lock = DatabaseLeaderLock("test_reentrant", ttl_seconds=60)
+
+    async def scenario():
+        await init_db()
+        async with lock.hold():
+            assert await lock.is_running()
+            with pytest.raises(LeaderLockHeld):
+                async with lock.hold():
+                    pass
+        assert not await lock.is_running()
+
+    asyncio.run(scenario())
+
+
+def test_lingering_lease_blocks_other_processes_only():
+    lock = DatabaseLeaderLock("test_linger", ttl_seconds=60)
+    other = DatabaseLeaderLock("test_linger", ttl_seconds=60)
+
+    async def scenario():
+        await init_db()
+        async with lock.hold(linger=True):
+            pass
+        assert not await lock.is_running()
+        assert await other.is_running()
+        with pytest.raises(LeaderLockHeld):
+            async with other.hold():
+                pass
+        async with lock.hold():
+            pass
+
+    asyncio.run(scenario())
+
+
+def test_losing_the_lease_cancels_the_block():
+    lock = DatabaseLeaderLock("test_lost", ttl_seconds=0.3)
+
+    async def scenario():
+        await init_db()
+        with pytest.raises(LeaderLockLost):
+            async with lock.hold():
+                async with AsyncSessionLocal() as db:
+                    await db.execute(
+                        update(LeaderLock)
+                        .where(LeaderLock.name == "test_lost")
+                        .values(holder="another-process", expires_at=datetime.utcnow() + timedelta(minutes=1))
+                    )
+                    await db.commit()
+                await asyncio.wait_for(asyncio.sleep(5), timeout=3)
+        assert not lock.held
+        assert await lock.current_holder() == "another-process"
+
+    asyncio.run(scenario())
@@ -0,0 +1,109 @@
+"""
+Conditional re-crawling of GitHub workflow files
+"""
+import asyncio
+import json
+
+import httpx
+
+from app.models.database import AsyncSessionLocal, init_db
+from app.services.learning_parsers import parse_pool
+from app.services.learning_service import LearningService
+
+
+def workflow(name: str) -> str:
+    return json.dumps({
+        "name": name,
+        "nodes": [{"name": "Start", "type": "n8n-nodes-base.start"}],
+        "connections": {},
+        "padding": "x" * 100
+    })
+
+
+class FakeGitHub:
+    """One repo whose tree lists a.json and b.json, with ETag support"""
+
+    def __init__(self, repo: str):
+        self.repo = repo
+        self.fail_b = True
+        self.requested = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        url = str(request.url)
+        self.requested.append(request.url.path)
+        etag = f'"{self.repo}{request.url.path}"'
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304)
+        headers = {"ETag": etag}
+        if "search/repositories" in url:
+            return httpx.Response(200, headers=headers, json={"items": [{
+                "name": self.repo,
+                "full_name": f"owner/{self.repo}",
+                "stargazers_count": 100,
+                "default_branch": "main",
+                "trees_url": f"https://api.github.com/repos/owner/{self.repo}/git/trees{{/sha}}"
+            }]})
+        if "git/trees" in url:
+            return httpx.Response(200, headers=headers, json={"tree": [
+                {"type": "blob", "path": "a.json", "size": 500},
+                {"type": "blob", "path": "b.json", "size": 500}
+            ]})
+        if url.endswith("/b.json") and self.fail_b:
+            return httpx.Response(500)
+        return httpx.Response(200, headers=headers, text=workflow(request.url.path))
+
+
+async def crawl(github: FakeGitHub) -> dict:
+    async with httpx.AsyncClient(transport=httpx.MockTransport(github)) as client:
+        async with AsyncSessionLocal() as db:
+            return await LearningService(db, http_client=client).learn_from_github()
+
+
+def test_failed_download_is_retried_after_unchanged_tree():
+    async def scenario():
+        await init_db()
+        github = FakeGitHub("flaky-download")
+        first = await crawl(github)
+        assert first["examples_added"] == 1
+        assert first["fetches"]["failed"] == 1
+
+        github.fail_b = False
+        github.requested.clear()
+        second = await crawl(github)
+        assert "/owner/flaky-download/main/b.json" in github.requested
+        assert second["examples_added"] == 1
+
+        # Everything fetched: the tree is cached and the next run stops there
+        github.requested.clear()
+        third = await crawl(github)
+        assert third["examples_added"] == 0
+        assert not any(path.endswith(".json") for path in github.requested)
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        parse_pool.shutdown()
+
+
+def test_tree_is_recrawled_after_failed_analysis(monkeypatch):
+    async def failing_map_batches(func, items, batch_size):
+        raise RuntimeError("parser worker died")
+
+    async def scenario():
+        await init_db()
+        github = FakeGitHub("flaky-parser")
+        github.fail_b = False
+        with monkeypatch.context() as patch:
+            patch.setattr(parse_pool, "map_batches", failing_map_batches)
+            first = await crawl(github)
+        assert first["examples_added"] == 0
+
+        github.requested.clear()
+        second = await crawl(github)
+        assert "/owner/flaky-parser/main/a.json" in github.requested
+        assert second["examples_added"] == 2
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        parse_pool.shutdown()
@@ -0,0 +1,63 @@
+"""
+Storing learned examples while another session stores the same ones
+"""
+import asyncio
+import json
+
+from sqlalchemy import func, select
+
+from app.models.database import AsyncSessionLocal, LearnedExample, init_db
+from app.services.learning_parsers import analyze_workflow
+from app.services.learning_service import LearningService
+from app.services.workflow_fingerprint import signature_similarity
+
+
+def workflow(marker: str) -> str:
+    return json.dumps({
+        "nodes": [
+            {"name": f"Node {n}", "type": f"n8n-nodes-base.step{n}", "parameters": {"value": n}}
+            for n in range(30)
+        ] + [{"name": "Marker", "type": "n8n-nodes-base.set", "parameters": {"value": marker}}],
+        "connections": {}
+    })
+
+
+def example(text: str) -> LearnedExample:
+    return LearnedExample(
+        title="Race",
+        source="github",
+        source_url=f"https://example.com/{hash(text)}.json",
+        **analyze_workflow(text)
+    )
+
+
+def test_examples_stored_meanwhile_are_skipped():
+    original = workflow("race-original")
+    near_duplicate = workflow("race-variant")
+
+    async def scenario():
+        await init_db()
+        first, second = example(original), example(near_duplicate)
+        assert signature_similarity(first.minhash, second.minhash) >= 0.9
+
+        # Another session stores the original after our duplicate check ran
+        async with AsyncSessionLocal() as db:
+            assert await LearningService(db)._store_examples([example(original)]) == 1
+            await db.commit()
+
+        async with AsyncSessionLocal() as db:
+            service = LearningService(db)
+            inserted = await service._cluster_near_duplicates([first, second], insert=True)
+            await db.commit()
+            assert inserted == [second]
+
+            stored = await db.scalar(
+                select(LearnedExample.id).where(LearnedExample.content_hash == first.content_hash)
+            )
+            assert second.duplicate_of == stored
+            count = await db.scalar(
+                select(func.count()).where(LearnedExample.content_hash == first.content_hash)
+            )
+            assert count == 1
+
+    asyncio.run(scenario())
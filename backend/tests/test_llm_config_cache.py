@@ -0,0 +1,28 @@
+"""
+Shared version counter behind the per-process LLM config cache
+"""
+import asyncio
+
+from app.models.database import AsyncSessionLocal, ConfigVersion, init_db
+from app.services.llm_config_cache import LLM_CONFIG_VERSION_KEY, ActiveLLMConfigCache
+
+
+def test_concurrent_invalidations_all_count():
+    cache = ActiveLLMConfigCache(check_interval=0)
+
+    async def invalidate():
+        async with AsyncSessionLocal() as db:
+            await cache.invalidate(db)
+
+    async def version():
+        async with AsyncSessionLocal() as db:
+            row = await db.get(ConfigVersion, LLM_CONFIG_VERSION_KEY)
+            return row.version if row else 0
+
+    async def scenario():
+        await init_db()
+        before = await version()
+        await asyncio.gather(*[invalidate() for _ in range(5)])
+        assert await version() == before + 5
+
+    asyncio.run(scenario())
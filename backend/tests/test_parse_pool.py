@@ -0,0 +1,40 @@
+"""
+Recovering the parser process pool after a worker dies
+"""
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from app.services import learning_parsers
+from app.services.learning_parsers import ParsePool
+
+
+def exit_once(marker: str, value: int) -> int:
+    """Kill the worker the first time any task runs, then succeed"""
+    if not os.path.exists(marker):
+        open(marker, "w").close()
+        os._exit(1)
+    return value
+
+
+def test_broken_pool_is_replaced_once(monkeypatch, tmp_path):
+    started = []
+
+    class CountingExecutor(ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            started.append(self)
+
+    monkeypatch.setattr(learning_parsers, "ProcessPoolExecutor", CountingExecutor)
+    pool = ParsePool(max_workers=1)
+    marker = str(tmp_path / "died")
+
+    async def scenario():
+        return await asyncio.gather(*[pool.run(exit_once, marker, n) for n in range(20)])
+
+    try:
+        assert asyncio.run(scenario()) == list(range(20))
+        # Every queued task saw the pool break, but only one replaced it
+        assert len(started) == 2
+    finally:
+        pool.shutdown()
@@ -0,0 +1,75 @@
+"""
+Keyset pagination of the workflow history
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+from fastapi import FastAPI
+
+from app.api import workflow
+from app.models.database import AsyncSessionLocal, WorkflowRequest, init_db
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(workflow.router)
+    return app
+
+
+async def add_requests(count: int) -> None:
+    """Requests in pairs sharing a created_at, so ties are broken by id"""
+    base = datetime(2024, 1, 1)
+    async with AsyncSessionLocal() as db:
+        db.add_all([
+            WorkflowRequest(
+                user_requirement=f"Requirement {n}",
+                created_at=base + timedelta(minutes=n // 2),
+                updated_at=base
+            )
+            for n in range(count)
+        ])
+        await db.commit()
+
+
+def test_cursor_walks_every_request_once():
+    async def scenario():
+        await init_db()
+        await add_requests(7)
+        transport = httpx.ASGITransport(app=make_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            everything = (await client.get("/api/workflow/", params={"limit": 100})).json()
+            expected = [item["id"] for item in everything["items"]]
+            assert len(expected) == everything["total"]
+            assert everything["next_cursor"] is None
+
+            seen = []
+            params = {"limit": 2}
+            while True:
+                page = (await client.get("/api/workflow/", params=params)).json()
+                assert len(page["items"]) <= 2
+                seen.extend(item["id"] for item in page["items"])
+                if page["next_cursor"] is None:
+                    break
+                params = {"limit": 2, "cursor": page["next_cursor"]}
+            assert seen == expected
+
+            # A page that ends exactly on the last row has no cursor
+            last = (await client.get("/api/workflow/", params={"limit": len(expected)})).json()
+            assert last["next_cursor"] is None
+
+    asyncio.run(scenario())
+
+
+def test_invalid_paging_is_rejected():
+    async def scenario():
+        await init_db()
+        transport = httpx.ASGITransport(app=make_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for params in ({"limit": 0}, {"limit": -1}, {"limit": 101}, {"skip": -1}):
+                response = await client.get("/api/workflow/", params=params)
+                assert response.status_code == 422, params
+            response = await client.get("/api/workflow/", params={"cursor": "not-a-cursor"})
+            assert response.status_code == 400
+
+    asyncio.run(scenario())
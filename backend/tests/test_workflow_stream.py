@@ -0,0 +1,136 @@
+"""
+Streaming endpoints when the client goes away mid-stream
+"""
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+
+from app.api import workflow
+from app.core.metrics import pipeline_stage_duration_seconds
+from app.models.database import AsyncSessionLocal, WorkflowRequest, init_db
+from app.services.workflow_service import WorkflowService
+
+
+class StalledLLM:
+    """Sends two chunks, then never finishes"""
+
+    async def _stream(self, *args, **kwargs):
+        yield '```json\n{"nodes": ['
+        yield '{"name": "Start"'
+        await asyncio.Event().wait()
+
+    stream_development_spec = _stream
+    stream_n8n_json = _stream
+
+
+async def no_examples(self, requirement):
+    return []
+
+
+async def stalled_llm(self):
+    return StalledLLM()
+
+
+async def disconnect_after_chunks(app: FastAPI, path: str, chunks: int) -> None:
+    """Drive a request over raw ASGI and disconnect once enough body chunks arrived"""
+    received = asyncio.Event()
+    bodies = []
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await received.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            bodies.append(message["body"])
+            if len(bodies) >= chunks:
+                received.set()
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [],
+        "client": ("test", 1),
+        "server": ("test", 80)
+    }
+    await asyncio.wait_for(app(scope, receive, send), timeout=5)
+    assert len(bodies) >= chunks
+
+
+def stage_count(stage: str, status: str) -> int:
+    return sum(pipeline_stage_duration_seconds.labels(stage, status).counts)
+
+
+@pytest.mark.parametrize("endpoint, field, stage", [
+    ("generate-spec/stream", "development_spec", "stream_development_spec"),
+    ("generate-json/stream", "generated_json", "stream_workflow_json")
+])
+def test_disconnect_marks_request_failed(monkeypatch, endpoint, field, stage):
+    monkeypatch.setattr(WorkflowService, "_get_llm_service", stalled_llm)
+    monkeypatch.setattr(WorkflowService, "_get_spec_examples", no_examples)
+    monkeypatch.setattr(WorkflowService, "_get_json_examples", no_examples)
+    app = FastAPI()
+    app.include_router(workflow.router)
+
+    async def scenario():
+        await init_db()
+        async with AsyncSessionLocal() as db:
+            request = WorkflowRequest(
+                user_requirement="Post new RSS items to Slack",
+                development_spec="spec",
+                status="spec_approved"
+            )
+            db.add(request)
+            await db.commit()
+            request_id = request.id
+
+        errors = stage_count(stage, "error")
+        await disconnect_after_chunks(app, f"/api/workflow/{request_id}/{endpoint}", chunks=2)
+        assert stage_count(stage, "error") == errors + 1
+
+        async with AsyncSessionLocal() as db:
+            request = await db.get(WorkflowRequest, request_id)
+            assert request.status == "failed"
+            assert '"name": "Start"' in getattr(request, field)
+
+    asyncio.run(scenario())
+
+
+def test_completed_stream_is_timed(monkeypatch):
+    class FinishingLLM:
+        async def stream_development_spec(self, *args, **kwargs):
+            yield "# Spec"
+
+    async def finishing_llm(self):
+        return FinishingLLM()
+
+    monkeypatch.setattr(WorkflowService, "_get_llm_service", finishing_llm)
+    monkeypatch.setattr(WorkflowService, "_get_spec_examples", no_examples)
+
+    async def scenario():
+        await init_db()
+        async with AsyncSessionLocal() as db:
+            request = WorkflowRequest(user_requirement="Send a daily report", status="generating_spec")
+            db.add(request)
+            await db.commit()
+
+            ok = stage_count("stream_development_spec", "ok")
+            chunks = await WorkflowService(db).stream_development_spec(request.id)
+            assert [chunk async for chunk in chunks] == ["# Spec"]
+            assert stage_count("stream_development_spec", "ok") == ok + 1
+            assert request.status == "spec_review"
+
+    asyncio.run(scenario())
@@ -0,0 +1,38 @@
+"""
+Local structural validation of generated workflows
+"""
+import json
+
+import pytest
+
+from app.services.workflow_validator import validate_workflow
+
+
+def workflow(nodes, connections) -> str:
+    return json.dumps({"nodes": nodes, "connections": connections})
+
+
+WEBHOOK = {"name": "Hook", "type": "n8n-nodes-base.webhook"}
+SLACK = {"name": "Slack", "type": "n8n-nodes-base.slack"}
+
+
+def test_valid_workflow_passes():
+    report = validate_workflow("```json\n" + workflow(
+        [WEBHOOK, SLACK],
+        {"Hook": {"main": [[{"node": "Slack", "type": "main", "index": 0}], None]}}
+    ) + "\n```")
+    assert report.passed, report.errors
+    assert report.warnings == []
+
+
+@pytest.mark.parametrize("nodes, connections, error", [
+    ([WEBHOOK], {"Hook": {"main": 5}}, "'main' connections of 'Hook' must be an array"),
+    ([WEBHOOK], {"Hook": ["Slack"]}, "Connections of 'Hook' must be an object"),
+    ([WEBHOOK], {"Hook": {"main": [{"node": "Slack"}]}}, "'main' output of 'Hook' must be an array of links"),
+    ([WEBHOOK], {"Hook": {"main": [[{"node": ["Slack"]}]]}}, "Connection from 'Hook' has a link without a target node name"),
+    ([WEBHOOK, {"name": ["Slack"], "type": "n8n-nodes-base.slack"}], {}, "Node #2 name must be a string"),
+    ([WEBHOOK, {"name": "Slack", "type": {"id": 1}}], {}, "Node 'Slack' type must be a string"),
+])
+def test_malformed_shapes_are_reported(nodes, connections, error):
+    report = validate_workflow(workflow(nodes, connections))
+    assert error in report.errors
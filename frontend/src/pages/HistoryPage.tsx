@@ -1,10 +1,12 @@
 import { useState, useEffect } from 'react';
 import { Clock, Eye, Download } from 'lucide-react';
 import Editor from '@monaco-editor/react';
-import { workflowApi, WorkflowRequest } from '../services/api';
+import { workflowApi, WorkflowRequest, WorkflowSummary } from '../services/api';
 
 export default function HistoryPage() {
-  const [workflows, setWorkflows] = useState<WorkflowRequest[]>([]);
+  const [workflows, setWorkflows] = useState<WorkflowSummary[]>([]);
+  const [total, setTotal] = useState(0);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [selectedWorkflow, setSelectedWorkflow] = useState<WorkflowRequest | null>(null);
   const [loading, setLoading] = useState(true);
 
@@ -15,8 +17,10 @@ export default function HistoryPage() {
   const loadWorkflows = async () => {
     try {
       setLoading(true);
-      const result = await workflowApi.list(0, 50);
+      const result = await workflowApi.list(50);
       setWorkflows(result.items);
+      setTotal(result.total);
+      setNextCursor(result.next_cursor || null);
     } catch (error) {
       console.error('Failed to load workflows:', error);
     } finally {
@@ -24,6 +28,27 @@ export default function HistoryPage() {
     }
   };
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    try {
+      const result = await workflowApi.list(50, nextCursor);
+      setWorkflows((prev) => [...prev, ...result.items]);
+      setTotal(result.total);
+      setNextCursor(result.next_cursor || null);
+    } catch (error) {
+      console.error('Failed to load workflows:', error);
+    }
+  };
+
+  // The list only carries summaries, so fetch the full request on selection
+  const selectWorkflow = async (workflowId: number) => {
+    try {
+      setSelectedWorkflow(await workflowApi.get(workflowId));
+    } catch (error) {
+      console.error('Failed to load workflow:', error);
+    }
+  };
+
   const getStatusColor = (status: string) => {
     const colors: Record<string, string> = {
       completed: 'text-green-400',
@@ -74,7 +99,7 @@ export default function HistoryPage() {
         <div className="bg-gray-800 border-b border-gray-700 px-6 py-4">
           <h2 className="text-xl font-semibold">워크플로우 히스토리</h2>
           <p className="text-sm text-gray-400 mt-1">
-            생성한 워크플로우 목록: {workflows.length}개
+            생성한 워크플로우 목록: {total}개
           </p>
         </div>
 
@@ -92,7 +117,7 @@ export default function HistoryPage() {
                 className={`p-4 cursor-pointer hover:bg-gray-800 transition-colors ${
                   selectedWorkflow?.id === workflow.id ? 'bg-gray-800' : ''
                 }`}
-                onClick={() => setSelectedWorkflow(workflow)}
+                onClick={() => selectWorkflow(workflow.id)}
               >
                 <div className="flex items-start justify-between mb-2">
                   <span className="text-sm font-medium text-gray-300">
@@ -103,7 +128,7 @@ export default function HistoryPage() {
                   </span>
                 </div>
                 <p className="text-sm text-gray-400 line-clamp-2 mb-2">
-                  {workflow.user_requirement}
+                  {workflow.requirement_preview}
                 </p>
                 <div className="flex items-center text-xs text-gray-500">
                   <Clock className="w-3 h-3 mr-1" />
@@ -111,6 +136,14 @@ export default function HistoryPage() {
                 </div>
               </div>
             ))}
+            {nextCursor && (
+              <button
+                className="w-full p-4 text-sm text-blue-400 hover:bg-gray-800 transition-colors"
+                onClick={loadMore}
+              >
+                더 보기
+              </button>
+            )}
           </div>
         )}
       </div>
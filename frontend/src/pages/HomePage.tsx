@@ -74,7 +74,10 @@ export default function HomePage() {
 
   const handleGenerateSpec = async (workflowId: number) => {
     try {
-      const result = await workflowApi.generateSpec(workflowId);
+      setDevelopmentSpec('');
+      const result = await workflowApi.generateSpecStream(workflowId, (token) =>
+        setDevelopmentSpec((prev) => prev + token)
+      );
       setDevelopmentSpec(result.development_spec);
       setCurrentStep('spec_review');
     } catch (err: any) {
@@ -92,7 +95,10 @@ export default function HomePage() {
       await workflowApi.updateSpec(currentWorkflow.id, developmentSpec);
       
       // Generate JSON
-      const result = await workflowApi.generateJson(currentWorkflow.id);
+      setGeneratedJson('');
+      const result = await workflowApi.generateJsonStream(currentWorkflow.id, (token) =>
+        setGeneratedJson((prev) => prev + token)
+      );
       setGeneratedJson(result.workflow_json);
       
       // Test and optimize
@@ -240,6 +246,11 @@ export default function HomePage() {
               <p className="text-gray-400">
                 수집된 정보를 바탕으로 상세한 개발요구서를 작성하고 있습니다.
               </p>
+              {developmentSpec && (
+                <pre className="mt-4 max-h-96 overflow-auto text-left bg-gray-900 rounded-lg p-4 text-sm text-gray-300 whitespace-pre-wrap">
+                  {developmentSpec}
+                </pre>
+              )}
             </div>
           )}
 
@@ -274,6 +285,11 @@ export default function HomePage() {
                   : '생성된 코드 테스트 및 최적화 중...'}
               </h3>
               <p className="text-gray-400">잠시만 기다려주세요.</p>
+              {currentStep === 'generating_json' && generatedJson && (
+                <pre className="mt-4 max-h-96 overflow-auto text-left bg-gray-900 rounded-lg p-4 text-sm text-gray-300 whitespace-pre-wrap">
+                  {generatedJson}
+                </pre>
+              )}
             </div>
           )}
 
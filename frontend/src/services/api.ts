@@ -37,6 +37,33 @@ export interface WorkflowRequest {
   updated_at: string;
 }
 
+export interface WorkflowSummary {
+  id: number;
+  status: string;
+  requirement_preview: string;
+  created_at: string;
+  updated_at: string;
+}
+
+export interface WorkflowList {
+  total: number;
+  items: WorkflowSummary[];
+  next_cursor?: string | null;
+}
+
+export interface PipelineJob {
+  job_id: string;
+  kind: string;
+  status: string;
+  stage?: string | null;
+  request_id?: number | null;
+  error?: string | null;
+  result?: any;
+  created_at: string;
+  started_at?: string | null;
+  finished_at?: string | null;
+}
+
 export interface LLMConfig {
   id?: number;
   name: string;
@@ -46,9 +73,57 @@ export interface LLMConfig {
   model_name: string;
   temperature: number;
   max_tokens: number;
+  max_concurrency?: number | null;
   is_default: boolean;
+  is_secondary?: boolean;
 }
 
+/**
+ * POST to a server-sent-event endpoint, calling onToken for each streamed
+ * token and resolving with the payload of the final 'done' event.
+ */
+const streamSse = async (
+  path: string,
+  onToken: (token: string) => void
+): Promise<Record<string, any>> => {
+  const response = await fetch(`${API_BASE_URL}${path}`, { method: 'POST' });
+  if (!response.ok || !response.body) {
+    const body = await response.json().catch(() => ({}));
+    throw { response: { data: body } };
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const raw = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = 'message';
+      let data = '';
+      for (const line of raw.split('\n')) {
+        if (line.startsWith('event: ')) event = line.slice(7);
+        else if (line.startsWith('data: ')) data += line.slice(6);
+      }
+      if (!data) continue;
+
+      const payload = JSON.parse(data);
+      if (event === 'token') onToken(payload.token);
+      else if (event === 'done') return payload;
+      else if (event === 'error') throw { response: { data: payload } };
+    }
+  }
+
+  throw { response: { data: { detail: 'Stream ended unexpectedly' } } };
+};
+
 // Workflow API
 export const workflowApi = {
   create: async (requirement: UserRequirement): Promise<WorkflowRequest> => {
@@ -71,6 +146,14 @@ export const workflowApi = {
     return response.data;
   },
 
+  generateSpecStream: async (
+    requestId: number,
+    onToken: (token: string) => void
+  ): Promise<{ development_spec: string }> => {
+    const result = await streamSse(`/api/workflow/${requestId}/generate-spec/stream`, onToken);
+    return result as { development_spec: string };
+  },
+
   updateSpec: async (requestId: number, spec: string): Promise<any> => {
     const response = await apiClient.put(`/api/workflow/${requestId}/update-spec`, {
       development_spec: spec,
@@ -83,6 +166,14 @@ export const workflowApi = {
     return response.data;
   },
 
+  generateJsonStream: async (
+    requestId: number,
+    onToken: (token: string) => void
+  ): Promise<{ workflow_json: string }> => {
+    const result = await streamSse(`/api/workflow/${requestId}/generate-json/stream`, onToken);
+    return result as { workflow_json: string };
+  },
+
   testAndOptimize: async (requestId: number): Promise<any> => {
     const response = await apiClient.post(`/api/workflow/${requestId}/test-optimize`);
     return response.data;
@@ -93,8 +184,28 @@ export const workflowApi = {
     return response.data;
   },
 
-  list: async (skip = 0, limit = 20): Promise<{ total: number; items: WorkflowRequest[] }> => {
-    const response = await apiClient.get('/api/workflow/', { params: { skip, limit } });
+  list: async (limit = 20, cursor?: string | null): Promise<WorkflowList> => {
+    const response = await apiClient.get('/api/workflow/', {
+      params: { limit, cursor: cursor || undefined },
+    });
+    return response.data;
+  },
+
+  run: async (
+    requirement: string,
+    answers?: { question: string; answer: string }[] | null
+  ): Promise<PipelineJob> => {
+    const response = await apiClient.post('/api/workflow/run', { requirement, answers });
+    return response.data;
+  },
+
+  runBatch: async (requirements: UserRequirement[]): Promise<PipelineJob> => {
+    const response = await apiClient.post('/api/workflow/batch', { requirements });
+    return response.data;
+  },
+
+  getJob: async (jobId: string): Promise<PipelineJob> => {
+    const response = await apiClient.get(`/api/workflow/jobs/${jobId}`);
     return response.data;
   },
 };